@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the tool layer.
+Seeds a local MySQL database and drives UnifiedFunctions tools directly,
+without LiveKit or an LLM. See benchmarks/README.md.
+"""
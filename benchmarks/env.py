@@ -0,0 +1,27 @@
+"""
+Benchmark environment.
+Points the application's database settings at the benchmark database.
+Import this before anything from ``src`` because the database modules read
+their settings at import time.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Defaults match benchmarks/docker-compose.yml; BENCH_DB_* override them
+BENCH_DB = {
+    "DB_HOST": os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+    "DB_PORT": os.getenv("BENCH_DB_PORT", "3307"),
+    "DB_USER": os.getenv("BENCH_DB_USER", "bench"),
+    "DB_PASSWORD": os.getenv("BENCH_DB_PASSWORD", "bench"),
+    "DB_NAME": os.getenv("BENCH_DB_NAME", "support_bench"),
+}
+
+os.environ.update(BENCH_DB)
+# Own write-behind spool, so an agent process never adopts and replays benchmark writes
+os.environ["WRITE_BEHIND_SPOOL_DIR"] = os.getenv(
+    "BENCH_WRITE_BEHIND_SPOOL_DIR", str(Path(__file__).resolve().with_name("spool")))
+# Keep benchmark output readable unless asked otherwise
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
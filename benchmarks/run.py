@@ -0,0 +1,324 @@
+"""
+Tool layer benchmark runner.
+Simulates N concurrent rooms, each running realistic sequences of tool
+calls against UnifiedFunctions, and reports per-tool p50/p95/p99 latency
+and overall throughput. Results can be saved as a named baseline and later
+runs compared against it.
+
+Usage:
+    python -m benchmarks.run --rooms 50 --duration 60 --save-baseline main
+    python -m benchmarks.run --rooms 50 --duration 60 --compare main
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from . import env  # noqa: F401  (must run before the src imports)
+from .seed import customer_phone
+from src.database.async_connection import async_execute_query, close_async_pool
+from src.database.cache import cache_stats, flight_stats
+from src.database.write_behind import close_write_behind
+from src.functions.tools import UnifiedFunctions
+
+BASELINE_DIR = Path(__file__).with_name("baselines")
+
+# Conversation shapes and how often they occur
+SCENARIOS = {
+    "order_status": 45,
+    "ticket_followup": 25,
+    "new_ticket": 15,
+    "unknown_caller": 15,
+}
+WRITE_SCENARIOS = {"ticket_followup", "new_ticket"}
+# Tool outputs that report a failed or missed lookup instead of an answer
+FAILURE_MARKERS = (
+    "No customer found",
+    "No ticket found",
+    "No order found",
+    "Invalid phone number format",
+    "That page token is not valid",
+    "could not be loaded",
+)
+
+
+@dataclass
+class DataRange:
+    """Highest IDs present in the seeded tables."""
+    customers: int
+    orders: int
+    tickets: int
+
+    @classmethod
+    async def load(cls) -> 'DataRange':
+        rows = await async_execute_query(
+            "SELECT (SELECT MAX(id) FROM Customers) AS customers,"
+            " (SELECT MAX(id) FROM Orders) AS orders,"
+            " (SELECT MAX(id) FROM Tickets) AS tickets"
+        )
+        if not rows or not rows[0]["customers"]:
+            raise SystemExit("Benchmark database is empty or unreachable; run `python -m benchmarks.seed` first")
+        return cls(**{key: value or 0 for key, value in rows[0].items()})
+
+
+@dataclass
+class Recorder:
+    """Collects call latencies per tool while the measurement window is open."""
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    recording: bool = False
+
+    def add(self, tool: str, seconds: float, failed: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies.setdefault(tool, []).append(seconds)
+        if failed:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+
+    Args:
+        sorted_values (list[float]): Values in ascending order
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile value, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Room:
+    """One simulated conversation stream issuing tool calls back to back."""
+
+    def __init__(self, recorder: Recorder, data: DataRange, rng: random.Random,
+                 think_time: float, scenarios: dict[str, int]):
+        self.recorder = recorder
+        self.data = data
+        self.rng = rng
+        self.think_time = think_time
+        self.scenarios = scenarios
+        self.functions: Optional[UnifiedFunctions] = None
+
+    async def call(self, tool: str, expect_missing: bool = False, **arguments: Any) -> Any:
+        # Same entry point the agent uses: the registered (instrumented) callable
+        function = self.functions._fncs[tool].callable
+        started = time.perf_counter()
+        failed = False
+        try:
+            output = await function(**arguments)
+            # A missed lookup is only a success where the scenario asks for one
+            failed = not expect_missing and any(marker in str(output) for marker in FAILURE_MARKERS)
+            return output
+        except Exception:
+            failed = True
+        finally:
+            self.recorder.add(tool, time.perf_counter() - started, failed)
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    async def run(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            # Every conversation gets fresh per-room state, as a new room would
+            self.functions = UnifiedFunctions()
+            # The sidecar is not part of the tool layer under test
+            self.functions._mcp_checked = True
+            scenario = self.rng.choices(list(self.scenarios), list(self.scenarios.values()))[0]
+            try:
+                await getattr(self, scenario)()
+            finally:
+                # Stops the conversation's prefetches, as the room's shutdown does
+                await self.functions.aclose()
+
+    def _phone(self) -> str:
+        return customer_phone(self.rng.randint(1, self.data.customers))[4:]
+
+    async def order_status(self) -> None:
+        phone = self._phone()
+        await self.call("verify_mobile_number", mobile=phone)
+        await self.call("get_customer_recent_orders", mobile=phone, limit=5)
+        if self.data.orders:
+            await self.call("get_order_status", order_id=self.rng.randint(1, self.data.orders))
+
+    async def ticket_followup(self) -> None:
+        phone = self._phone()
+        await self.call("verify_mobile_number", mobile=phone)
+        if self.data.tickets:
+            ticket_id = self.rng.randint(1, self.data.tickets)
+            await self.call("get_zomato_ticket_status", ticket_id=ticket_id)
+            await self.call("add_zomato_ticket_comment", ticket_id=ticket_id,
+                            comment="Customer called for an update.", author="benchmark")
+
+    async def new_ticket(self) -> None:
+        phone = self._phone()
+        await self.call("verify_mobile_number", mobile=phone)
+        await self.call("create_customer_support_ticket", mobile=phone,
+                        issue_description="Order arrived cold")
+
+    async def unknown_caller(self) -> None:
+        # Valid format, but outside the seeded phone range
+        await self.call("verify_mobile_number", expect_missing=True,
+                        mobile=str(8_000_000_000 + self.rng.randint(0, 10**8)))
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict[str, Any]:
+    """
+    Turn recorded latencies into per-tool and overall statistics.
+
+    Args:
+        recorder (Recorder): Recorded calls
+        elapsed (float): Length of the measurement window in seconds
+
+    Returns:
+        dict[str, Any]: ``tools`` and ``overall`` statistics, latencies in ms
+    """
+    def stats(values: list[float], errors: int) -> dict[str, Any]:
+        values = sorted(values)
+        return {
+            "calls": len(values),
+            "errors": errors,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "throughput_per_s": round(len(values) / elapsed, 2),
+        }
+
+    tools = {
+        tool: stats(values, recorder.errors.get(tool, 0))
+        for tool, values in sorted(recorder.latencies.items())
+    }
+    everything = [value for values in recorder.latencies.values() for value in values]
+    return {"tools": tools, "overall": stats(everything, sum(recorder.errors.values()))}
+
+
+def print_report(result: dict[str, Any]) -> None:
+    print(f"{'tool':<32} {'calls':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/s':>9}")
+    rows = list(result["tools"].items()) + [("overall", result["overall"])]
+    for tool, stats in rows:
+        print(f"{tool:<32} {stats['calls']:>8} {stats['errors']:>7} {stats['p50_ms']:>9.2f} "
+              f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['throughput_per_s']:>9.1f}")
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Find tools whose p95 latency regressed beyond the tolerance.
+
+    Args:
+        result (dict[str, Any]): Current run
+        baseline (dict[str, Any]): Saved baseline run
+        tolerance (float): Allowed relative increase, e.g. 0.2 for 20%
+
+    Returns:
+        list[str]: One message per regression; empty if none
+    """
+    regressions = []
+    current = dict(result["tools"], overall=result["overall"])
+    for tool, before in dict(baseline["tools"], overall=baseline["overall"]).items():
+        after = current.get(tool)
+        if after is None or not before["p95_ms"]:
+            continue
+        change = after["p95_ms"] / before["p95_ms"] - 1
+        if change > tolerance:
+            regressions.append(f"{tool}: p95 {before['p95_ms']:.2f} ms -> {after['p95_ms']:.2f} ms (+{change:.0%})")
+    before_rate = baseline["overall"]["throughput_per_s"]
+    if before_rate and result["overall"]["throughput_per_s"] < before_rate * (1 - tolerance):
+        regressions.append(
+            f"throughput {before_rate:.1f}/s -> {result['overall']['throughput_per_s']:.1f}/s"
+        )
+    return regressions
+
+
+async def run(rooms: int, duration: float, warmup: float, think_time: float,
+              read_only: bool, seed_value: int) -> dict[str, Any]:
+    """
+    Run the workload and collect statistics.
+
+    Args:
+        rooms (int): Concurrent simulated rooms
+        duration (float): Seconds of measurement
+        warmup (float): Seconds run before measuring (fills pools and caches)
+        think_time (float): Mean pause between calls in a room, in seconds
+        read_only (bool): Skip scenarios that write
+        seed_value (int): Random seed for the call mix
+
+    Returns:
+        dict[str, Any]: Configuration and statistics of the run
+    """
+    data = await DataRange.load()
+    scenarios = {name: weight for name, weight in SCENARIOS.items()
+                 if not (read_only and name in WRITE_SCENARIOS)}
+    recorder = Recorder()
+    deadline = time.monotonic() + warmup + duration
+    room_tasks = [
+        asyncio.create_task(
+            Room(recorder, data, random.Random(seed_value + index), think_time, scenarios).run(deadline)
+        )
+        for index in range(rooms)
+    ]
+    await asyncio.sleep(warmup)
+    recorder.recording = True
+    started = time.monotonic()
+    await asyncio.gather(*room_tasks)
+    elapsed = time.monotonic() - started
+    # Queued comments and audit events need the pool to flush
+    await close_write_behind()
+    await close_async_pool()
+
+    result = summarize(recorder, elapsed)
+    result["config"] = {
+        "rooms": rooms, "duration_s": duration, "warmup_s": warmup, "think_time_s": think_time,
+        "read_only": read_only, "seed": seed_value, "customers": data.customers,
+        "orders": data.orders, "tickets": data.tickets,
+    }
+    result["cache"] = cache_stats()
+    result["singleflight"] = flight_stats()
+    result["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the tool layer against the seeded database")
+    parser.add_argument("--rooms", type=int, default=20, help="concurrent simulated rooms")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measurement")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds before measuring starts")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between calls in a room")
+    parser.add_argument("--read-only", action="store_true", help="only run scenarios that do not write")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="also write the result JSON here")
+    parser.add_argument("--save-baseline", metavar="NAME", help="store the result as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95/throughput regression")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.rooms, args.duration, args.warmup, args.think_time, args.read_only, args.seed))
+    print_report(result)
+
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, default=str) + "\n")
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(result, indent=2, default=str) + "\n")
+        print(f"Saved baseline {path}")
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        if baseline["config"]["rooms"] != args.rooms or baseline["config"]["think_time_s"] != args.think_time:
+            print("Warning: baseline was recorded with a different rooms/think-time configuration")
+        regressions = compare(result, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against baseline {args.compare!r}")
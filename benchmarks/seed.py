@@ -0,0 +1,242 @@
+"""
+Benchmark data generator.
+Fills the benchmark database with a deterministic, realistically shaped
+data set (customers, orders, agents, tickets and comments) using batched
+multi-row INSERTs.
+
+Usage:
+    python -m benchmarks.seed --customers 1000000 --reset
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from . import env  # noqa: F401  (must run before the src imports)
+from src.database.connection import get_db_connection
+from src.database.migrations import migrate
+
+RESTAURANTS = [
+    "Biryani Blues", "Behrouz Biryani", "Domino's Pizza", "Haldiram's", "Saravana Bhavan",
+    "Faasos", "Burger King", "Wow! Momo", "Paradise", "Chaayos", "Theobroma", "Oven Story",
+]
+CITIES = ["Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Chennai", "Pune", "Kolkata", "Jaipur"]
+ITEMS = ["Chicken Biryani", "Paneer Tikka", "Margherita", "Masala Dosa", "Veg Momos", "Falooda", "Thali"]
+PAYMENT_METHODS = ["UPI", "Card", "Cash", "Wallet"]
+# (status, weight): most orders in a year-long history are delivered
+ORDER_STATUSES = [("DELIVERED", 85), ("CANCELLED", 6), ("PLACED", 2), ("CONFIRMED", 2),
+                  ("PREPARING", 2), ("OUT_FOR_DELIVERY", 3)]
+TICKET_STATUSES = [("resolved", 50), ("closed", 25), ("open", 15), ("in_progress", 10)]
+TICKET_CATEGORIES = ["delivery_delay", "quality_issue", "wrong_items", "missing_items", "refund", "other"]
+TICKET_PRIORITIES = ["low", "medium", "high", "urgent"]
+
+TABLES = ("TicketComments", "Tickets", "Orders", "SupportAgents", "Customers")
+
+# Phones are +91-9000000000 plus the customer ID, so workloads can derive them
+PHONE_BASE = 9_000_000_000
+
+
+def customer_phone(customer_id: int) -> str:
+    """
+    Phone number the seed gives a customer.
+
+    Args:
+        customer_id (int): Customer ID
+
+    Returns:
+        str: Phone number in +91-XXXXXXXXXX format
+    """
+    return f"+91-{PHONE_BASE + customer_id}"
+
+
+def _weighted(rng: random.Random, choices: list[tuple[str, int]]) -> str:
+    return rng.choices([value for value, _ in choices], [weight for _, weight in choices])[0]
+
+
+def _batched(rows: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_customers(count: int, rng: random.Random, now: datetime) -> Iterator[tuple]:
+    for customer_id in range(1, count + 1):
+        yield (
+            customer_id,
+            f"Customer {customer_id}",
+            f"customer{customer_id}@example.com",
+            customer_phone(customer_id),
+            rng.choice(CITIES),
+            now - timedelta(days=rng.randint(30, 1500)),
+        )
+
+
+def generate_orders(customers: int, per_customer: int, rng: random.Random, now: datetime) -> Iterator[tuple]:
+    order_id = 0
+    for customer_id in range(1, customers + 1):
+        # Order counts vary per customer around the requested mean
+        for _ in range(rng.randint(0, per_customer * 2)):
+            order_id += 1
+            placed = now - timedelta(minutes=rng.randint(10, 365 * 24 * 60))
+            status = _weighted(rng, ORDER_STATUSES)
+            items = [{"item": rng.choice(ITEMS), "quantity": rng.randint(1, 3)} for _ in range(rng.randint(1, 4))]
+            yield (
+                order_id,
+                customer_id,
+                rng.choice(RESTAURANTS),
+                status,
+                round(rng.uniform(99, 1499), 2),
+                rng.choice(PAYMENT_METHODS),
+                f"{rng.randint(1, 999)} Main Road, {rng.choice(CITIES)}",
+                placed,
+                placed + timedelta(minutes=rng.randint(20, 70)) if status == "DELIVERED" else None,
+                json.dumps({"items": items}),
+            )
+
+
+def generate_tickets(customers: int, orders: int, ratio: float, agents: int,
+                     rng: random.Random, now: datetime) -> Iterator[tuple]:
+    for ticket_id in range(1, int(customers * ratio) + 1):
+        status = _weighted(rng, TICKET_STATUSES)
+        created = now - timedelta(minutes=rng.randint(10, 180 * 24 * 60))
+        yield (
+            ticket_id,
+            rng.randint(1, customers),
+            rng.randint(1, orders) if orders and rng.random() < 0.8 else None,
+            f"Issue with my order ({rng.choice(TICKET_CATEGORIES).replace('_', ' ')})",
+            "Customer reported a problem with their order.",
+            rng.choice(TICKET_PRIORITIES),
+            status,
+            rng.choice(TICKET_CATEGORIES),
+            created,
+            created + timedelta(hours=rng.randint(1, 72)) if status in ("resolved", "closed") else None,
+            rng.randint(1, agents),
+        )
+
+
+def generate_comments(tickets: int, per_ticket: int, rng: random.Random, now: datetime) -> Iterator[tuple]:
+    for ticket_id in range(1, tickets + 1):
+        for index in range(rng.randint(0, per_ticket * 2)):
+            yield (
+                ticket_id,
+                f"Update {index + 1} on this ticket.",
+                rng.choice(["customer", "agent", "system"]),
+                f"Agent {rng.randint(1, 50)}",
+                now - timedelta(minutes=rng.randint(1, 90 * 24 * 60)),
+            )
+
+
+INSERTS = {
+    "Customers": "INSERT INTO Customers (id, name, email, phone, city, registration_date) VALUES (%s, %s, %s, %s, %s, %s)",
+    "Orders": (
+        "INSERT INTO Orders (id, customer_id, restaurant_name, order_status, order_total, payment_method,"
+        " delivery_address, order_timestamp, delivery_timestamp, order_details)"
+        " VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    ),
+    "SupportAgents": "INSERT INTO SupportAgents (id, name, available) VALUES (%s, %s, %s)",
+    "Tickets": (
+        "INSERT INTO Tickets (id, customer_id, order_id, subject, description, priority, status, category,"
+        " created_date, resolved_date, assigned_agent_id)"
+        " VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    ),
+    "TicketComments": (
+        "INSERT INTO TicketComments (ticket_id, comment, author_type, author, created_at)"
+        " VALUES (%s, %s, %s, %s, %s)"
+    ),
+}
+
+
+def _load(conn, table: str, rows: Iterator[tuple], batch_size: int) -> int:
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    total = 0
+    for batch in _batched(rows, batch_size):
+        # mysql-connector rewrites executemany INSERTs into one multi-row statement
+        cursor.executemany(INSERTS[table], batch)
+        conn.commit()
+        total += len(batch)
+    elapsed = time.perf_counter() - started
+    print(f"{table:<15} {total:>10,} rows in {elapsed:7.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+
+def seed(customers: int, orders_per_customer: int, ticket_ratio: float, comments_per_ticket: int,
+         agents: int, batch_size: int, reset: bool, seed_value: int) -> dict[str, int]:
+    """
+    Migrate the benchmark database and fill it with generated rows.
+
+    Args:
+        customers (int): Number of customers
+        orders_per_customer (int): Mean orders per customer
+        ticket_ratio (float): Tickets per customer
+        comments_per_ticket (int): Mean comments per ticket
+        agents (int): Number of support agents
+        batch_size (int): Rows per multi-row INSERT
+        reset (bool): Empty the tables first
+        seed_value (int): Random seed; the same seed gives the same data
+
+    Returns:
+        dict[str, int]: Rows inserted per table
+    """
+    migrate()
+    rng = random.Random(seed_value)
+    now = datetime.now().replace(microsecond=0)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # Bulk load: skip per-row constraint checks, the generator keeps references valid
+        cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+        for table in TABLES:
+            if reset:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            else:
+                cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+                if cursor.fetchall():
+                    raise SystemExit(f"{table} is not empty; pass --reset to replace the data")
+
+        counts = {}
+        counts["Customers"] = _load(conn, "Customers", generate_customers(customers, rng, now), batch_size)
+        counts["SupportAgents"] = _load(
+            conn, "SupportAgents",
+            ((agent_id, f"Agent {agent_id}", rng.random() < 0.9) for agent_id in range(1, agents + 1)),
+            batch_size,
+        )
+        counts["Orders"] = _load(conn, "Orders", generate_orders(customers, orders_per_customer, rng, now), batch_size)
+        counts["Tickets"] = _load(
+            conn, "Tickets",
+            generate_tickets(customers, counts["Orders"], ticket_ratio, agents, rng, now),
+            batch_size,
+        )
+        counts["TicketComments"] = _load(
+            conn, "TicketComments", generate_comments(counts["Tickets"], comments_per_ticket, rng, now), batch_size
+        )
+        cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+        for table in TABLES:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        return counts
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the benchmark database")
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--orders-per-customer", type=int, default=5)
+    parser.add_argument("--ticket-ratio", type=float, default=0.3, help="tickets per customer")
+    parser.add_argument("--comments-per-ticket", type=int, default=2)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate existing benchmark data first")
+    args = parser.parse_args()
+
+    seed(args.customers, args.orders_per_customer, args.ticket_ratio, args.comments_per_ticket,
+         args.agents, args.batch_size, args.reset, args.seed)
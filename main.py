@@ -1,15 +1,23 @@
 import sys
 from pathlib import Path
+from dotenv import load_dotenv
 from livekit.agents import cli, WorkerOptions
 
 # Add src directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from src.core import entrypoint
+# Load settings before src modules read them at import time
+load_dotenv(dotenv_path=".env.local")
+
+from src.config.model import load_provider
+from src.core import entrypoint, prewarm
 
 if __name__ == "__main__":
+    # Register the selected plugin on the main thread (needed by thread-based job executors)
+    load_provider()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
         )
     )
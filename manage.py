@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Add src directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+load_dotenv(dotenv_path=".env.local")
+
+from src.database import close_async_pool, importer, migrations, phone_index, repository
+
+
+def cmd_migrate(args):
+    applied = migrations.migrate(target=args.target)
+    if applied:
+        print(f"Applied migrations: {', '.join(map(str, applied))}")
+    else:
+        print("Database schema is up to date")
+
+
+def cmd_showmigrations(args):
+    for migration, applied in migrations.status():
+        print(f"[{'X' if applied else ' '}] {migration.version:04d} {migration.name}")
+
+
+def cmd_import_customers(args):
+    def report(stats):
+        if stats.chunks % args.progress_every == 0:
+            print(f"  {stats.rows_read:,} rows, {stats.rows_invalid:,} rejected, {stats.rows_per_second:,.0f} rows/s",
+                  file=sys.stderr)
+
+    stats = importer.import_customers(
+        args.path, chunk_size=args.chunk_size, rejects_path=args.rejects, dry_run=args.dry_run, progress=report
+    )
+    print(f"{'Dry run: ' if args.dry_run else ''}{stats.summary()}")
+
+
+def cmd_build_phone_index(args):
+    count = phone_index.build_snapshot(args.path)
+    print(f"Wrote phone index of {count:,} customers to {args.path}")
+
+
+def cmd_export_orders(args):
+    async def export():
+        count = 0
+        try:
+            # Streamed from a server-side cursor, so long histories never sit in memory
+            async for order in repository.iter_order_history(
+                args.customer_id, include_details=args.details, limit=args.limit
+            ):
+                print(json.dumps(dict(order), default=str))
+                count += 1
+        finally:
+            await close_async_pool()
+        return count
+
+    count = asyncio.run(export())
+    print(f"Exported {count:,} orders of customer {args.customer_id}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Management commands for the support agent")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subcommands.add_parser("migrate", help="apply pending schema migrations")
+    migrate_parser.add_argument("--target", type=int, default=None, help="highest migration version to apply")
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    show_parser = subcommands.add_parser("showmigrations", help="list migrations and whether they are applied")
+    show_parser.set_defaults(func=cmd_showmigrations)
+
+    import_parser = subcommands.add_parser("import-customers", help="bulk import or reconcile customers from CSV/JSONL")
+    import_parser.add_argument("path", type=Path, help="export file (.csv, or .jsonl/.ndjson)")
+    import_parser.add_argument("--chunk-size", type=int, default=importer.IMPORT_CHUNK_SIZE, help="rows per INSERT")
+    import_parser.add_argument("--rejects", type=Path, default=None, help="write rejected rows to this CSV file")
+    import_parser.add_argument("--dry-run", action="store_true", help="validate the file without writing")
+    import_parser.add_argument("--progress-every", type=int, default=100, help="report progress every N chunks")
+    import_parser.set_defaults(func=cmd_import_customers)
+
+    index_parser = subcommands.add_parser("build-phone-index", help="rebuild the phone index snapshot job processes map")
+    index_parser.add_argument("--path", type=Path, default=phone_index.PHONE_INDEX_PATH, help="snapshot file to replace")
+    index_parser.set_defaults(func=cmd_build_phone_index)
+
+    export_parser = subcommands.add_parser("export-orders", help="write a customer's order history as JSON lines")
+    export_parser.add_argument("customer_id", type=int, help="customer to export")
+    export_parser.add_argument("--details", action="store_true", help="include order_details")
+    export_parser.add_argument("--limit", type=int, default=None, help="newest N orders only")
+    export_parser.set_defaults(func=cmd_export_orders)
+
+    args = parser.parse_args()
+    args.func(args)
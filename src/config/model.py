@@ -1,55 +1,65 @@
-from livekit.plugins.openai import realtime as openai_realtime
-from livekit.plugins import google
-import os
+import dataclasses
+import importlib
 from ..functions.tools import UnifiedFunctions
+from .profiles import ModelProfile, get_registry
 
-def create_model():
-    if os.getenv("MODEL_TYPE", "openai") == "gemini":
-        return google.beta.realtime.RealtimeModel(
-            instructions="""You are a Zomato customer support agent.
-You are extremely calm, composed, and friendly. Your goal is to serve the customer with utmost priority, reminiscent of Taj hospitality.
-Greet customers warmly and ask for their phone number for verification.
-Once the customer provides their phone number, repeat it back to them and ask for confirmation to ensure accuracy.
-Additionally, expect the phone number to be Indian phone number provided either as a 10-digit number (e.g., 9876543210) or in the format '+91-9876543210'. Normalize the phone number so that it is stored and queried as '+91-' followed by 10 digits.
-After verification, address their query succinctly with minimal words yet complete details.
-When creating a ticket for a customer, always inform them that the ticket has been created and they will be notified about it over WhatsApp.
-Additionally, you have access to function tools from @tools.py:
-- get_weather: fetch current weather info.
-- get_current_datetime: return current date and time.
-- start_mcp_server: initiate the MCP MySQL server.
-- init_schema: set up the database schema.
-- create_zomato_ticket: create a support ticket.
-- verify_mobile_and_handle_issue: verify mobile and handle issue creation.
-- add_zomato_ticket_comment: add a comment to an existing ticket.
-- get_order_status: check the status of an order.
-- get_zomato_ticket_status: retrieve detailed ticket information.
-Use these tools as needed.""",
-            voice="Puck",
-            temperature=1.2,
-            modalities=["AUDIO"],
-        )
+# Realtime plugin module per provider; only the ones in use are imported
+PROVIDER_MODULES = {
+    "openai": "livekit.plugins.openai.realtime",
+    "gemini": "livekit.plugins.google",
+}
+
+def load_provider(provider: str = None):
+    """
+    Imports the realtime plugin for one provider.
+    Plugins register themselves on import, which LiveKit only allows from the
+    main thread, so call this from prewarm or at startup rather than per room.
+    
+    Args:
+        provider (str, optional): Defaults to the default profile's provider
+        
+    Returns:
+        module: The imported plugin module
+    """
+    provider = provider or get_registry().resolve().provider
+    return importlib.import_module(PROVIDER_MODULES[provider])
+
+def load_providers():
+    """
+    Imports the realtime plugin of every provider the loaded profiles use,
+    so no room pays a plugin import when routing or metadata picks a
+    non-default provider.
+    
+    Returns:
+        list: The imported plugin modules
+    """
+    return [load_provider(provider) for provider in get_registry().providers()]
+
+def resolve_profile(room_name: str = "", requested: str = None) -> ModelProfile:
+    """Picks the model profile for a room (see ProfileRegistry.resolve)."""
+    return get_registry().resolve(room_name, requested)
+
+def create_model(profile: ModelProfile = None):
+    """
+    Builds the realtime model for a profile.
+    
+    Args:
+        profile (ModelProfile, optional): Defaults to the default profile
+        
+    Returns:
+        The provider's RealtimeModel
+    """
+    profile = profile or resolve_profile()
+    if profile.provider == "gemini":
+        google = load_provider("gemini")
+        return google.beta.realtime.RealtimeModel(**profile.options)
     else:  # OpenAI default
-        return openai_realtime.RealtimeModel(
-            voice="alloy",
-            temperature=0.8,
-            model="gpt-4o-realtime-preview-2024-12-17",
-            instructions="""You are a Zomato customer support agent.
-Greet the customer courteously, then ask for their phone number for verification.
-Once the customer provides their phone number, repeat it back to them and ask for confirmation to ensure accuracy.
-Additionally, expect the Indian phone number to be provided either as a 10-digit number (e.g., 9876543210) or in the format '+91-9876543210'. Normalize the phone number so that it is stored and queried as '+91-' followed by 10 digits.
-Once verified, respond to their query succinctly yet comprehensively.
-Keep your replies brief while ensuring all necessary details are covered.
-Whenever you create a ticket for a customer, always inform them that the ticket has been created and they will be notified about updates over WhatsApp.
-Additionally, available function tools from @tools.py include:
-- get_weather: fetch weather details.
-- get_current_datetime: get current date and time.
-- start_mcp_server: start the MCP MySQL server.
-- init_schema: initialize the database schema.
-- create_zomato_ticket: create a support ticket.
-- verify_mobile_and_handle_issue: verify mobile number and handle issues.
-- add_zomato_ticket_comment: add comments to tickets.
-- get_order_status: check the status of an order.
-- get_zomato_ticket_status: retrieve ticket status and details.
-Leverage these functions as needed.""",
-            turn_detection=openai_realtime.ServerVadOptions(threshold=0.5, prefix_padding_ms=100, silence_duration_ms=300)
-        ) 
+        openai_realtime = load_provider("openai")
+        options = dict(profile.options)
+        if profile.turn_detection is not None:
+            vad_fields = {f.name for f in dataclasses.fields(openai_realtime.ServerVadOptions)}
+            vad_options = dict(profile.turn_detection)
+            if "create_response" in vad_fields:
+                vad_options.setdefault("create_response", True)
+            options["turn_detection"] = openai_realtime.ServerVadOptions(**vad_options)
+        return openai_realtime.RealtimeModel(**options)
@@ -0,0 +1,246 @@
+"""
+Model profile registry.
+Loads named realtime model profiles (provider, voice, temperature, VAD
+options, instructions) from model_profiles.json, validates them once per
+load, and resolves which profile a room uses. The file is re-read when it
+changes, so profiles and routing rules can be switched without a restart.
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from ..utils.log import get_logger
+
+logger = get_logger("profiles")
+
+PROFILES_PATH = Path(os.getenv("MODEL_PROFILES_PATH", Path(__file__).with_name("model_profiles.json")))
+
+# Minimum seconds between checks of the profiles file for changes
+RELOAD_CHECK_INTERVAL = float(os.getenv("MODEL_PROFILES_RELOAD_INTERVAL", "5"))
+
+SUPPORTED_PROVIDERS = ("openai", "gemini")
+TURN_DETECTION_KEYS = {"threshold", "prefix_padding_ms", "silence_duration_ms", "create_response"}
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    name: str
+    provider: str
+    instructions: str
+    # Keyword arguments for the provider's RealtimeModel, built once at load time
+    options: dict[str, Any] = field(default_factory=dict)
+    turn_detection: Optional[dict[str, Any]] = None
+
+    @classmethod
+    def from_config(cls, name: str, raw: dict[str, Any], base_dir: Path) -> 'ModelProfile':
+        """
+        Validate one profile entry and build it.
+
+        Args:
+            name (str): Profile name
+            raw (dict[str, Any]): Entry from the profiles file
+            base_dir (Path): Directory that ``instructions_file`` is relative to
+
+        Returns:
+            ModelProfile: The validated profile
+
+        Raises:
+            ValueError: If the entry is invalid
+        """
+        provider = raw.get("provider")
+        if provider not in SUPPORTED_PROVIDERS:
+            raise ValueError(f"profile {name!r}: provider must be one of {SUPPORTED_PROVIDERS}")
+
+        if "instructions_file" in raw:
+            instructions = (base_dir / raw["instructions_file"]).read_text().strip()
+        else:
+            instructions = raw.get("instructions", "").strip()
+        if not instructions:
+            raise ValueError(f"profile {name!r}: instructions are empty")
+
+        temperature = raw.get("temperature")
+        if temperature is not None and not 0 <= float(temperature) <= 2:
+            raise ValueError(f"profile {name!r}: temperature must be between 0 and 2")
+
+        turn_detection = raw.get("turn_detection")
+        if turn_detection is not None:
+            unknown = set(turn_detection) - TURN_DETECTION_KEYS
+            if unknown:
+                raise ValueError(f"profile {name!r}: unknown turn_detection options {sorted(unknown)}")
+            if provider != "openai":
+                raise ValueError(f"profile {name!r}: turn_detection is only supported for openai")
+
+        options = {"instructions": instructions}
+        for key in ("model", "voice", "temperature", "modalities"):
+            if raw.get(key) is not None:
+                options[key] = raw[key]
+        return cls(name=name, provider=provider, instructions=instructions,
+                   options=options, turn_detection=turn_detection)
+
+
+@dataclass(frozen=True)
+class RoutingRule:
+    """Sends rooms whose name starts with ``room_prefix`` to a profile or a weighted split."""
+    room_prefix: str = ""
+    profile: Optional[str] = None
+    split: dict[str, int] = field(default_factory=dict)
+
+    def matches(self, room_name: str) -> bool:
+        return room_name.startswith(self.room_prefix)
+
+    def choose(self, room_name: str) -> str:
+        """Pick a profile; splits are deterministic per room name."""
+        if self.profile:
+            return self.profile
+        bucket = int(hashlib.sha1(room_name.encode()).hexdigest(), 16) % sum(self.split.values())
+        for name, weight in self.split.items():
+            if bucket < weight:
+                return name
+            bucket -= weight
+        return next(iter(self.split))
+
+
+class ProfileRegistry:
+    """Holds the validated profiles and routing rules from one profiles file."""
+
+    def __init__(self, path: Path = PROFILES_PATH):
+        self.path = Path(path)
+        self._mtime = None
+        self._checked_at = 0.0
+        self.profiles: dict[str, ModelProfile] = {}
+        self.rules: list[RoutingRule] = []
+        self.default_profile = ""
+        self.refresh(force=True)
+
+    def _load(self) -> None:
+        config = json.loads(self.path.read_text())
+        profiles = {
+            name: ModelProfile.from_config(name, raw, self.path.parent)
+            for name, raw in config.get("profiles", {}).items()
+        }
+        default = config.get("default_profile")
+        if default not in profiles:
+            raise ValueError(f"default profile {default!r} is not defined")
+        # MODEL_PROFILE (or the older MODEL_TYPE) overrides the file's default
+        for name in (os.getenv("MODEL_PROFILE"), os.getenv("MODEL_TYPE")):
+            if name in profiles:
+                default = name
+                break
+        rules = [RoutingRule(**rule) for rule in config.get("routing", [])]
+        for rule in rules:
+            targets = [rule.profile] if rule.profile else list(rule.split)
+            if not targets or any(target not in profiles for target in targets):
+                raise ValueError(f"routing rule {rule} references an unknown profile")
+            if rule.split and (min(rule.split.values()) < 0 or sum(rule.split.values()) <= 0):
+                raise ValueError(f"routing rule {rule} needs positive split weights")
+        self.profiles, self.default_profile, self.rules = profiles, default, rules
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Reload the profiles file if it changed since the last load.
+
+        An invalid file raises on the first load; afterwards it is reported
+        and the previously loaded profiles stay in effect.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+            if mtime == self._mtime:
+                return
+            self._load()
+        except (OSError, ValueError, TypeError) as err:
+            if not self.profiles:
+                raise
+            logger.error("Ignoring invalid model profiles in %s: %s", self.path, err)
+            return
+        self._mtime = mtime
+
+    def providers(self) -> list[str]:
+        """
+        List the providers of every loaded profile, the default profile's first.
+
+        Any profile can be picked, by routing rules or job metadata, so all of them count.
+
+        Returns:
+            list[str]: Distinct provider names
+        """
+        default = self.profiles[self.default_profile].provider
+        return [default] + sorted({profile.provider for profile in self.profiles.values()} - {default})
+
+    def get(self, name: str) -> ModelProfile:
+        """
+        Get a profile by name.
+
+        Raises:
+            KeyError: If no such profile is defined
+        """
+        return self.profiles[name]
+
+    def resolve(self, room_name: str = "", requested: Optional[str] = None) -> ModelProfile:
+        """
+        Pick the profile for a room.
+
+        An explicitly requested profile wins, then the first matching
+        routing rule, then the default profile.
+
+        Args:
+            room_name (str, optional): Room name used by routing rules
+            requested (str, optional): Profile asked for in job/room metadata
+
+        Returns:
+            ModelProfile: The profile to use
+        """
+        self.refresh()
+        if requested in self.profiles:
+            return self.profiles[requested]
+        if requested:
+            logger.warning("Unknown model profile %r; using routing rules", requested)
+        for rule in self.rules:
+            if rule.matches(room_name):
+                return self.profiles[rule.choose(room_name)]
+        return self.profiles[self.default_profile]
+
+
+def requested_profile(*metadata: str) -> Optional[str]:
+    """
+    Read a ``model_profile`` key from the first JSON metadata string that has one.
+
+    Args:
+        *metadata (str): Job or room metadata strings, in priority order
+
+    Returns:
+        Optional[str]: The requested profile name, if any
+    """
+    for raw in metadata:
+        if not raw:
+            continue
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(value, dict) and value.get("model_profile"):
+            return value["model_profile"]
+    return None
+
+
+_registry: Optional[ProfileRegistry] = None
+
+
+def get_registry() -> ProfileRegistry:
+    """
+    Get the process-wide profile registry, loading it on first use.
+
+    Returns:
+        ProfileRegistry: The shared registry
+    """
+    global _registry
+    if _registry is None:
+        _registry = ProfileRegistry()
+    return _registry
@@ -1,28 +1,145 @@
+import asyncio
+import functools
+import os
+import threading
+
 from dotenv import load_dotenv
 from livekit import rtc
-from livekit.agents import AutoSubscribe, JobContext, llm, multimodal
+from livekit.agents import AutoSubscribe, JobContext, JobProcess, llm, multimodal
 
 from .config import model
+from .config.profiles import requested_profile
+from .database.async_connection import close_async_pool, get_pool_manager
+from .database.connection import get_connection_pool
+from .database.phone_index import close_phone_index, get_phone_index
+from .database.schema import init_schema
+from .database.write_behind import close_write_behind
 from .functions.tools import UnifiedFunctions
+from .services.http_client import close_http_client
+from .services.mcp_sidecar import get_sidecar
+from .utils.log import get_logger
+from .utils.metrics import start_metrics_server
+from .utils.timing import StartupTimer
 
 load_dotenv(dotenv_path=".env.local")
 
+logger = get_logger("agent")
+
+# First port of the local /metrics endpoint (0 disables it); each job
+# process takes the next free port in the range
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_PORT_RANGE = int(os.getenv("METRICS_PORT_RANGE", "16"))
+
+# Rooms this process is serving (several with WORKER_CONCURRENCY and the thread
+# executor); the worker-wide resources are closed when the last one ends
+_active_rooms = 0
+_active_rooms_lock = threading.Lock()
+
+def prewarm(proc: JobProcess):
+    """Builds per-process shared resources once, before any job is assigned."""
+    timer = StartupTimer(f"Job process {os.getpid()}")
+    with timer.phase("model profiles"):
+        # Loads and validates every profile once per process
+        model.resolve_profile()
+    with timer.phase("model provider import"):
+        # Every provider a profile uses, not just the default's
+        model.load_providers()
+    with timer.phase("tool schemas"):
+        UnifiedFunctions.compile_schemas()
+    with timer.phase("database pool"):
+        try:
+            get_connection_pool()
+        except Exception as err:
+            # Jobs can still run; the pool is retried on first use
+            logger.warning("Could not open database pool during prewarm: %s", err)
+        # Async connections are opened once the job's event loop is running
+        get_pool_manager()
+    with timer.phase("phone index"):
+        # Maps the shared snapshot; building it is `python manage.py build-phone-index`
+        get_phone_index()
+    if os.getenv("DB_MIGRATE_ON_BOOT", "false").lower() == "true":
+        with timer.phase("schema migrations"):
+            init_schema()
+    with timer.phase("mcp sidecar spawn"):
+        # Spawns in the background; readiness is probed by the supervisor thread
+        get_sidecar().start()
+    if METRICS_PORT:
+        with timer.phase("metrics endpoint"):
+            port = start_metrics_server(METRICS_PORT, attempts=METRICS_PORT_RANGE)
+            if port:
+                logger.info("Serving metrics on http://127.0.0.1:%s/metrics", port)
+    logger.info(timer.report())
+
+async def _warm_async_pool():
+    try:
+        await get_pool_manager().start()
+    except Exception as err:
+        logger.warning("Could not open async database pool: %s", err)
+    index = get_phone_index()
+    if index is not None:
+        # Catches up on customers registered since the snapshot, then keeps polling
+        index.start()
+
+def _room_started():
+    global _active_rooms
+    with _active_rooms_lock:
+        _active_rooms += 1
+
+def _room_ended() -> bool:
+    """Returns True for the last room this process was serving."""
+    global _active_rooms
+    with _active_rooms_lock:
+        _active_rooms -= 1
+        return _active_rooms == 0
+
+async def _close_worker_resources():
+    # Flush queued writes, which need the database pool, before anything closes.
+    # Each of these reopens on first use should another room start afterwards.
+    await asyncio.gather(close_write_behind(), close_phone_index())
+    await asyncio.gather(close_async_pool(), get_sidecar().aclose(), close_http_client())
+
+async def _shutdown(fnc_ctx: UnifiedFunctions):
+    # The room's own background work (streamed follow-ups, prefetches) stops first;
+    # shared resources only once no other room in this process still uses them
+    await fnc_ctx.aclose()
+    if _room_ended():
+        await _close_worker_resources()
+
 async def entrypoint(ctx: JobContext):
-    print(f"Connecting to room {ctx.room.name}")
-    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
-    participant = await ctx.wait_for_participant()
-    
-    # Create model-agnostic components
-    chat_ctx = llm.ChatContext()
-    fnc_ctx = UnifiedFunctions()
-    
-    # Create the agent with selected model
-    agent = multimodal.MultimodalAgent(
-        model=model.create_model(),
-        chat_ctx=chat_ctx,
-        fnc_ctx=fnc_ctx,
-    )
+    timer = StartupTimer(f"Room {ctx.room.name}")
+    logger.info("Connecting to room %s", ctx.room.name)
+    # Open database connections while we join the room
+    pool_warmup = asyncio.create_task(_warm_async_pool())
+    with timer.phase("room connect"):
+        await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    fnc_ctx = UnifiedFunctions(room_name=ctx.room.name)
+    _room_started()
+    # Shutdown callbacks run concurrently, so ordering lives in one callback
+    ctx.add_shutdown_callback(functools.partial(_shutdown, fnc_ctx))
+    with timer.phase("wait for participant"):
+        participant = await ctx.wait_for_participant()
     
-    agent.start(ctx.room, participant)
-    agent.generate_reply()
-    print("Agent started") 
\ No newline at end of file
+    with timer.phase("agent setup"):
+        # Create model-agnostic components
+        chat_ctx = llm.ChatContext()
+        
+        # Pick the model profile: job/room metadata, then routing rules, then the default
+        profile = model.resolve_profile(
+            ctx.room.name, requested_profile(ctx.job.metadata, ctx.room.metadata)
+        )
+        logger.info("Using model profile %s", profile.name)
+        
+        # Create the agent with selected model
+        agent = multimodal.MultimodalAgent(
+            model=model.create_model(profile),
+            chat_ctx=chat_ctx,
+            fnc_ctx=fnc_ctx,
+        )
+        
+        agent.start(ctx.room, participant)
+        # Long tool answers are then spoken summary first, details as they load
+        fnc_ctx.attach_agent(agent)
+        agent.generate_reply()
+    logger.info("Agent started")
+    await pool_warmup
+    logger.info(timer.report())
@@ -3,12 +3,56 @@ Database package initialization.
 This module provides database connectivity and operations for the customer support system.
 """
 
-from .connection import get_db_connection, execute_query, execute_update
+from .connection import get_db_connection, execute_query, execute_update, execute_insert, execute_insert_many
+from .pool import PoolManager, PoolSettings, PoolTimeoutError
+from .async_connection import (
+    get_pool_manager,
+    get_async_pool,
+    close_async_pool,
+    async_execute_query,
+    async_execute_update,
+    async_fetch_rows,
+    async_stream_query,
+    async_transaction,
+)
+from .compose import QueryScope, gather_queries, start_query
+from .cache import cache_stats, flight_stats, invalidate_customer, invalidate_order, invalidate_ticket
+from .phone_index import close_phone_index, get_phone_index
 from .schema import init_schema
+from .statements import Row, prepared_session
+from .write_behind import close_write_behind, get_write_behind, record_audit_event
 
 __all__ = [
     'get_db_connection',
     'execute_query',
     'execute_update',
-    'init_schema'
+    'execute_insert',
+    'execute_insert_many',
+    'PoolManager',
+    'PoolSettings',
+    'PoolTimeoutError',
+    'get_pool_manager',
+    'get_async_pool',
+    'close_async_pool',
+    'async_execute_query',
+    'async_execute_update',
+    'async_fetch_rows',
+    'async_stream_query',
+    'async_transaction',
+    'QueryScope',
+    'gather_queries',
+    'start_query',
+    'cache_stats',
+    'flight_stats',
+    'invalidate_customer',
+    'invalidate_order',
+    'invalidate_ticket',
+    'get_phone_index',
+    'close_phone_index',
+    'init_schema',
+    'Row',
+    'prepared_session',
+    'get_write_behind',
+    'close_write_behind',
+    'record_audit_event'
 ] 
\ No newline at end of file
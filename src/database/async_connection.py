@@ -0,0 +1,250 @@
+"""
+Asynchronous database connection management module.
+Provides an awaitable connection pool and async query helpers so that
+code running on the event loop (e.g. ai_callable tools) never blocks on
+a MySQL round trip.
+"""
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+import aiomysql
+import pymysql
+
+from ..utils.log import get_logger, log_query
+from ..utils.metrics import record_query, track_query
+from .pool import ASYNC_DB_CONFIG, PoolManager, PoolTimeoutError
+from .replicas import READS, get_read_router
+from .statements import Row, decode_rows
+
+logger = get_logger("db")
+
+_pool_manager: Optional[PoolManager] = None
+
+
+def get_pool_manager() -> PoolManager:
+    """
+    Get the process-wide pool manager, creating it on first use.
+
+    Returns:
+        PoolManager: Manager sized from PoolSettings.from_env()
+    """
+    global _pool_manager
+    if _pool_manager is None:
+        _pool_manager = PoolManager(ASYNC_DB_CONFIG)
+        # Created alongside so writes can pin reads to the primary before the first read
+        get_read_router()
+    return _pool_manager
+
+
+async def get_async_pool() -> aiomysql.Pool:
+    """
+    Get the shared async connection pool, creating it on first use.
+
+    Returns:
+        aiomysql.Pool: Awaitable connection pool bound to the running loop
+    """
+    return await get_pool_manager().start()
+
+
+async def close_async_pool() -> None:
+    """Close the shared async connection pools and wait for their connections to drop."""
+    if _pool_manager is not None:
+        await _pool_manager.close()
+        await get_read_router().close()
+
+
+@asynccontextmanager
+async def _read_connection(replica: bool) -> AsyncIterator[aiomysql.Connection]:
+    target = get_read_router().choose() if replica else None
+    if target is None:
+        READS.inc("primary")
+        async with get_pool_manager().acquire() as conn:
+            yield conn
+        return
+    READS.inc(target.name)
+    try:
+        async with target.acquire() as conn:
+            yield conn
+    except PoolTimeoutError:
+        raise  # the replica is busy, not down
+    except pymysql.err.OperationalError as err:
+        target.mark_down(err)
+        raise
+
+
+async def _fetch_all(query: str, params: tuple, replica: bool, compact: bool) -> list:
+    async with _read_connection(replica) as conn:
+        async with conn.cursor(aiomysql.Cursor if compact else aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+            return decode_rows(cursor.description, rows) if compact else list(rows)
+
+
+async def _query(query: str, params: tuple, replica: bool, compact: bool, strict: bool = False) -> list:
+    started = time.perf_counter()
+    try:
+        with track_query(query):
+            try:
+                results = await _fetch_all(query, params, replica, compact)
+            except pymysql.err.OperationalError:
+                if not replica:
+                    raise
+                results = await _fetch_all(query, params, False, compact)
+        log_query(logger, query, (time.perf_counter() - started) * 1000, rows=len(results))
+        return results
+    except pymysql.MySQLError as err:
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
+        if strict:
+            raise
+        return []
+
+
+async def async_execute_query(query: str, params: tuple = None, replica: bool = False) -> list[dict[str, Any]]:
+    """
+    Execute a SQL query asynchronously and fetch results.
+
+    Args:
+        query (str): SQL query string.
+        params (tuple, optional): Parameters for the SQL query. Defaults to None.
+        replica (bool, optional): Allow a read replica to answer; the query
+            is retried on the primary if the replica fails. Defaults to False.
+
+    Returns:
+        list[dict[str, Any]]: List of dictionaries representing query results.
+    """
+    return await _query(query, params, replica, compact=False)
+
+
+async def async_fetch_rows(query: str, params: tuple = None, replica: bool = False,
+                           strict: bool = False) -> list[Row]:
+    """
+    Execute a SQL query asynchronously and fetch compact rows.
+
+    Like async_execute_query(), but rows come back as tuple-backed Row
+    objects (readable by column name) instead of one dict each, which is
+    cheaper to build and smaller to cache.
+
+    Args:
+        query (str): SQL query string, typically a registered Statement's SQL.
+        params (tuple, optional): Parameters for the SQL query. Defaults to None.
+        replica (bool, optional): Allow a read replica to answer. Defaults to False.
+        strict (bool, optional): Raise database errors instead of logging them
+            and returning no rows, for callers that must not mistake a failure
+            for an empty result. Defaults to False.
+
+    Returns:
+        list[Row]: Query results.
+
+    Raises:
+        pymysql.MySQLError: On database errors, if ``strict``
+    """
+    return await _query(query, params, replica, compact=True, strict=strict)
+
+
+async def async_stream_query(
+    query: str,
+    params: tuple = None,
+    batch_size: int = 100,
+    replica: bool = False,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Execute a SQL query on a server-side cursor and yield rows lazily.
+
+    Rows are read from the socket ``batch_size`` at a time instead of being
+    buffered in full, so memory stays flat for large result sets. The
+    connection is held until the generator is exhausted or closed; stopping
+    early still drains the remaining rows, so bound the query with LIMIT
+    when only a prefix is needed.
+
+    Args:
+        query (str): SQL query string.
+        params (tuple, optional): Parameters for the SQL query. Defaults to None.
+        batch_size (int, optional): Rows fetched per read. Defaults to 100.
+        replica (bool, optional): Allow a read replica to answer. Defaults to False.
+
+    Yields:
+        dict[str, Any]: One row at a time.
+
+    Raises:
+        pymysql.MySQLError: If the query fails after rows were yielded; a
+            failure before the first row is logged and yields nothing, as
+            async_execute_query() returns no rows
+    """
+    # Only time spent in the database is recorded, not the caller's work between rows
+    busy = 0.0
+    rows = 0
+    error = None
+    mark = time.perf_counter()
+    try:
+        async with _read_connection(replica) as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    batch = await cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    rows += len(batch)
+                    busy += time.perf_counter() - mark
+                    try:
+                        for row in batch:
+                            yield row
+                    finally:
+                        mark = time.perf_counter()
+    except pymysql.MySQLError as err:
+        error = err
+        if rows:
+            # Ending quietly would pass a partial result off as the whole one
+            raise
+    finally:
+        busy += time.perf_counter() - mark
+        record_query(query, busy, failed=error is not None)
+        log_query(logger, query, busy * 1000, rows=rows, error=error)
+
+
+async def async_execute_update(query: str, params: tuple = None) -> Optional[int]:
+    """
+    Execute a SQL UPDATE, INSERT, or DELETE query asynchronously.
+
+    Args:
+        query (str): SQL query string.
+        params (tuple, optional): Parameters for the SQL query. Defaults to None.
+
+    Returns:
+        Optional[int]: ID generated by an INSERT (0 for other statements),
+        or None if the statement failed.
+    """
+    started = time.perf_counter()
+    try:
+        with track_query(query):
+            async with get_pool_manager().acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    rowcount, lastrowid = cursor.rowcount, cursor.lastrowid
+        log_query(logger, query, (time.perf_counter() - started) * 1000, rows=rowcount)
+        return lastrowid
+    except pymysql.MySQLError as err:
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
+        return None
+
+
+@asynccontextmanager
+async def async_transaction() -> AsyncIterator[aiomysql.DictCursor]:
+    """
+    Run several statements on one connection inside a single transaction.
+
+    The transaction is committed when the block exits normally and rolled
+    back (re-raising the error) otherwise.
+
+    Yields:
+        aiomysql.DictCursor: Cursor returning rows as dictionaries
+    """
+    async with get_pool_manager().acquire() as conn:
+        await conn.begin()
+        try:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                yield cursor
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
@@ -0,0 +1,126 @@
+"""
+Worker-wide read cache module.
+Holds the process-wide caches for orders, tickets and per-customer order
+lists, the single-flight groups that coalesce concurrent identical reads,
+and the invalidation hooks the write paths call (which also pin reads of
+the written entity to the primary for a while).
+"""
+import os
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from ..utils.cache import TTLCache
+from ..utils.singleflight import SingleFlight
+from .replicas import mark_written
+
+# Short TTLs bound staleness for writes made by other workers
+ORDER_CACHE = TTLCache(
+    ttl=float(os.getenv("ORDER_CACHE_TTL", "15")),
+    maxsize=int(os.getenv("ORDER_CACHE_SIZE", "10000")),
+)
+TICKET_CACHE = TTLCache(
+    ttl=float(os.getenv("TICKET_CACHE_TTL", "15")),
+    maxsize=int(os.getenv("TICKET_CACHE_SIZE", "10000")),
+)
+CUSTOMER_ORDERS_CACHE = TTLCache(
+    ttl=float(os.getenv("CUSTOMER_ORDERS_CACHE_TTL", "15")),
+    maxsize=int(os.getenv("CUSTOMER_ORDERS_CACHE_SIZE", "5000")),
+)
+
+CACHES = {
+    "orders": ORDER_CACHE,
+    "tickets": TICKET_CACHE,
+    "customer_orders": CUSTOMER_ORDERS_CACHE,
+}
+
+# Concurrent reads of the same key share one query, e.g. many rooms asking
+# about orders from one restaurant during an outage
+CUSTOMER_FLIGHTS = SingleFlight("customers")
+ORDER_FLIGHTS = SingleFlight("orders")
+TICKET_FLIGHTS = SingleFlight("tickets")
+CUSTOMER_ORDERS_FLIGHTS = SingleFlight("customer_orders")
+
+FLIGHTS = {
+    flights.name: flights
+    for flights in (CUSTOMER_FLIGHTS, ORDER_FLIGHTS, TICKET_FLIGHTS, CUSTOMER_ORDERS_FLIGHTS)
+}
+
+
+async def read_through(
+    cache: TTLCache,
+    key: Hashable,
+    loader: Callable[[], Awaitable[Any]],
+    flights: Optional[SingleFlight] = None,
+) -> Any:
+    """
+    Return a cached value, loading and caching it on a miss.
+
+    Empty results (None or an empty list) are not cached so that rows
+    created after the lookup become visible immediately. Neither is a
+    result whose load overlapped an invalidation of the cache.
+
+    Args:
+        cache (TTLCache): Cache to read from
+        key (Hashable): Cache key
+        loader (Callable[[], Awaitable[Any]]): Coroutine factory that loads the value
+        flights (SingleFlight, optional): Group that coalesces concurrent misses
+
+    Returns:
+        Any: The cached or freshly loaded value
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    async def load() -> Any:
+        generation = cache.generation
+        loaded = await loader()
+        if loaded and cache.generation == generation:
+            cache.set(key, loaded)
+        return loaded
+
+    return await (flights.do(key, load) if flights is not None else load())
+
+
+def invalidate_order(order_id: int, customer_id: int = None) -> None:
+    """Drop a cached order and, if known, its customer's order lists."""
+    ORDER_CACHE.invalidate(order_id)
+    ORDER_FLIGHTS.forget(order_id)
+    mark_written(("order", order_id))
+    if customer_id is not None:
+        invalidate_customer(customer_id)
+
+
+def invalidate_ticket(ticket_id: int) -> None:
+    """Drop a cached ticket together with its cached latest comment."""
+    TICKET_CACHE.invalidate(("ticket", ticket_id))
+    TICKET_CACHE.invalidate(("latest_comment", ticket_id))
+    TICKET_FLIGHTS.forget(("ticket", ticket_id))
+    TICKET_FLIGHTS.forget(("latest_comment", ticket_id))
+    mark_written(("ticket", ticket_id))
+
+
+def invalidate_customer(customer_id: int) -> None:
+    """Drop every cached order list of a customer."""
+    CUSTOMER_ORDERS_CACHE.invalidate_where(lambda key, _: key[0] == customer_id)
+    CUSTOMER_ORDERS_FLIGHTS.forget_where(lambda key: key[0] == customer_id)
+    mark_written(("customer", customer_id))
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """
+    Report hit/miss/eviction counters for every shared cache.
+
+    Returns:
+        dict[str, dict[str, int]]: Counters keyed by cache name
+    """
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def flight_stats() -> dict[str, dict[str, int]]:
+    """
+    Report coalescing counters for every single-flight group.
+
+    Returns:
+        dict[str, dict[str, int]]: Counters keyed by namespace
+    """
+    return {name: flights.stats() for name, flights in FLIGHTS.items()}
@@ -0,0 +1,104 @@
+"""
+Query composition module.
+Lets the tool layer run independent queries side by side, so a tool that
+needs several lookups waits for the slowest one rather than their sum.
+
+Each room has a QueryScope whose semaphore bounds how many of its queries
+run at once, keeping one busy conversation from taking over the shared
+connection pool. The scope is picked up from the context: tools run
+inside their room's scope (see QueryScope.bind), and tasks they start
+inherit it. Outside any scope, queries run unbounded.
+"""
+import asyncio
+import functools
+import inspect
+import os
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Queries one room may have in flight through gather_queries()/start_query()
+ROOM_QUERY_CONCURRENCY = int(os.getenv("ROOM_QUERY_CONCURRENCY", "4"))
+
+
+class QueryScope:
+    """One room's bound on concurrent queries."""
+
+    def __init__(self, limit: int = ROOM_QUERY_CONCURRENCY):
+        """
+        Args:
+            limit (int, optional): Queries allowed in flight at once
+        """
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def run(self, query: Awaitable[T]) -> T:
+        """Await ``query`` once a slot is free."""
+        async with self._semaphore:
+            return await query
+
+    def bind(self, func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        """
+        Wrap a coroutine function so its queries, and those of tasks it starts, use this scope.
+
+        Args:
+            func (Callable[..., Awaitable[T]]): A tool coroutine function
+
+        Returns:
+            Callable[..., Awaitable[T]]: The wrapped coroutine function
+        """
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            token = _current_scope.set(self)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_scope.reset(token)
+
+        return wrapper
+
+
+_current_scope: ContextVar[Optional[QueryScope]] = ContextVar("query_scope", default=None)
+
+
+def _bounded(query: Awaitable[T]) -> Awaitable[T]:
+    scope = _current_scope.get()
+    return query if scope is None else scope.run(query)
+
+
+async def gather_queries(*queries: Awaitable[Any], return_exceptions: bool = False) -> list[Any]:
+    """
+    Run independent queries concurrently within the current room's bound.
+
+    Args:
+        queries (Awaitable[Any]): Coroutines that each run one lookup; none
+            may depend on another's result or call gather_queries() itself
+        return_exceptions (bool, optional): Return errors in place of results
+            instead of raising the first one, as asyncio.gather() does
+
+    Returns:
+        list[Any]: Results in the order the queries were given
+    """
+    return await asyncio.gather(*(start_query(query) for query in queries), return_exceptions=return_exceptions)
+
+
+def start_query(query: Awaitable[T]) -> "asyncio.Future[T]":
+    """
+    Start a query now and collect its result later, within the current room's bound.
+
+    Useful when the results are needed at different times, e.g. a summary
+    that can be sent before the details. Cancel the task if its result is
+    no longer wanted.
+
+    Args:
+        query (Awaitable[T]): Coroutine running one lookup
+
+    Returns:
+        asyncio.Future[T]: Task resolving to the query's result
+    """
+    task = asyncio.ensure_future(_bounded(query))
+    if inspect.iscoroutine(query):
+        # Cancelled while waiting for a slot, the query never started; close it quietly
+        task.add_done_callback(lambda done: query.close() if done.cancelled() else None)
+    return task
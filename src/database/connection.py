@@ -2,32 +2,82 @@
 Database connection management module.
 """
 import os
-from typing import Any
+import threading
+import time
+from typing import Any, Optional
 
 import mysql.connector
 from mysql.connector import pooling
 
+from ..utils.log import get_logger, log_query
+from ..utils.metrics import track_query
+from .pool import PoolSettings
+
+logger = get_logger("db")
+
 # Database configuration
 DB_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "3306")),
     "user": os.getenv("DB_USER", "sharad"),
     "password": os.getenv("DB_PASSWORD", "password"),
     "database": os.getenv("DB_NAME", "customer-support-db"),
     "pool_name": "mypool",
-    "pool_size": 5
 }
 
-# Create connection pool
-connection_pool = mysql.connector.pooling.MySQLConnectionPool(**DB_CONFIG)
+# mysql-connector refuses pools larger than this
+MAX_SYNC_POOL_SIZE = pooling.CNX_POOL_MAXSIZE
+
+POOL_SETTINGS = PoolSettings.from_env()
+
+# Connection pool, created on first use rather than at import time
+connection_pool = None
+_pool_lock = threading.Lock()
 
-def get_db_connection():
+def get_connection_pool() -> pooling.MySQLConnectionPool:
     """
-    Get a connection from the pool.
+    Get the synchronous connection pool, creating it on first use.
+    
+    Returns:
+        pooling.MySQLConnectionPool: Pool sized from POOL_SETTINGS
+    """
+    global connection_pool
+    if connection_pool is None:
+        with _pool_lock:
+            if connection_pool is None:
+                connection_pool = pooling.MySQLConnectionPool(
+                    pool_size=min(POOL_SETTINGS.maxsize, MAX_SYNC_POOL_SIZE),
+                    pool_reset_session=True,
+                    **DB_CONFIG,
+                )
+    return connection_pool
+
+def get_db_connection(timeout: float = None):
+    """
+    Get a connection from the pool, waiting while it is exhausted.
+    
+    Args:
+        timeout (float, optional): Seconds to wait for a free connection.
+            Defaults to POOL_SETTINGS.acquire_timeout.
     
     Returns:
         mysql.connector.connection.MySQLConnection: Database connection object
+    
+    Raises:
+        mysql.connector.errors.PoolError: If no connection was freed in time
     """
-    return connection_pool.get_connection()
+    pool = get_connection_pool()
+    deadline = time.monotonic() + (POOL_SETTINGS.acquire_timeout if timeout is None else timeout)
+    delay = 0.005
+    while True:
+        try:
+            # The pool pings each connection and reconnects stale sockets itself
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
 
 def execute_query(query: str, params: tuple = None) -> list[dict[str, Any]]:
     """
@@ -41,16 +91,17 @@ def execute_query(query: str, params: tuple = None) -> list[dict[str, Any]]:
         list[dict[str, Any]]: List of dictionaries representing query results.
     """
     conn = None  # Initialize conn outside the try block
+    started = time.perf_counter()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        print(f"Executing SQL Query: {query} with params: {params}")  # Log the query
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        with track_query(query):
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, rows=len(results))
         return results
     except mysql.connector.Error as err:
-        print(f"Error executing query: {err}")
-        print(f"Query was: {query} with params: {params}") # Print query on error as well
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
         return []
     finally:
         if conn:
@@ -65,16 +116,126 @@ def execute_update(query: str, params: tuple = None) -> None:
         params (tuple, optional): Parameters for the SQL query. Defaults to None.
     """
     conn = None  # Initialize conn outside the try block
+    started = time.perf_counter()
+    try:
+        with track_query(query):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, rows=cursor.rowcount)
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
+    finally:
+        if conn:
+            conn.close()
+
+def execute_insert(query: str, params: tuple = None) -> Optional[int]:
+    """
+    Execute a single-row INSERT and return the generated ID.
+    
+    Args:
+        query (str): INSERT statement.
+        params (tuple, optional): Parameters for the SQL query. Defaults to None.
+    
+    Returns:
+        Optional[int]: AUTO_INCREMENT ID of the new row, or None if the insert failed.
+    """
+    conn = None
+    started = time.perf_counter()
     try:
-        conn = get_db_connection()
+        with track_query(query):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, rows=cursor.rowcount)
+        return cursor.lastrowid
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+# Whether the server hands a multi-row INSERT consecutive AUTO_INCREMENT IDs;
+# checked once per process by _consecutive_insert_ids()
+_consecutive_ids: Optional[bool] = None
+
+AUTOINC_SETTINGS_QUERY = "SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment"
+
+
+def _consecutive_insert_ids(conn) -> bool:
+    """
+    Check whether a multi-row INSERT's rows get consecutive IDs on this server.
+
+    That holds for lock modes 0 (traditional) and 1 (consecutive) with an
+    increment of 1. Under mode 2 (interleaved, MySQL 8.0's default), a
+    concurrent bulk or mixed-mode insert such as INSERT ... ON DUPLICATE KEY
+    UPDATE can take IDs in the middle of the range.
+    """
+    global _consecutive_ids
+    if _consecutive_ids is None:
         cursor = conn.cursor()
-        print(f"Executing SQL Update: {query} with params: {params}") # Log the update query
-        cursor.execute(query, params)
-        conn.commit()
+        try:
+            cursor.execute(AUTOINC_SETTINGS_QUERY)
+            lock_mode, increment = cursor.fetchone()
+        finally:
+            cursor.close()
+        _consecutive_ids = int(lock_mode) in (0, 1) and int(increment) == 1
+        if not _consecutive_ids:
+            logger.info("innodb_autoinc_lock_mode=%s, auto_increment_increment=%s: "
+                        "bulk inserts run one row at a time to learn each ID", lock_mode, increment)
+    return _consecutive_ids
+
+
+def execute_insert_many(query: str, rows: list[tuple]) -> Optional[list[int]]:
+    """
+    Insert many rows in one transaction and return their IDs.
+    
+    When the server guarantees consecutive AUTO_INCREMENT IDs for a
+    multi-row INSERT (see _consecutive_insert_ids()), the rows go out as one
+    statement and the IDs follow from the first one. Otherwise each row is
+    inserted on its own, still in one transaction, and its ID read from
+    lastrowid, so no row is ever given another row's ID.
+    
+    Args:
+        query (str): Single-row INSERT ... VALUES (...) statement; the
+            connector rewrites it into one multi-row statement.
+        rows (list[tuple]): Parameters for each row.
+    
+    Returns:
+        Optional[list[int]]: IDs of the inserted rows in order (empty when
+        there were no rows), or None if the insert failed.
+    """
+    if not rows:
+        return []
+    conn = None
+    started = time.perf_counter()
+    try:
+        with track_query(query):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            if _consecutive_insert_ids(conn):
+                cursor.executemany(query, rows)
+                ids = list(range(cursor.lastrowid, cursor.lastrowid + len(rows)))
+            else:
+                ids = []
+                for row in rows:
+                    cursor.execute(query, row)
+                    ids.append(cursor.lastrowid)
+            conn.commit()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, rows=len(ids))
+        return ids
     except mysql.connector.Error as err:
-        conn.rollback()
-        print(f"Error executing update: {err}")
-        print(f"Query was: {query} with params: {params}") # Print query on error as well
+        if conn:
+            conn.rollback()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
+        return None
     finally:
         if conn:
-            conn.close() 
\ No newline at end of file
+            conn.close()
@@ -0,0 +1,224 @@
+"""
+Bulk customer import module.
+Streams customer records from CSV or JSONL exports into the Customers
+table. Phone numbers are normalized a chunk at a time and each chunk is
+written with one multi-row INSERT ... ON DUPLICATE KEY UPDATE keyed on the
+unique phone index, so re-running an import reconciles rather than
+duplicates. Rows that cannot be imported are counted by reason and can be
+written to a rejects file.
+"""
+import csv
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+import mysql.connector
+
+from ..utils.log import get_logger, log_query
+from ..utils.metrics import track_query
+from ..utils.phone_utils import normalize_phone_numbers
+from .connection import get_db_connection
+
+logger = get_logger("importer")
+
+# Rows per multi-row INSERT; keep chunk_size * row size under max_allowed_packet
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+UPSERT_CUSTOMERS = (
+    "INSERT INTO Customers (name, email, phone, city) VALUES {rows}"
+    " ON DUPLICATE KEY UPDATE name = VALUES(name), email = VALUES(email),"
+    " city = COALESCE(VALUES(city), city)"
+)
+UPSERT_ROW = "(%s, %s, %s, %s)"
+
+# Accepted spellings of the phone column in exports
+PHONE_FIELDS = ("phone", "mobile", "phone_number")
+
+# Line number and parsed record (None if the line could not be parsed)
+SourceRecord = tuple[int, Optional[dict[str, Any]]]
+
+
+@dataclass
+class ImportStats:
+    """Progress of one import run."""
+    rows_read: int = 0
+    # Rows that passed validation; the same as rows_written unless this is a dry run
+    rows_validated: int = 0
+    rows_written: int = 0
+    chunks: int = 0
+    dry_run: bool = False
+    invalid: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rows_invalid(self) -> int:
+        return sum(self.invalid.values())
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / max(self.elapsed, 1e-9)
+
+    def summary(self) -> str:
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in self.invalid.most_common())
+        outcome = f"{self.rows_validated:,} validated" if self.dry_run else f"{self.rows_written:,} written"
+        return (
+            f"{self.rows_read:,} rows read, {outcome}, {self.rows_invalid:,} rejected"
+            f"{f' ({reasons})' if reasons else ''} in {self.elapsed:.1f}s ({self.rows_per_second:,.0f} rows/s)"
+        )
+
+
+def read_records(path: Path) -> Iterator[SourceRecord]:
+    """
+    Stream records from a CSV (with a header row) or JSONL file.
+
+    Args:
+        path (Path): Export file; ``.jsonl``/``.ndjson`` is read as JSON lines,
+            anything else as CSV
+
+    Yields:
+        SourceRecord: Line number and record; None for
+        lines that are not a JSON object, so they are reported as invalid
+    """
+    with open(path, newline="", encoding="utf-8") as export:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line_number, line in enumerate(export, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_number, record if isinstance(record, dict) else None
+        else:
+            reader = csv.DictReader(export)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def _chunks(records: Iterator[SourceRecord], size: int) -> Iterator[list[SourceRecord]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _field(record: dict[str, Any], name: str) -> Optional[str]:
+    value = record.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _phone(record: dict[str, Any]) -> Any:
+    for name in PHONE_FIELDS:
+        if record.get(name) not in (None, ""):
+            return record[name]
+    return None
+
+
+def _prepare(chunk: list[SourceRecord], stats: ImportStats, rejects: Optional[csv.writer]) -> list[tuple]:
+    phones = normalize_phone_numbers(_phone(record) if record else None for _, record in chunk)
+    # Keyed by phone: the last occurrence in a chunk wins, as it would across chunks
+    rows: dict[str, tuple] = {}
+    for (line_number, record), phone in zip(chunk, phones):
+        if record is None:
+            stats.invalid["unparseable"] += 1
+            if rejects is not None:
+                rejects.writerow((line_number, "unparseable", ""))
+            continue
+        name, email = _field(record, "name"), _field(record, "email")
+        reason = ("invalid_phone" if not phone else "missing_name" if not name
+                  else "missing_email" if not email else None)
+        if reason:
+            stats.invalid[reason] += 1
+            if rejects is not None:
+                rejects.writerow((line_number, reason, json.dumps(record, default=str)))
+            continue
+        rows[phone] = (name, email, phone, _field(record, "city"))
+    return list(rows.values())
+
+
+def _write_chunk(conn, rows: list[tuple]) -> None:
+    query = UPSERT_CUSTOMERS.format(rows=", ".join([UPSERT_ROW] * len(rows)))
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        with track_query(query):
+            cursor.execute(query, tuple(value for row in rows for value in row))
+            conn.commit()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        log_query(logger, query, (time.perf_counter() - started) * 1000, error=err)
+        raise
+    finally:
+        cursor.close()
+    log_query(logger, query, (time.perf_counter() - started) * 1000, rows=len(rows))
+
+
+def import_customers(
+    path: Path,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    rejects_path: Optional[Path] = None,
+    dry_run: bool = False,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """
+    Import or reconcile customers from an export file.
+
+    Customers are matched on their normalized phone number: new numbers are
+    inserted, known ones get the export's name and email (and city, when
+    present). Each chunk commits on its own, and the upsert is idempotent,
+    so an import that fails part way can simply be run again.
+
+    Args:
+        path (Path): CSV or JSONL export with ``name``, ``email``, ``phone``
+            (or ``mobile``) and optional ``city`` fields
+        chunk_size (int, optional): Rows per INSERT statement and commit
+        rejects_path (Path, optional): Write rejected rows here as CSV
+            (line, reason, record)
+        dry_run (bool, optional): Validate and count without writing
+        progress (Callable[[ImportStats], None], optional): Called after every chunk
+
+    Returns:
+        ImportStats: Counts and timing of the run
+
+    Raises:
+        mysql.connector.Error: If a chunk cannot be written; earlier chunks stay committed
+    """
+    stats = ImportStats(dry_run=dry_run)
+    conn = None if dry_run else get_db_connection()
+    rejects_file: Optional[TextIO] = open(rejects_path, "w", newline="") if rejects_path else None
+    try:
+        rejects = csv.writer(rejects_file) if rejects_file else None
+        if rejects:
+            rejects.writerow(("line", "reason", "record"))
+        for chunk in _chunks(read_records(Path(path)), chunk_size):
+            stats.rows_read += len(chunk)
+            rows = _prepare(chunk, stats, rejects)
+            stats.rows_validated += len(rows)
+            if rows and conn is not None:
+                _write_chunk(conn, rows)
+                stats.rows_written += len(rows)
+            stats.chunks += 1
+            if progress:
+                progress(stats)
+    finally:
+        if conn is not None:
+            conn.close()
+        if rejects_file:
+            rejects_file.close()
+    logger.info("Customer import from %s: %s", path, stats.summary())
+    return stats
@@ -0,0 +1,218 @@
+"""
+Versioned schema migration module.
+Applies numbered migrations once per database and records them in the
+SchemaVersion table. Run it at deploy time (``python manage.py migrate``)
+or at worker boot, never from the call path.
+"""
+from dataclasses import dataclass
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from ..utils.log import get_logger
+from .connection import get_db_connection
+
+logger = get_logger("migrations")
+
+SCHEMA_VERSION_TABLE = """CREATE TABLE IF NOT EXISTS SchemaVersion (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)"""
+
+# Serializes concurrent runners (e.g. several workers booting at once)
+MIGRATION_LOCK_NAME = "schema_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+# Errors meaning a statement's effect is already present, e.g. on databases
+# created from schema.sql or patched by hand
+_ALREADY_APPLIED_ERRORS = {
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+}
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+
+
+MIGRATIONS = [
+    Migration(1, "create_core_tables", (
+        """CREATE TABLE IF NOT EXISTS Customers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            phone VARCHAR(50) NOT NULL,
+            city VARCHAR(100),
+            registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE INDEX idx_phone (phone)
+        )""",
+        """CREATE TABLE IF NOT EXISTS Orders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            restaurant_name VARCHAR(255) NOT NULL,
+            order_status ENUM('PLACED', 'CONFIRMED', 'PREPARING', 'OUT_FOR_DELIVERY', 'DELIVERED', 'CANCELLED') DEFAULT 'PLACED',
+            order_total DECIMAL(10,2) NOT NULL,
+            payment_method VARCHAR(50),
+            delivery_address TEXT,
+            order_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            delivery_timestamp DATETIME,
+            order_details JSON,
+            FOREIGN KEY (customer_id) REFERENCES Customers(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS SupportAgents (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255),
+            available BOOLEAN DEFAULT TRUE
+        )""",
+        """CREATE TABLE IF NOT EXISTS Tickets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            order_id INT,
+            subject VARCHAR(255) NOT NULL,
+            description TEXT,
+            priority ENUM('low', 'medium', 'high', 'urgent') DEFAULT 'medium',
+            status ENUM('open', 'in_progress', 'resolved', 'closed') DEFAULT 'open',
+            category ENUM('delivery_delay', 'quality_issue', 'wrong_items', 'missing_items', 'refund', 'other') DEFAULT 'other',
+            created_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            resolved_date DATETIME,
+            assigned_agent_id INT,
+            FOREIGN KEY (customer_id) REFERENCES Customers(id),
+            FOREIGN KEY (order_id) REFERENCES Orders(id),
+            FOREIGN KEY (assigned_agent_id) REFERENCES SupportAgents(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS TicketComments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            ticket_id INT NOT NULL,
+            comment TEXT NOT NULL,
+            author_type ENUM('customer', 'agent', 'system') DEFAULT 'agent',
+            author_id INT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (ticket_id) REFERENCES Tickets(id)
+        )""",
+    )),
+    Migration(2, "add_columns_used_by_tools", (
+        # Databases created from schema.sql predate agent assignment
+        "ALTER TABLE Tickets ADD COLUMN assigned_agent_id INT",
+        "ALTER TABLE TicketComments ADD COLUMN author VARCHAR(255)",
+        "ALTER TABLE Customers ADD COLUMN address TEXT",
+    )),
+    Migration(3, "add_hot_query_indexes", (
+        # Tickets by customer, newest first
+        "CREATE INDEX idx_tickets_customer_id ON Tickets (customer_id, id)",
+        # Recent orders per customer
+        "CREATE INDEX idx_orders_customer_timestamp ON Orders (customer_id, order_timestamp)",
+        # Latest comment per ticket
+        "CREATE INDEX idx_ticket_comments_ticket_created ON TicketComments (ticket_id, created_at)",
+        # Ticket creation looks customers up by email
+        "CREATE INDEX idx_customers_email ON Customers (email)",
+    )),
+    Migration(4, "create_audit_events", (
+        """CREATE TABLE IF NOT EXISTS AuditEvents (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            event_type VARCHAR(64) NOT NULL,
+            entity_type VARCHAR(32),
+            entity_id BIGINT,
+            room VARCHAR(255),
+            payload JSON,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_audit_events_entity (entity_type, entity_id, created_at)
+        )""",
+    )),
+    Migration(5, "add_write_behind_ids", (
+        # Client-generated ID of each write-behind row, so a replayed write inserts nothing
+        "ALTER TABLE TicketComments ADD COLUMN write_id CHAR(32)",
+        "CREATE UNIQUE INDEX idx_ticket_comments_write_id ON TicketComments (write_id)",
+        "ALTER TABLE AuditEvents ADD COLUMN write_id CHAR(32)",
+        "CREATE UNIQUE INDEX idx_audit_events_write_id ON AuditEvents (write_id)",
+    )),
+    Migration(6, "add_ticket_agent_status_index", (
+        # Agent assignment counts open tickets per agent with a locking read;
+        # without this index it would lock every ticket it scans
+        "CREATE INDEX idx_tickets_agent_status ON Tickets (assigned_agent_id, status)",
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def applied_versions(cursor) -> set[int]:
+    """
+    Read the versions recorded in SchemaVersion.
+
+    Args:
+        cursor: Open cursor on the target database
+
+    Returns:
+        set[int]: Applied migration versions
+    """
+    cursor.execute(SCHEMA_VERSION_TABLE)
+    cursor.execute("SELECT version FROM SchemaVersion")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _apply(cursor, migration: Migration) -> None:
+    for statement in migration.statements:
+        try:
+            cursor.execute(statement)
+        except mysql.connector.Error as err:
+            if err.errno not in _ALREADY_APPLIED_ERRORS:
+                raise
+            logger.info("Migration %s: skipping, already applied (%s)", migration.version, err.msg)
+    cursor.execute(
+        "INSERT INTO SchemaVersion (version, name) VALUES (%s, %s)",
+        (migration.version, migration.name),
+    )
+
+
+def migrate(target: int = None) -> list[int]:
+    """
+    Apply every pending migration up to ``target``.
+
+    Args:
+        target (int, optional): Highest version to apply. Defaults to the latest.
+
+    Returns:
+        list[int]: Versions applied by this run
+    """
+    target = LATEST_VERSION if target is None else target
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for another migration run to finish")
+        try:
+            done = applied_versions(cursor)
+            applied = []
+            for migration in MIGRATIONS:
+                if migration.version > target or migration.version in done:
+                    continue
+                logger.info("Applying migration %s: %s", migration.version, migration.name)
+                _apply(cursor, migration)
+                conn.commit()
+                applied.append(migration.version)
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def status() -> list[tuple[Migration, bool]]:
+    """
+    List every known migration with whether it has been applied.
+
+    Returns:
+        list[tuple[Migration, bool]]: Migrations in version order
+    """
+    conn = get_db_connection()
+    try:
+        done = applied_versions(conn.cursor())
+        return [(migration, migration.version in done) for migration in MIGRATIONS]
+    finally:
+        conn.close()
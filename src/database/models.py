@@ -1,129 +1,261 @@
 """
 Database models for the customer support system.
+Fields mirror the table columns, so rows from SELECT * map straight onto
+the dataclasses. Creates return the new entity from the INSERT's generated
+ID instead of reading the row back, and create_many() variants insert many
+rows in one transaction (one multi-row INSERT where the server's
+AUTO_INCREMENT settings make the IDs predictable, see execute_insert_many()).
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Iterable, Optional, TypeVar
 
-from .connection import execute_query, execute_update
+from .cache import invalidate_customer, invalidate_order, invalidate_ticket
+from .connection import execute_insert, execute_insert_many, execute_query, execute_update
 
-@dataclass
+Model = TypeVar("Model")
+
+
+def _now() -> datetime:
+    # DATETIME columns store whole seconds; match what a re-read would return
+    return datetime.now().replace(microsecond=0)
+
+
+def _from_row(cls: type[Model], row: dict[str, Any]) -> Model:
+    # Ignore columns added by later migrations that the model does not know yet
+    names = cls.__dataclass_fields__
+    return cls(**{key: value for key, value in row.items() if key in names})
+
+
+def _insert_statement(table: str, columns: tuple[str, ...]) -> str:
+    placeholders = ", ".join(["%s"] * len(columns))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def _insert(table: str, columns: tuple[str, ...], entity: Model) -> Optional[Model]:
+    entity_id = execute_insert(
+        _insert_statement(table, columns), tuple(getattr(entity, column) for column in columns)
+    )
+    if entity_id is None:
+        return None
+    entity.id = entity_id
+    return entity
+
+
+def _insert_many(table: str, columns: tuple[str, ...], entities: list[Model]) -> list[Model]:
+    ids = execute_insert_many(
+        _insert_statement(table, columns),
+        [tuple(getattr(entity, column) for column in columns) for entity in entities],
+    )
+    if ids is None:
+        return []
+    for entity, entity_id in zip(entities, ids):
+        entity.id = entity_id
+    return entities
+
+
+@dataclass(slots=True)
 class Customer:
-    id: Optional[int]
     name: str
     email: str
-    phone: Optional[str]
-    registration_date: Optional[datetime]
+    phone: str
+    city: Optional[str] = None
+    address: Optional[str] = None
+    registration_date: Optional[datetime] = None
+    id: Optional[int] = None
+
+    COLUMNS = ("name", "email", "phone", "city", "address", "registration_date")
 
     @staticmethod
-    def create(name: str, email: str, phone: Optional[str] = None) -> 'Customer':
+    def create(name: str, email: str, phone: str, city: Optional[str] = None,
+               address: Optional[str] = None) -> Optional['Customer']:
         """Create a new customer."""
-        query = "INSERT INTO Customers (name, email, phone) VALUES (%s, %s, %s)"
-        execute_update(query, (name, email, phone))
-        return Customer.get_by_email(email)
+        customer = Customer(name, email, phone, city, address, _now())
+        return _insert("Customers", Customer.COLUMNS, customer)
+
+    @staticmethod
+    def create_many(customers: Iterable['Customer']) -> list['Customer']:
+        """
+        Create many customers in one transaction.
+
+        Args:
+            customers (Iterable[Customer]): New customers; their ``id`` is ignored
+
+        Returns:
+            list[Customer]: The customers with IDs set, or an empty list if the insert failed
+        """
+        customers = list(customers)
+        for customer in customers:
+            customer.registration_date = customer.registration_date or _now()
+        return _insert_many("Customers", Customer.COLUMNS, customers)
 
     @staticmethod
     def get_by_email(email: str) -> Optional['Customer']:
         """Get customer by email."""
-        query = "SELECT * FROM Customers WHERE email = %s"
+        query = "SELECT * FROM Customers WHERE email = %s LIMIT 1"
         results = execute_query(query, (email,))
-        return Customer(**results[0]) if results else None
+        return _from_row(Customer, results[0]) if results else None
 
-@dataclass
+@dataclass(slots=True)
 class SupportAgent:
-    id: Optional[int]
-    name: str
-    email: Optional[str]
-    phone: Optional[str]
+    name: Optional[str]
     available: Optional[bool] = True
+    id: Optional[int] = None
 
     @staticmethod
     def get_available_agents() -> list['SupportAgent']:
         """Get list of available support agents."""
-        query = "SELECT * FROM SupportAgents"
+        query = "SELECT * FROM SupportAgents WHERE available = TRUE"
         results = execute_query(query)
-        return [SupportAgent(**result) for result in results]
+        return [_from_row(SupportAgent, result) for result in results]
 
-@dataclass
+@dataclass(slots=True)
 class Ticket:
-    id: Optional[int]
     customer_id: int
     subject: str
-    description: Optional[str]
-    status: str
-    created_date: Optional[datetime]
-    closed_date: Optional[datetime]
-    assigned_agent_id: Optional[int]
+    description: Optional[str] = None
+    order_id: Optional[int] = None
+    priority: str = "medium"
+    status: str = "open"
+    category: str = "other"
+    created_date: Optional[datetime] = None
+    resolved_date: Optional[datetime] = None
+    assigned_agent_id: Optional[int] = None
+    id: Optional[int] = None
+
+    COLUMNS = ("customer_id", "order_id", "subject", "description", "priority", "status", "category",
+               "created_date", "assigned_agent_id")
 
     @staticmethod
-    def create_ticket(customer_id: int, subject: str, description: str) -> 'Ticket':
+    def create_ticket(customer_id: int, subject: str, description: str,
+                      order_id: Optional[int] = None) -> Optional['Ticket']:
         """Create a new support ticket."""
-        query = """
-            INSERT INTO Tickets (customer_id, subject, description)
-            VALUES (%s, %s, %s)
+        ticket = Ticket(customer_id, subject, description, order_id, created_date=_now())
+        return _insert("Tickets", Ticket.COLUMNS, ticket)
+
+    @staticmethod
+    def create_many(tickets: Iterable['Ticket']) -> list['Ticket']:
+        """
+        Create many tickets in one transaction.
+
+        Args:
+            tickets (Iterable[Ticket]): New tickets; their ``id`` is ignored
+
+        Returns:
+            list[Ticket]: The tickets with IDs set, or an empty list if the insert failed
         """
-        execute_update(query, (customer_id, subject, description))
-        # Get the last inserted ticket
-        query = "SELECT * FROM Tickets WHERE customer_id = %s ORDER BY id DESC LIMIT 1"
-        results = execute_query(query, (customer_id,))
-        return Ticket(**results[0]) if results else None
+        tickets = list(tickets)
+        for ticket in tickets:
+            ticket.created_date = ticket.created_date or _now()
+        return _insert_many("Tickets", Ticket.COLUMNS, tickets)
 
-    def add_comment(self, comment: str, author: str) -> None:
+    def add_comment(self, comment: str, author: str) -> Optional['TicketComment']:
         """Add a comment to the ticket."""
-        query = "INSERT INTO TicketComments (ticket_id, comment, author) VALUES (%s, %s, %s)"
-        execute_update(query, (self.id, comment, author))
+        return TicketComment.create_comment(self.id, comment, author)
 
-    def get_comments(self) -> list[dict]:
+    def get_comments(self) -> list['TicketComment']:
         """Get all comments for this ticket."""
         query = "SELECT * FROM TicketComments WHERE ticket_id = %s ORDER BY created_at"
-        return execute_query(query, (self.id,))
+        return [_from_row(TicketComment, row) for row in execute_query(query, (self.id,))]
 
     def assign_agent(self, agent_id: int) -> None:
         """Assign an agent to the ticket."""
         query = "UPDATE Tickets SET assigned_agent_id = %s WHERE id = %s"
         execute_update(query, (agent_id, self.id))
+        invalidate_ticket(self.id)
         self.assigned_agent_id = agent_id
 
     def update_status(self, status: str) -> None:
         """Update ticket status."""
         query = "UPDATE Tickets SET status = %s WHERE id = %s"
         execute_update(query, (status, self.id))
+        invalidate_ticket(self.id)
         self.status = status
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    id: Optional[int]
     customer_id: int
-    restaurant: str
-    order_status: str
-    order_timestamp: Optional[datetime]
-    order_details: str
+    restaurant_name: str
+    order_status: str = "PLACED"
+    order_total: float = 0.0
+    payment_method: Optional[str] = None
+    delivery_address: Optional[str] = None
+    order_timestamp: Optional[datetime] = None
+    delivery_timestamp: Optional[datetime] = None
+    order_details: Optional[str] = None
+    id: Optional[int] = None
+
+    COLUMNS = ("customer_id", "restaurant_name", "order_status", "order_total", "payment_method",
+               "delivery_address", "order_timestamp", "order_details")
 
     @staticmethod
-    def create_order(customer_id: int, restaurant: str, order_status: str, order_details: str) -> 'Order':
-        query = "INSERT INTO Orders (customer_id, restaurant, order_status, order_timestamp, order_details) VALUES (%s, %s, %s, NOW(), %s)"
-        execute_update(query, (customer_id, restaurant, order_status, order_details))
-        query = "SELECT * FROM Orders WHERE customer_id = %s ORDER BY id DESC LIMIT 1"
-        results = execute_query(query, (customer_id,))
-        return Order(**results[0]) if results else None
+    def create_order(customer_id: int, restaurant_name: str, order_status: str, order_details: str,
+                     order_total: float = 0.0) -> Optional['Order']:
+        order = Order(customer_id, restaurant_name, order_status, order_total,
+                      order_timestamp=_now(), order_details=order_details)
+        order = _insert("Orders", Order.COLUMNS, order)
+        invalidate_customer(customer_id)
+        return order
+
+    @staticmethod
+    def create_many(orders: Iterable['Order']) -> list['Order']:
+        """
+        Create many orders in one transaction.
+
+        Args:
+            orders (Iterable[Order]): New orders; their ``id`` is ignored
+
+        Returns:
+            list[Order]: The orders with IDs set, or an empty list if the insert failed
+        """
+        orders = list(orders)
+        for order in orders:
+            order.order_timestamp = order.order_timestamp or _now()
+        created = _insert_many("Orders", Order.COLUMNS, orders)
+        for customer_id in {order.customer_id for order in orders}:
+            invalidate_customer(customer_id)
+        return created
 
     def update_status(self, new_status: str) -> None:
         query = "UPDATE Orders SET order_status = %s WHERE id = %s"
         execute_update(query, (new_status, self.id))
+        invalidate_order(self.id, self.customer_id)
         self.order_status = new_status
 
-@dataclass
+@dataclass(slots=True)
 class TicketComment:
-    id: Optional[int]
     ticket_id: int
     comment: str
-    author: str
-    created_at: Optional[datetime]
+    author: Optional[str] = None
+    author_type: str = "agent"
+    author_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    id: Optional[int] = None
+
+    COLUMNS = ("ticket_id", "comment", "author", "author_type", "author_id", "created_at")
+
+    @staticmethod
+    def create_comment(ticket_id: int, comment: str, author: str) -> Optional['TicketComment']:
+        ticket_comment = TicketComment(ticket_id, comment, author, created_at=_now())
+        ticket_comment = _insert("TicketComments", TicketComment.COLUMNS, ticket_comment)
+        invalidate_ticket(ticket_id)
+        return ticket_comment
 
     @staticmethod
-    def create_comment(ticket_id: int, comment: str, author: str) -> 'TicketComment':
-        query = "INSERT INTO TicketComments (ticket_id, comment, author) VALUES (%s, %s, %s)"
-        execute_update(query, (ticket_id, comment, author))
-        query = "SELECT * FROM TicketComments WHERE ticket_id = %s ORDER BY id DESC LIMIT 1"
-        results = execute_query(query, (ticket_id,))
-        return TicketComment(**results[0]) if results else None 
\ No newline at end of file
+    def create_many(comments: Iterable['TicketComment']) -> list['TicketComment']:
+        """
+        Create many comments in one transaction.
+
+        Args:
+            comments (Iterable[TicketComment]): New comments; their ``id`` is ignored
+
+        Returns:
+            list[TicketComment]: The comments with IDs set, or an empty list if the insert failed
+        """
+        comments = list(comments)
+        for comment in comments:
+            comment.created_at = comment.created_at or _now()
+        created = _insert_many("TicketComments", TicketComment.COLUMNS, comments)
+        for ticket_id in {comment.ticket_id for comment in comments}:
+            invalidate_ticket(ticket_id)
+        return created
@@ -0,0 +1,317 @@
+"""
+Phone index module.
+An optional in-memory index from normalized phone number to customer ID
+and name, so caller verification usually needs no database round trip.
+
+The bulk of the index is a snapshot file of sorted, fixed-width arrays,
+built out of band by `python manage.py build-phone-index` and memory-mapped
+read-only by every job process, so the pages are shared rather than copied
+per process. Each process then catches up on customers registered since
+the snapshot by polling for IDs above the snapshot's watermark, and keeps
+those in a small, capped overlay. Lookups that miss fall back to MySQL.
+Without a usable snapshot the overlay starts at the current highest
+customer ID rather than copying the table into every process.
+
+Customers are only ever added by the agent; edits made elsewhere (e.g. by
+an import) show up when the snapshot is next rebuilt.
+"""
+import asyncio
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Optional
+
+from ..utils.log import get_logger
+from ..utils.metrics import REGISTRY
+from .async_connection import async_fetch_rows
+from .statements import prepared_session
+
+logger = get_logger("phone_index")
+
+PHONE_INDEX_ENABLED = os.getenv("PHONE_INDEX_ENABLED", "false").lower() == "true"
+PHONE_INDEX_PATH = Path(os.getenv("PHONE_INDEX_PATH", "data/phone_index.bin"))
+# Seconds between polls for newly registered customers
+PHONE_INDEX_REFRESH = float(os.getenv("PHONE_INDEX_REFRESH_S", "30"))
+# Rows per query when building the snapshot or catching up
+PHONE_INDEX_BATCH = int(os.getenv("PHONE_INDEX_BATCH", "50000"))
+# Most customers kept in a process's overlay; later ones are looked up in MySQL
+PHONE_INDEX_OVERLAY_MAX = int(os.getenv("PHONE_INDEX_OVERLAY_MAX", "100000"))
+
+# Keyset scans: the build walks the unique phone index, refreshes the primary key
+SNAPSHOT_QUERY = "SELECT id, phone, name FROM Customers WHERE phone > %s ORDER BY phone LIMIT %s"
+NEW_CUSTOMERS_QUERY = "SELECT id, phone, name FROM Customers WHERE id > %s ORDER BY id LIMIT %s"
+MAX_CUSTOMER_ID_QUERY = "SELECT COALESCE(MAX(id), 0) AS max_id FROM Customers"
+
+# magic, entry count, names blob length, ID watermark
+_HEADER = struct.Struct("<8sQQQ")
+_MAGIC = b"PHONEIX1"
+
+LOOKUPS = REGISTRY.counter(
+    "phone_index_lookups_total", "Phone index lookups by result", ("result",))
+ENTRIES = REGISTRY.gauge(
+    "phone_index_entries", "Customers held by the phone index", ("source",))
+
+
+def phone_key(phone: str) -> Optional[int]:
+    """
+    Pack a normalized phone number into an integer index key.
+
+    Args:
+        phone (str): Phone number in +91-XXXXXXXXXX format
+
+    Returns:
+        Optional[int]: The ten national digits as an integer, or None if
+        ``phone`` is not in the normalized format
+    """
+    if len(phone) != 14 or not phone.startswith("+91-") or not phone[4:].isdigit():
+        return None
+    return int(phone[4:])
+
+
+class PhoneIndex:
+    """
+    Snapshot plus overlay of phone number to customer ID and name.
+
+    Not thread-safe; intended to be used from a single event loop.
+    """
+
+    def __init__(self, path: Path = PHONE_INDEX_PATH, refresh_interval: float = PHONE_INDEX_REFRESH,
+                 overlay_max: int = PHONE_INDEX_OVERLAY_MAX):
+        """
+        Args:
+            path (Path, optional): Snapshot file written by build_snapshot()
+            refresh_interval (float, optional): Seconds between polls for new customers
+            overlay_max (int, optional): Most customers held outside the snapshot
+        """
+        self.path = Path(path)
+        self.refresh_interval = refresh_interval
+        self.overlay_max = overlay_max
+        self.watermark = 0
+        # Set once the watermark is known: from the snapshot, or from MAX(id) without one
+        self._baseline = False
+        self._phones: Any = ()
+        self._offsets: Any = ()
+        self._ids: Any = ()
+        self._names: Any = b""
+        self._map: Optional[mmap.mmap] = None
+        # Customers registered after the snapshot: phone key -> (id, name)
+        self._overlay: dict[int, tuple[int, str]] = {}
+        self._overlay_full = False
+        self._refresher: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._phones) + len(self._overlay)
+
+    def open(self) -> bool:
+        """
+        Map the snapshot file, if there is one.
+
+        Returns:
+            bool: Whether a snapshot was loaded
+        """
+        try:
+            with open(self.path, "rb") as snapshot:
+                mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            logger.warning("No phone index snapshot at %s; lookups start from the database", self.path)
+            return False
+        try:
+            magic, count, names_length, watermark = _HEADER.unpack_from(mapped)
+            if magic != _MAGIC:
+                raise ValueError("not a phone index snapshot")
+            if len(mapped) != _HEADER.size + 20 * count + 8 + names_length:
+                raise ValueError("truncated or padded file")
+        except (struct.error, ValueError) as err:
+            mapped.close()
+            logger.warning("Ignoring phone index snapshot %s (%s); lookups start from the database",
+                           self.path, err)
+            return False
+        view = memoryview(mapped)
+        start = _HEADER.size
+        self._phones = view[start:start + 8 * count].cast("q")
+        start += 8 * count
+        self._offsets = view[start:start + 8 * (count + 1)].cast("Q")
+        start += 8 * (count + 1)
+        self._ids = view[start:start + 4 * count].cast("i")
+        start += 4 * count
+        self._names = view[start:start + names_length]
+        self._map = mapped
+        self._baseline = True
+        self.watermark = max(self.watermark, watermark)
+        ENTRIES.set(count, "snapshot")
+        logger.info("Mapped phone index snapshot with %s customers (watermark %s)", count, watermark)
+        return True
+
+    def lookup(self, phone: str) -> Optional[dict[str, Any]]:
+        """
+        Look up a customer without touching the database.
+
+        Args:
+            phone (str): Normalized phone number
+
+        Returns:
+            Optional[dict[str, Any]]: ``id``, ``name`` and ``phone`` of the
+            customer, or None if the index does not know the number
+        """
+        key = phone_key(phone)
+        if key is None:
+            return None
+        entry = self._overlay.get(key)
+        if entry is not None:
+            LOOKUPS.inc("hit")
+            return {"id": entry[0], "name": entry[1], "phone": phone}
+        position = bisect_left(self._phones, key)
+        if position < len(self._phones) and self._phones[position] == key:
+            LOOKUPS.inc("hit")
+            name = bytes(self._names[self._offsets[position]:self._offsets[position + 1]]).decode()
+            return {"id": self._ids[position], "name": name, "phone": phone}
+        LOOKUPS.inc("miss")
+        return None
+
+    def add(self, customer: dict[str, Any]) -> None:
+        """
+        Remember a customer found in or written to the database.
+
+        Args:
+            customer (dict[str, Any]): Record with ``id``, ``phone`` and ``name``
+        """
+        key = phone_key(customer.get("phone") or "")
+        if key is None:
+            return
+        if len(self._overlay) >= self.overlay_max and key not in self._overlay:
+            if not self._overlay_full:
+                self._overlay_full = True
+                logger.warning("Phone index overlay is full (%s customers); rebuild the snapshot", self.overlay_max)
+            return
+        self._overlay[key] = (customer["id"], customer["name"])
+        ENTRIES.set(len(self._overlay), "overlay")
+
+    async def refresh(self) -> int:
+        """
+        Pull customers registered since the last refresh into the overlay.
+
+        Returns:
+            int: Number of customers added
+        """
+        if not self._baseline:
+            # No snapshot: index only customers registered from now on
+            rows = await async_fetch_rows(MAX_CUSTOMER_ID_QUERY)
+            if rows:
+                self.watermark = max(self.watermark, rows[0]["max_id"])
+                self._baseline = True
+            return 0
+        if self._overlay_full:
+            # Nothing more fits; newer customers are looked up in MySQL
+            return 0
+        added = 0
+        while True:
+            rows = await async_fetch_rows(NEW_CUSTOMERS_QUERY, (self.watermark, PHONE_INDEX_BATCH))
+            for row in rows:
+                self.add(row)
+            if rows:
+                self.watermark = rows[-1]["id"]
+            added += len(rows)
+            if len(rows) < PHONE_INDEX_BATCH:
+                return added
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                added = await self.refresh()
+                if added:
+                    logger.debug("Phone index picked up %s new customers", added)
+            except Exception as err:
+                logger.warning("Phone index refresh failed: %s", err)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start polling for new customers on the running event loop."""
+        if self._refresher is None:
+            self._refresher = asyncio.ensure_future(self._refresh_forever())
+
+    async def aclose(self) -> None:
+        """Stop polling. The snapshot stays mapped for the life of the process."""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+def build_snapshot(path: Path = PHONE_INDEX_PATH, batch_size: int = PHONE_INDEX_BATCH) -> int:
+    """
+    Write a fresh snapshot of every customer with a normalized phone number.
+
+    The file is written beside ``path`` and renamed over it, so processes
+    that already mapped the old snapshot keep a consistent view.
+
+    Args:
+        path (Path, optional): Snapshot file to replace
+        batch_size (int, optional): Rows per keyset query
+
+    Returns:
+        int: Number of customers in the snapshot
+    """
+    started = time.perf_counter()
+    phones, offsets, ids, names = array("q"), array("Q", [0]), array("i"), bytearray()
+    # The scan runs one statement many times, so it is prepared once on the server
+    with prepared_session() as run:
+        # Customers registered while we scan get IDs above this and are caught up by refresh()
+        watermark = run(MAX_CUSTOMER_ID_QUERY)[0]["max_id"]
+        last_phone = ""
+        while True:
+            rows = run(SNAPSHOT_QUERY, (last_phone, batch_size))
+            for row in rows:
+                key = phone_key(row["phone"])
+                # Phones in another format cannot be looked up anyway
+                if key is None or (phones and key <= phones[-1]):
+                    continue
+                phones.append(key)
+                ids.append(row["id"])
+                names += row["name"].encode()
+                offsets.append(len(names))
+            if len(rows) < batch_size:
+                break
+            last_phone = rows[-1]["phone"]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as snapshot:
+        snapshot.write(_HEADER.pack(_MAGIC, len(phones), len(names), watermark))
+        phones.tofile(snapshot)
+        offsets.tofile(snapshot)
+        ids.tofile(snapshot)
+        snapshot.write(names)
+    os.replace(temporary, path)
+    logger.info("Built phone index snapshot of %s customers in %.1fs", len(phones), time.perf_counter() - started)
+    return len(phones)
+
+
+_phone_index: Optional[PhoneIndex] = None
+
+
+def get_phone_index() -> Optional[PhoneIndex]:
+    """
+    Get the process's phone index, mapping the snapshot on first use.
+
+    Returns:
+        Optional[PhoneIndex]: The index, or None when PHONE_INDEX_ENABLED is off
+    """
+    global _phone_index
+    if _phone_index is None and PHONE_INDEX_ENABLED:
+        _phone_index = PhoneIndex()
+        _phone_index.open()
+    return _phone_index
+
+
+async def close_phone_index() -> None:
+    """Stop the phone index refresher, if it was started."""
+    if _phone_index is not None:
+        await _phone_index.aclose()
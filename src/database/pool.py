@@ -0,0 +1,218 @@
+"""
+Connection pool management module.
+Sizes the async MySQL pool from configuration and worker concurrency,
+queues waiters with a timeout, health-checks connections before handing
+them out, recycles stale sockets and tracks pool usage metrics.
+"""
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+import aiomysql
+import pymysql
+
+# Async database configuration (mirrors connection.DB_CONFIG); replicas share
+# it apart from host and port
+ASYNC_DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "3306")),
+    "user": os.getenv("DB_USER", "sharad"),
+    "password": os.getenv("DB_PASSWORD", "password"),
+    "db": os.getenv("DB_NAME", "customer-support-db"),
+    "autocommit": True,
+}
+
+
+class PoolTimeoutError(pymysql.err.OperationalError):
+    """Raised when no connection became available within the acquire timeout."""
+
+
+@dataclass
+class PoolSettings:
+    """Tunables for a PoolManager."""
+    minsize: int = 1
+    maxsize: int = 5
+    acquire_timeout: float = 5.0
+    recycle_seconds: int = 1800
+    ping_after_idle: float = 30.0
+    health_check_retries: int = 2
+
+    @classmethod
+    def from_env(cls) -> 'PoolSettings':
+        """
+        Build settings from the environment.
+
+        DB_POOL_SIZE pins the pool size; otherwise it is derived from
+        WORKER_CONCURRENCY (rooms served by this process) times
+        DB_CONNECTIONS_PER_ROOM, clamped to [DB_POOL_MIN, DB_POOL_MAX].
+
+        Returns:
+            PoolSettings: Settings for the current process
+        """
+        minsize = int(os.getenv("DB_POOL_MIN", "1"))
+        upper = int(os.getenv("DB_POOL_MAX", "20"))
+        if os.getenv("DB_POOL_SIZE"):
+            maxsize = int(os.getenv("DB_POOL_SIZE"))
+        else:
+            concurrency = int(os.getenv("WORKER_CONCURRENCY", "1"))
+            per_room = int(os.getenv("DB_CONNECTIONS_PER_ROOM", "4"))
+            maxsize = min(upper, max(minsize, concurrency * per_room))
+        return cls(
+            minsize=min(minsize, maxsize),
+            maxsize=maxsize,
+            acquire_timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            recycle_seconds=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            ping_after_idle=float(os.getenv("DB_POOL_PING_AFTER_IDLE", "30")),
+        )
+
+
+@dataclass
+class PoolStats:
+    """Cumulative pool usage counters."""
+    acquisitions: int = 0
+    timeouts: int = 0
+    health_check_failures: int = 0
+    waiting: int = 0
+    in_use: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    checkout_seconds_total: float = 0.0
+    checkout_seconds_max: float = 0.0
+
+
+class PoolManager:
+    """Owns one aiomysql pool and hands out health-checked connections."""
+
+    def __init__(self, db_config: dict[str, Any], settings: Optional[PoolSettings] = None):
+        self.db_config = db_config
+        self.settings = settings or PoolSettings.from_env()
+        self.stats = PoolStats()
+        self._pool: Optional[aiomysql.Pool] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._last_used = weakref.WeakKeyDictionary()
+
+    async def start(self) -> aiomysql.Pool:
+        """
+        Create the underlying pool if it does not exist yet.
+
+        Returns:
+            aiomysql.Pool: The underlying pool
+        """
+        if self._pool is not None:
+            return self._pool
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._pool is None:
+                self._pool = await aiomysql.create_pool(
+                    minsize=self.settings.minsize,
+                    maxsize=self.settings.maxsize,
+                    pool_recycle=self.settings.recycle_seconds,
+                    **self.db_config,
+                )
+        return self._pool
+
+    async def close(self) -> None:
+        """Close the pool and wait for all connections to be released."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.close()
+            await pool.wait_closed()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiomysql.Connection]:
+        """
+        Check out a healthy connection, waiting up to the acquire timeout.
+
+        Yields:
+            aiomysql.Connection: A connection that answered a ping if it
+            had been idle longer than ``ping_after_idle``
+
+        Raises:
+            PoolTimeoutError: If the pool stayed exhausted for the whole timeout
+        """
+        pool = await self.start()
+        conn = await self._checkout(pool)
+        checked_out = time.monotonic()
+        self.stats.in_use += 1
+        try:
+            yield conn
+        finally:
+            self.stats.in_use -= 1
+            held = time.monotonic() - checked_out
+            self.stats.checkout_seconds_total += held
+            self.stats.checkout_seconds_max = max(self.stats.checkout_seconds_max, held)
+            self._last_used[conn] = time.monotonic()
+            pool.release(conn)
+
+    async def _checkout(self, pool: aiomysql.Pool) -> aiomysql.Connection:
+        started = time.monotonic()
+        deadline = started + self.settings.acquire_timeout
+        self.stats.waiting += 1
+        try:
+            for _ in range(self.settings.health_check_retries + 1):
+                remaining = deadline - time.monotonic()
+                try:
+                    conn = await asyncio.wait_for(pool.acquire(), timeout=max(remaining, 0))
+                except asyncio.TimeoutError:
+                    self.stats.timeouts += 1
+                    raise PoolTimeoutError(
+                        f"no database connection available within {self.settings.acquire_timeout}s "
+                        f"(pool size {pool.size}/{pool.maxsize})"
+                    ) from None
+                if await self._is_healthy(conn):
+                    break
+                self.stats.health_check_failures += 1
+                conn.close()
+                pool.release(conn)
+            else:
+                raise pymysql.err.OperationalError("database connections failed health checks")
+        finally:
+            self.stats.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.stats.acquisitions += 1
+        self.stats.wait_seconds_total += waited
+        self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+        return conn
+
+    async def _is_healthy(self, conn: aiomysql.Connection) -> bool:
+        last_used = self._last_used.get(conn)
+        # Connections we have not handed out before were just opened by the pool
+        if last_used is None or time.monotonic() - last_used < self.settings.ping_after_idle:
+            return True
+        try:
+            await conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Report current pool usage.
+
+        Returns:
+            dict[str, Any]: Counters plus size, free connections, averages and
+            saturation (share of maxsize currently checked out)
+        """
+        pool = self._pool
+        acquisitions = self.stats.acquisitions or 1
+        return {
+            "size": pool.size if pool else 0,
+            "free": pool.freesize if pool else 0,
+            "maxsize": self.settings.maxsize,
+            "in_use": self.stats.in_use,
+            "waiting": self.stats.waiting,
+            "acquisitions": self.stats.acquisitions,
+            "timeouts": self.stats.timeouts,
+            "health_check_failures": self.stats.health_check_failures,
+            "wait_seconds_avg": self.stats.wait_seconds_total / acquisitions,
+            "wait_seconds_max": self.stats.wait_seconds_max,
+            "checkout_seconds_avg": self.stats.checkout_seconds_total / acquisitions,
+            "checkout_seconds_max": self.stats.checkout_seconds_max,
+            "saturation": self.stats.in_use / self.settings.maxsize,
+        }
@@ -0,0 +1,239 @@
+"""
+Read replica routing module.
+Keeps a pool per read replica and picks one for each read: the healthy
+replica with the fewest queries outstanding whose replication lag is within
+bounds, or the primary when none qualifies. Entities written recently by
+this process are read from the primary for a short window, so a caller
+sees its own writes even while replicas catch up.
+"""
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Hashable, Iterable, Optional
+
+import aiomysql
+import pymysql
+
+from ..utils.log import get_logger
+from ..utils.metrics import REGISTRY
+from .pool import ASYNC_DB_CONFIG, PoolManager, PoolSettings, PoolTimeoutError
+
+logger = get_logger("db")
+
+# Comma-separated host[:port] list; empty means every read goes to the primary
+REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+# Replicas further behind than this many seconds are skipped
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "2"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+# How long reads of an entity stay on the primary after this process wrote it
+READ_YOUR_WRITES_WINDOW = float(os.getenv("DB_READ_YOUR_WRITES_WINDOW", "10"))
+
+REPLICA_STATUS_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),  # MySQL before 8.0.22, MariaDB
+)
+
+READS = REGISTRY.counter(
+    "db_reads_total", "Reads by the server that answered them", ("target",))
+REPLICA_LAG = REGISTRY.gauge(
+    "db_replica_lag_seconds", "Replication lag at the last check", ("replica",))
+
+
+class Replica:
+    """One read replica: its pool, outstanding reads and last known lag."""
+
+    def __init__(self, name: str, db_config: dict[str, Any], settings: Optional[PoolSettings] = None):
+        """
+        Args:
+            name (str): host:port, used in logs and metrics
+            db_config (dict[str, Any]): aiomysql connection arguments
+            settings (PoolSettings, optional): Pool tunables. Defaults to PoolSettings.from_env().
+        """
+        self.name = name
+        self.manager = PoolManager(db_config, settings)
+        self.outstanding = 0
+        self.lag: Optional[float] = None
+        # Unusable until the first lag check says otherwise
+        self.healthy = False
+
+    @property
+    def usable(self) -> bool:
+        return self.healthy and (self.lag is None or self.lag <= REPLICA_MAX_LAG)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiomysql.Connection]:
+        """Check out a connection, counting it as outstanding until released."""
+        self.outstanding += 1
+        try:
+            async with self.manager.acquire() as conn:
+                yield conn
+        finally:
+            self.outstanding -= 1
+
+    def mark_down(self, err: Exception) -> None:
+        """Stop routing reads here until the next successful lag check."""
+        if self.healthy:
+            logger.warning("Replica %s failed (%s); reading from the primary", self.name, err)
+        self.healthy = False
+
+    async def check(self) -> None:
+        """Measure replication lag and update health."""
+        try:
+            async with self.manager.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    lag = await _replication_lag(cursor)
+        except PoolTimeoutError:
+            return  # saturated by reads, which says nothing about its health
+        except pymysql.MySQLError as err:
+            self.mark_down(err)
+            return
+        if lag is False:
+            # Replication threads stopped: the data only gets staler
+            self.mark_down(RuntimeError("replication is not running"))
+            return
+        if not self.healthy:
+            logger.info("Replica %s is available (lag %s)", self.name, lag)
+        self.healthy = True
+        self.lag = lag
+        if lag is not None:
+            REPLICA_LAG.set(lag, self.name)
+
+
+async def _replication_lag(cursor: aiomysql.DictCursor) -> Any:
+    """Seconds behind the source, None if unknown, False if replication is stopped."""
+    for query, column in REPLICA_STATUS_QUERIES:
+        try:
+            await cursor.execute(query)
+        except pymysql.err.ProgrammingError:
+            continue  # statement not supported by this server version
+        except pymysql.err.OperationalError as err:
+            if err.args and err.args[0] in (1227, 1045):
+                # No REPLICATION CLIENT privilege; route on health alone
+                return None
+            raise
+        row = await cursor.fetchone()
+        if row is None:
+            return 0.0  # not configured as a replica, e.g. a cluster read endpoint
+        lag = row.get(column)
+        return False if lag is None else float(lag)
+    return None
+
+
+class ReadRouter:
+    """Chooses where each read runs."""
+
+    def __init__(self, replicas: Iterable[Replica] = ()):
+        self.replicas = list(replicas)
+        self._written: dict[Hashable, float] = {}
+        self._checked_at = 0.0
+        self._checking: Optional[asyncio.Task] = None
+
+    def mark_written(self, *keys: Hashable) -> None:
+        """
+        Read ``keys`` from the primary for the next READ_YOUR_WRITES_WINDOW seconds.
+
+        Args:
+            keys (Hashable): Entity keys such as ("ticket", 42)
+        """
+        if not self.replicas:
+            return
+        until = time.monotonic() + READ_YOUR_WRITES_WINDOW
+        for key in keys:
+            self._written[key] = until
+
+    def needs_primary(self, keys: Iterable[Hashable]) -> bool:
+        """Whether any of ``keys`` was written within the read-your-writes window."""
+        if not self._written:
+            return False
+        now = time.monotonic()
+        if len(self._written) > 1024:
+            self._written = {key: until for key, until in self._written.items() if until > now}
+        return any(self._written.get(key, 0.0) > now for key in keys)
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Pick the least busy usable replica.
+
+        Returns:
+            Optional[Replica]: The replica to read from, or None for the primary
+        """
+        if not self.replicas:
+            return None
+        self._schedule_check()
+        usable = [replica for replica in self.replicas if replica.usable]
+        if not usable:
+            return None
+        fewest = min(replica.outstanding for replica in usable)
+        return random.choice([replica for replica in usable if replica.outstanding == fewest])
+
+    def _schedule_check(self) -> None:
+        if self._checking is not None or time.monotonic() - self._checked_at < REPLICA_CHECK_INTERVAL:
+            return
+        self._checked_at = time.monotonic()
+        self._checking = asyncio.ensure_future(self.check())
+        self._checking.add_done_callback(lambda _: setattr(self, "_checking", None))
+
+    async def check(self) -> None:
+        """Check every replica's health and lag now."""
+        results = await asyncio.gather(*(replica.check() for replica in self.replicas), return_exceptions=True)
+        for replica, result in zip(self.replicas, results):
+            if isinstance(result, Exception):
+                replica.mark_down(result)
+        self._checked_at = time.monotonic()
+
+    async def close(self) -> None:
+        """Close every replica pool."""
+        if self._checking is not None:
+            self._checking.cancel()
+        await asyncio.gather(*(replica.manager.close() for replica in self.replicas))
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Report per-replica routing state.
+
+        Returns:
+            dict[str, dict[str, Any]]: Health, lag, outstanding reads and pool usage by replica
+        """
+        return {
+            replica.name: {
+                "healthy": replica.healthy,
+                "lag": replica.lag,
+                "outstanding": replica.outstanding,
+                "pool": replica.manager.snapshot(),
+            }
+            for replica in self.replicas
+        }
+
+
+def _replica_config(base: dict[str, Any], host: str) -> dict[str, Any]:
+    address, _, port = host.partition(":")
+    return dict(base, host=address, port=int(port) if port else base.get("port", 3306))
+
+
+_router: Optional[ReadRouter] = None
+
+
+def get_read_router() -> ReadRouter:
+    """
+    Get the process-wide read router, creating it on first use.
+
+    Replicas use the primary's connection arguments (ASYNC_DB_CONFIG) apart
+    from host and port, whichever caller gets here first.
+
+    Returns:
+        ReadRouter: Router over the replicas in DB_REPLICA_HOSTS
+    """
+    global _router
+    if _router is None:
+        _router = ReadRouter(
+            Replica(host, _replica_config(ASYNC_DB_CONFIG, host)) for host in REPLICA_HOSTS
+        )
+    return _router
+
+
+def mark_written(*keys: Hashable) -> None:
+    """Route reads of ``keys`` to the primary for a while; see ReadRouter.mark_written()."""
+    if _router is not None:
+        _router.mark_written(*keys)
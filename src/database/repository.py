@@ -0,0 +1,367 @@
+"""
+Read access for the tool layer.
+Async lookups used by UnifiedFunctions, served through the worker-wide
+read cache where the data is keyed by order, ticket or customer ID.
+Concurrent identical lookups share one query, and lookups of different
+keys made within a few milliseconds are batched into one query per table.
+Reads go to a read replica unless one of their keys was written recently.
+The hot lookups run registered statements and return compact Row objects,
+which read like dicts (``row["name"]``) but cost a tuple each.
+"""
+import base64
+from functools import lru_cache
+from datetime import datetime
+from typing import Any, AsyncIterator, Hashable, Iterable, Optional
+
+from ..utils.batching import BatchLoader
+from ..utils.metrics import phase
+from .async_connection import async_fetch_rows, async_stream_query
+from .cache import (
+    CUSTOMER_FLIGHTS,
+    CUSTOMER_ORDERS_CACHE,
+    CUSTOMER_ORDERS_FLIGHTS,
+    ORDER_CACHE,
+    ORDER_FLIGHTS,
+    TICKET_CACHE,
+    TICKET_FLIGHTS,
+    read_through,
+)
+from .replicas import get_read_router
+from .statements import Row, Statement, register
+
+CUSTOMERS_BY_PHONE = register("customers_by_phone", "SELECT * FROM Customers WHERE phone IN ({keys})")
+
+ORDERS_BY_ID = register("orders_by_id", "SELECT * FROM Orders WHERE id IN ({keys})")
+
+TICKET_DETAILS = register("ticket_details", """
+    SELECT t.*, c.email as customer_email, c.name as customer_name, sa.name as agent_name
+    FROM Tickets t
+    JOIN Customers c ON t.customer_id = c.id
+    LEFT JOIN SupportAgents sa ON t.assigned_agent_id = sa.id
+    WHERE t.id IN ({keys})
+""")
+
+# Newest first on the customer_id foreign key index; few customers have many open tickets
+OPEN_TICKETS = register("open_tickets", """
+    SELECT t.*, c.email as customer_email, c.name as customer_name, sa.name as agent_name
+    FROM Tickets t
+    JOIN Customers c ON t.customer_id = c.id
+    LEFT JOIN SupportAgents sa ON t.assigned_agent_id = sa.id
+    WHERE t.customer_id = %s AND t.status IN ('open', 'in_progress')
+    ORDER BY t.created_date DESC, t.id DESC
+    LIMIT %s
+""")
+
+# Per-key subqueries joined with UNION ALL keep each ORDER BY ... LIMIT on
+# its index instead of ranking every row of every key
+LATEST_COMMENT = register(
+    "latest_comment",
+    "(SELECT * FROM TicketComments WHERE ticket_id = %s ORDER BY created_at DESC, id DESC LIMIT 1)",
+    repeat=" UNION ALL ",
+)
+
+# Compact projection for order lists; order_details (JSON) only when asked for
+ORDER_SUMMARY_COLUMNS = (
+    "o.id, o.customer_id, o.restaurant_name, o.order_status, o.order_total,"
+    " o.payment_method, o.order_timestamp, o.delivery_timestamp"
+)
+
+RECENT_ORDERS = register("recent_orders", f"""(
+    SELECT {ORDER_SUMMARY_COLUMNS}
+    FROM Orders o
+    WHERE o.customer_id = %s
+    ORDER BY o.order_timestamp DESC, o.id DESC
+    LIMIT %s
+)""", repeat=" UNION ALL ")
+
+# Keyset pagination on (order_timestamp, id), newest first; the expanded
+# comparison stays on the (customer_id, order_timestamp) index
+ORDER_HISTORY_QUERY = """
+    SELECT {columns}
+    FROM Orders o
+    WHERE o.customer_id = %s {after}
+    ORDER BY o.order_timestamp DESC, o.id DESC
+    {limit}
+"""
+ORDER_HISTORY_AFTER = "AND (o.order_timestamp < %s OR (o.order_timestamp = %s AND o.id < %s))"
+
+
+def _replica_ok(kind: str, ids: Iterable[Hashable]) -> bool:
+    # Read-your-writes: entities this process just wrote are read from the primary
+    return not get_read_router().needs_primary((kind, entity_id) for entity_id in ids)
+
+
+async def _rows_by(statement: Statement, column: str, keys: list[Hashable], kind: str) -> dict[Hashable, Row]:
+    rows = await async_fetch_rows(statement.render(len(keys)), tuple(keys), replica=_replica_ok(kind, keys))
+    return {row[column]: row for row in rows}
+
+
+async def _load_customers(phones: list[str]) -> dict[str, Row]:
+    return await _rows_by(CUSTOMERS_BY_PHONE, "phone", phones, "phone")
+
+
+async def _load_orders(order_ids: list[int]) -> dict[int, Row]:
+    return await _rows_by(ORDERS_BY_ID, "id", order_ids, "order")
+
+
+async def _load_tickets(ticket_ids: list[int]) -> dict[int, Row]:
+    return await _rows_by(TICKET_DETAILS, "id", ticket_ids, "ticket")
+
+
+async def _load_latest_comments(ticket_ids: list[int]) -> dict[int, Row]:
+    return await _rows_by(LATEST_COMMENT, "ticket_id", ticket_ids, "ticket")
+
+
+async def _load_recent_orders(keys: list[tuple[int, int]]) -> dict[tuple[int, int], list[Row]]:
+    # One subquery per customer, at the largest limit any key in the batch asked for;
+    # smaller limits for the same customer are slices of it
+    limits: dict[int, int] = {}
+    for customer_id, limit in keys:
+        limits[customer_id] = max(limit, limits.get(customer_id, 0))
+    rows = await async_fetch_rows(
+        RECENT_ORDERS.render(len(limits)), tuple(value for item in limits.items() for value in item),
+        replica=_replica_ok("customer", limits),
+    )
+    by_customer: dict[int, list[Row]] = {}
+    for row in rows:
+        by_customer.setdefault(row["customer_id"], []).append(row)
+    # UNION ALL guarantees no order across or within subqueries, so sort here
+    for orders in by_customer.values():
+        orders.sort(key=lambda order: (order["order_timestamp"], order["id"]), reverse=True)
+    return {(customer_id, limit): by_customer.get(customer_id, [])[:limit] for customer_id, limit in keys}
+
+
+CUSTOMER_LOADER = BatchLoader("customers", _load_customers)
+ORDER_LOADER = BatchLoader("orders", _load_orders)
+TICKET_LOADER = BatchLoader("tickets", _load_tickets)
+LATEST_COMMENT_LOADER = BatchLoader("latest_comments", _load_latest_comments)
+RECENT_ORDERS_LOADER = BatchLoader("recent_orders", _load_recent_orders)
+
+
+async def get_customer_by_phone(phone: str) -> Optional[Row]:
+    """
+    Look up a customer by normalized phone number.
+
+    Args:
+        phone (str): Phone number in +91-XXXXXXXXXX format
+
+    Returns:
+        Optional[Row]: Customer record, or None if not found
+    """
+    # Not cached worker-wide (rooms cache verified customers), but coalesced
+    with phase("db"):
+        return await CUSTOMER_FLIGHTS.do(phone, lambda: CUSTOMER_LOADER.load(phone))
+
+
+async def get_order(order_id: int) -> Optional[Row]:
+    """
+    Look up an order by ID.
+
+    Args:
+        order_id (int): Order ID
+
+    Returns:
+        Optional[Row]: Order record, or None if not found
+    """
+    with phase("db"):
+        return await read_through(ORDER_CACHE, order_id, lambda: ORDER_LOADER.load(order_id), ORDER_FLIGHTS)
+
+
+async def get_ticket_details(ticket_id: int) -> Optional[Row]:
+    """
+    Look up a ticket with its customer and assigned agent names.
+
+    Args:
+        ticket_id (int): Ticket ID
+
+    Returns:
+        Optional[Row]: Ticket record with ``customer_email``,
+        ``customer_name`` and ``agent_name``, or None if not found
+    """
+    with phase("db"):
+        return await read_through(
+            TICKET_CACHE, ("ticket", ticket_id), lambda: TICKET_LOADER.load(ticket_id), TICKET_FLIGHTS
+        )
+
+
+async def get_latest_comment(ticket_id: int) -> Optional[Row]:
+    """
+    Look up the most recent comment on a ticket.
+
+    Args:
+        ticket_id (int): Ticket ID
+
+    Returns:
+        Optional[Row]: Comment record, or None if the ticket has none
+    """
+    with phase("db"):
+        return await read_through(
+            TICKET_CACHE,
+            ("latest_comment", ticket_id),
+            lambda: LATEST_COMMENT_LOADER.load(ticket_id),
+            TICKET_FLIGHTS,
+        )
+
+
+async def get_recent_orders(customer_id: int, limit: int) -> list[Row]:
+    """
+    List a customer's most recent orders, newest first, without ``order_details``.
+
+    Args:
+        customer_id (int): Customer ID
+        limit (int): Maximum number of orders
+
+    Returns:
+        list[Row]: Order records
+    """
+    with phase("db"):
+        orders = await read_through(
+            CUSTOMER_ORDERS_CACHE,
+            (customer_id, limit),
+            lambda: RECENT_ORDERS_LOADER.load((customer_id, limit)),
+            CUSTOMER_ORDERS_FLIGHTS,
+        )
+    return orders or []
+
+
+async def get_open_tickets(customer_id: int, limit: int) -> list[Row]:
+    """
+    List a customer's open and in-progress tickets, newest first.
+
+    Args:
+        customer_id (int): Customer ID
+        limit (int): Maximum number of tickets
+
+    Returns:
+        list[Row]: Ticket records shaped like get_ticket_details()
+
+    Raises:
+        pymysql.MySQLError: On database errors, so "no open tickets" is never a guess
+    """
+    return await async_fetch_rows(
+        OPEN_TICKETS.render(), (customer_id, limit),
+        replica=_replica_ok("customer_tickets", (customer_id,)), strict=True,
+    )
+
+
+def encode_order_cursor(order: Row) -> str:
+    """
+    Build an opaque continuation token pointing just past ``order``.
+
+    Args:
+        order (Row): Last order of a page
+
+    Returns:
+        str: URL-safe token for the next page
+    """
+    raw = f"{order['order_timestamp'].isoformat()}|{order['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_order_cursor(token: str) -> tuple[datetime, int]:
+    """
+    Parse a continuation token from encode_order_cursor().
+
+    Args:
+        token (str): Continuation token
+
+    Returns:
+        tuple[datetime, int]: ``order_timestamp`` and ``id`` of the last order seen
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        timestamp, order_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(order_id)
+    except (ValueError, UnicodeDecodeError) as err:
+        raise ValueError(f"invalid order cursor {token!r}") from err
+
+
+@lru_cache(maxsize=None)
+def _order_history_statement(has_after: bool, include_details: bool, limited: bool) -> Statement:
+    return register(
+        f"order_history:{int(has_after)}{int(include_details)}{int(limited)}",
+        ORDER_HISTORY_QUERY.format(
+            columns=ORDER_SUMMARY_COLUMNS + (", o.order_details" if include_details else ""),
+            after=ORDER_HISTORY_AFTER if has_after else "",
+            limit="LIMIT %s" if limited else "",
+        ),
+    )
+
+
+def _order_history_query(customer_id: int, after: Optional[str], include_details: bool,
+                         limit: Optional[int]) -> tuple[str, tuple]:
+    params: list[Any] = [customer_id]
+    if after:
+        timestamp, order_id = decode_order_cursor(after)
+        params += [timestamp, timestamp, order_id]
+    if limit is not None:
+        params.append(limit)
+    statement = _order_history_statement(bool(after), include_details, limit is not None)
+    return statement.render(), tuple(params)
+
+
+async def get_order_history_page(
+    customer_id: int,
+    page_size: int,
+    after: Optional[str] = None,
+    include_details: bool = False,
+) -> tuple[list[Row], Optional[str]]:
+    """
+    Get one page of a customer's orders, newest first.
+
+    The first page of compact rows is served by get_recent_orders() (cached
+    and batched); later pages seek directly past the cursor, so every page
+    costs the same however deep it is.
+
+    Args:
+        customer_id (int): Customer ID
+        page_size (int): Orders per page
+        after (str, optional): Continuation token from the previous page
+        include_details (bool, optional): Also return ``order_details``
+
+    Returns:
+        tuple[list[Row], Optional[str]]: The page and the token
+        for the next one (None on the last page)
+
+    Raises:
+        ValueError: If ``after`` is not a valid continuation token
+    """
+    # One extra row tells us whether another page exists
+    if after is None and not include_details:
+        orders = await get_recent_orders(customer_id, page_size + 1)
+    else:
+        query, params = _order_history_query(customer_id, after, include_details, page_size + 1)
+        orders = await async_fetch_rows(query, params, replica=_replica_ok("customer", (customer_id,)))
+    if len(orders) <= page_size:
+        return orders, None
+    page = orders[:page_size]
+    return page, encode_order_cursor(page[-1])
+
+
+async def iter_order_history(
+    customer_id: int,
+    after: Optional[str] = None,
+    include_details: bool = False,
+    limit: Optional[int] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Stream a customer's orders, newest first, from a server-side cursor.
+
+    Rows are yielded as they arrive rather than buffered, for callers that
+    walk long histories (exports, summaries).
+
+    Args:
+        customer_id (int): Customer ID
+        after (str, optional): Start after this continuation token
+        include_details (bool, optional): Also return ``order_details``
+        limit (int, optional): Stop after this many orders
+
+    Yields:
+        dict[str, Any]: Order records
+    """
+    query, params = _order_history_query(customer_id, after, include_details, limit)
+    async for order in async_stream_query(query, params, replica=_replica_ok("customer", (customer_id,))):
+        yield order
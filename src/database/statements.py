@@ -0,0 +1,182 @@
+"""
+Statement registry module.
+Names the fixed SQL the hot read paths run, renders each variant once
+instead of per call, and decodes result rows into compact tuple-backed
+Row objects rather than one dict per row.
+
+aiomysql only speaks MySQL's text protocol, so the async paths send the
+cached SQL text; the sync path (mysql-connector) can additionally keep
+server-side prepared statements for the life of a connection checkout,
+see prepared_session().
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+import mysql.connector
+
+from ..utils.metrics import track_query
+from .connection import get_db_connection
+
+
+class Row(tuple):
+    """
+    A result row: a plain tuple that also reads like the dict rows it replaces.
+
+    ``row["column"]``, ``row.get()``, ``keys()`` and ``items()`` work as on
+    a dict; iterating yields the values, as on a tuple. Rows are immutable.
+    Subclasses made by row_type() set ``_fields`` and ``_index``.
+    """
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+    _index: dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._index.get(key)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def keys(self) -> tuple[str, ...]:
+        return self._fields
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        return zip(self._fields, tuple.__iter__(self))
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"Row({', '.join(f'{name}={value!r}' for name, value in self.items())})"
+
+
+@lru_cache(maxsize=256)
+def row_type(fields: tuple[str, ...]) -> type[Row]:
+    """
+    Get the Row subclass for a result shape, creating it once per shape.
+
+    Args:
+        fields (tuple[str, ...]): Column names in result order
+
+    Returns:
+        type[Row]: Row class reading those columns by name
+    """
+    return type("Row", (Row,), {
+        "__slots__": (),
+        "_fields": fields,
+        "_index": {name: position for position, name in enumerate(fields)},
+    })
+
+
+def decode_rows(description: Optional[Sequence[Sequence[Any]]], rows: Iterable[tuple]) -> list[Row]:
+    """
+    Wrap raw result tuples from a cursor in Row objects.
+
+    Args:
+        description: The cursor's ``description`` (column name first)
+        rows (Iterable[tuple]): Raw result tuples
+
+    Returns:
+        list[Row]: One Row per result tuple
+    """
+    if not description:
+        return []
+    cls = row_type(tuple(column[0] for column in description))
+    return [cls(row) for row in rows]
+
+
+@dataclass(frozen=True)
+class Statement:
+    """A named SQL statement, optionally with a ``{keys}`` list expanded per key count."""
+    name: str
+    sql: str
+    # Separator for statements made of one copy of ``sql`` per key, e.g. " UNION ALL "
+    repeat: Optional[str] = None
+    _rendered: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def render(self, count: int = 1) -> str:
+        """
+        Get the SQL for ``count`` keys, rendering it on first use.
+
+        Args:
+            count (int, optional): Number of keys bound into the statement
+
+        Returns:
+            str: SQL text
+        """
+        sql = self._rendered.get(count)
+        if sql is None:
+            if self.repeat is not None:
+                sql = self.repeat.join([self.sql] * count)
+            elif "{keys}" in self.sql:
+                sql = self.sql.format(keys=", ".join(["%s"] * count))
+            else:
+                sql = self.sql
+            self._rendered[count] = sql
+        return sql
+
+
+STATEMENTS: dict[str, Statement] = {}
+
+
+def register(name: str, sql: str, repeat: Optional[str] = None) -> Statement:
+    """
+    Add a statement to the registry.
+
+    Args:
+        name (str): Unique name, e.g. "customers_by_phone"
+        sql (str): SQL text; may contain ``{keys}`` for a placeholder list
+        repeat (str, optional): Join ``count`` copies of ``sql`` with this
+            separator instead, e.g. " UNION ALL "
+
+    Returns:
+        Statement: The registered statement
+
+    Raises:
+        ValueError: If ``name`` is already registered with different SQL
+    """
+    statement = Statement(name, sql, repeat)
+    existing = STATEMENTS.get(name)
+    if existing is not None and (existing.sql, existing.repeat) != (sql, repeat):
+        raise ValueError(f"statement {name!r} is already registered with different SQL")
+    return STATEMENTS.setdefault(name, statement)
+
+
+@contextmanager
+def prepared_session() -> Iterator[Any]:
+    """
+    Hold one pooled connection and run statements on it as server-side prepared statements.
+
+    Each distinct SQL text is prepared once for the session and re-executed
+    by statement ID afterwards, which suits loops that run the same
+    statement many times (keyset scans, batch jobs). Prepared statements
+    are released when the connection goes back to the pool, since the pool
+    resets sessions.
+
+    Yields:
+        Callable[[str, tuple], list[Row]]: ``run(sql, params)`` returning Row objects
+    """
+    conn = get_db_connection()
+    cursors: dict[str, Any] = {}
+
+    def run(sql: str, params: tuple = ()) -> list[Row]:
+        cursor = cursors.get(sql)
+        if cursor is None:
+            cursor = cursors[sql] = conn.cursor(prepared=True)
+        with track_query(sql):
+            cursor.execute(sql, params)
+            return decode_rows(cursor.description, cursor.fetchall())
+
+    try:
+        yield run
+    finally:
+        for cursor in cursors.values():
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                pass
+        conn.close()
@@ -0,0 +1,141 @@
+"""
+Ticket creation service.
+Creates a ticket and assigns the least-loaded available agent on a single
+connection inside one transaction, so concurrent callers neither read back
+each other's tickets nor grab the same agent.
+"""
+from typing import Any, Optional
+
+from ..utils.metrics import track_query
+from ..utils.phone_utils import normalize_phone_number
+from .async_connection import async_transaction
+from .replicas import mark_written
+
+# Locks every available agent row until commit (in id order, so creators
+# never deadlock on each other); concurrent creators queue here.
+LOCK_AVAILABLE_AGENTS_QUERY = "SELECT id FROM SupportAgents WHERE available = TRUE ORDER BY id FOR UPDATE"
+
+# A locking read sees the latest committed tickets rather than the transaction's
+# snapshot, which the customer lookup may have fixed before we got the agent
+# locks; so a creator that waited counts the ticket the previous one assigned.
+LEAST_LOADED_AGENT_QUERY = """
+    SELECT sa.id, sa.name, COUNT(t.id) AS open_tickets
+    FROM SupportAgents sa
+    LEFT JOIN Tickets t
+        ON t.assigned_agent_id = sa.id AND t.status IN ('open', 'in_progress')
+    WHERE sa.available = TRUE
+    GROUP BY sa.id, sa.name
+    ORDER BY open_tickets, sa.id
+    LIMIT 1
+    FOR SHARE
+"""
+
+INSERT_TICKET_QUERY = """
+    INSERT INTO Tickets (customer_id, order_id, subject, description, status, assigned_agent_id)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+CUSTOMER_BY_EMAIL_QUERY = "SELECT * FROM Customers WHERE email = %s LIMIT 1"
+
+INSERT_CUSTOMER_QUERY = "INSERT INTO Customers (name, email, phone, address) VALUES (%s, %s, %s, %s)"
+
+
+async def _assign_and_insert(
+    cursor,
+    customer_id: int,
+    subject: str,
+    description: str,
+    order_id: Optional[int],
+) -> dict[str, Any]:
+    with track_query(LOCK_AVAILABLE_AGENTS_QUERY):
+        await cursor.execute(LOCK_AVAILABLE_AGENTS_QUERY)
+        await cursor.fetchall()
+    with track_query(LEAST_LOADED_AGENT_QUERY):
+        await cursor.execute(LEAST_LOADED_AGENT_QUERY)
+        agent = await cursor.fetchone()
+    agent_id = agent["id"] if agent else None
+    with track_query(INSERT_TICKET_QUERY):
+        await cursor.execute(
+            INSERT_TICKET_QUERY,
+            (customer_id, order_id, subject, description, "open", agent_id),
+        )
+    return {
+        "id": cursor.lastrowid,
+        "customer_id": customer_id,
+        "order_id": order_id,
+        "subject": subject,
+        "description": description,
+        "status": "open",
+        "assigned_agent_id": agent_id,
+        "agent_name": agent["name"] if agent else None,
+    }
+
+
+async def create_ticket(
+    customer_id: int,
+    subject: str,
+    description: str,
+    order_id: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Create a ticket for a known customer and assign an agent atomically.
+
+    Args:
+        customer_id (int): ID of the customer raising the ticket
+        subject (str): Ticket subject
+        description (str): Ticket description
+        order_id (int, optional): Related order ID. Defaults to None.
+
+    Returns:
+        dict[str, Any]: The new ticket, including ``agent_name`` (None if no
+        agent was available)
+    """
+    async with async_transaction() as cursor:
+        ticket = await _assign_and_insert(cursor, customer_id, subject, description, order_id)
+    # Callers typically read the new ticket back right away
+    mark_written(("ticket", ticket["id"]), ("customer_tickets", ticket["customer_id"]))
+    return ticket
+
+
+async def create_ticket_for_email(
+    email: str,
+    subject: str,
+    description: str,
+    phone: str = "",
+    address: str = "",
+    order_id: Optional[int] = None,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Find or create the customer by email, then create and assign a ticket,
+    all in one transaction.
+
+    Args:
+        email (str): Customer email address
+        subject (str): Ticket subject
+        description (str): Ticket description
+        phone (str, optional): Phone used if the customer must be created; it
+            is stored normalized, and left out if it is not a valid number
+        address (str, optional): Address used if the customer must be created
+        order_id (int, optional): Related order ID. Defaults to None.
+
+    Returns:
+        tuple[dict[str, Any], dict[str, Any]]: The customer and the new ticket
+    """
+    # Stored as the phone lookups search for it; NULL rather than a second
+    # blank under the unique phone index when invalid
+    phone = (normalize_phone_number(phone) if phone else "") or None
+    async with async_transaction() as cursor:
+        with track_query(CUSTOMER_BY_EMAIL_QUERY):
+            await cursor.execute(CUSTOMER_BY_EMAIL_QUERY, (email,))
+            customer = await cursor.fetchone()
+        if customer is None:
+            name = email.split('@')[0]
+            with track_query(INSERT_CUSTOMER_QUERY):
+                await cursor.execute(INSERT_CUSTOMER_QUERY, (name, email, phone, address))
+            customer = {"id": cursor.lastrowid, "name": name, "email": email, "phone": phone}
+        ticket = await _assign_and_insert(cursor, customer["id"], subject, description, order_id)
+    mark_written(("ticket", ticket["id"]), ("customer_tickets", ticket["customer_id"]))
+    if phone:
+        # A customer created here must be found by phone on the next lookup
+        mark_written(("phone", phone))
+    return customer, ticket
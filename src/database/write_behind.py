@@ -0,0 +1,479 @@
+"""
+Write-behind module.
+Takes ticket comment and audit-trail inserts off the conversational path.
+Each write is appended to a local spool file, queued in memory and flushed
+by a background task as multi-row INSERTs once enough writes are waiting or
+the flush interval passes. Writes still in the spool when a process dies
+are replayed by the next process that starts, so delivery is at least once;
+every write carries a client-generated ``write_id`` with a unique index, so
+a replayed write that had already committed does not add a second row.
+The spool is rewritten with only the pending writes once enough acked
+entries pile up, so it stays small under steady traffic. Spool file I/O
+(including fsync and compaction) runs on one dedicated thread, in order,
+so it never blocks the event loop.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO
+
+import pymysql
+
+from ..utils.log import get_logger, log_query
+from ..utils.metrics import REGISTRY, track_query
+from .async_connection import async_transaction
+from .cache import invalidate_ticket
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; spools of dead processes are then not adopted
+    fcntl = None
+
+logger = get_logger("write_behind")
+
+# Statement per kind of write; spooled params must be JSON-serializable. The
+# last placeholder is the write's write_id: a replay of a committed write hits
+# the unique index and changes nothing. (Unlike INSERT IGNORE, this still
+# raises for rows the database rejects, e.g. a comment on a missing ticket.)
+WRITE_STATEMENTS = {
+    "ticket_comment": (
+        "INSERT INTO TicketComments (ticket_id, comment, author, created_at, write_id)"
+        " VALUES (%s, %s, %s, %s, %s)"
+        " ON DUPLICATE KEY UPDATE write_id = write_id"
+    ),
+    "audit_event": (
+        "INSERT INTO AuditEvents (event_type, entity_type, entity_id, room, payload, created_at, write_id)"
+        " VALUES (%s, %s, %s, %s, %s, %s, %s)"
+        " ON DUPLICATE KEY UPDATE write_id = write_id"
+    ),
+}
+
+# Run after a kind's rows are committed, with each row's params (write_id last)
+AFTER_WRITE: dict[str, Callable[[list], None]] = {
+    "ticket_comment": lambda params: invalidate_ticket(params[0]),
+}
+
+FLUSH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "50")) / 1000
+QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+# How long submit() waits for queue space before leaving the write in the spool only
+ENQUEUE_TIMEOUT = float(os.getenv("WRITE_BEHIND_ENQUEUE_TIMEOUT", "0.2"))
+RETRIES = int(os.getenv("WRITE_BEHIND_RETRIES", "5"))
+# Seconds between retries of writes that exhausted their retries or overflowed the queue
+ORPHAN_RETRY_INTERVAL = float(os.getenv("WRITE_BEHIND_ORPHAN_RETRY", "5"))
+SPOOL_DIR = Path(os.getenv("WRITE_BEHIND_SPOOL_DIR", "spool"))
+# fsync each spooled write; without it the spool survives process crashes but not power loss
+SPOOL_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() == "true"
+# Rewrite the spool with only pending writes once this many acked writes are in it
+SPOOL_COMPACT_AFTER = int(os.getenv("WRITE_BEHIND_COMPACT_AFTER", "1000"))
+
+# Errors worth retrying; anything else means the row itself is bad
+TRANSIENT_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+WRITES = REGISTRY.counter(
+    "write_behind_rows_total", "Rows handled by the write-behind writer", ("kind", "outcome"))
+QUEUE_DEPTH = REGISTRY.gauge(
+    "write_behind_queue_depth", "Writes waiting in the write-behind queue")
+
+# Spool sequence number, kind, statement params, write_id
+Record = tuple[int, str, list, str]
+
+_STOP = object()
+
+
+def db_timestamp(moment: Optional[datetime] = None) -> str:
+    """
+    Format a time for a DATETIME column, so queued rows keep their submit time.
+
+    Args:
+        moment (datetime, optional): Time to format. Defaults to now.
+
+    Returns:
+        str: ``YYYY-MM-DD HH:MM:SS``
+    """
+    return (moment or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class WriteBehind:
+    """Spools, queues and batch-writes inserts for one worker process."""
+
+    def __init__(
+        self,
+        spool_dir: Path = SPOOL_DIR,
+        flush_size: int = FLUSH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        queue_size: int = QUEUE_SIZE,
+        retries: int = RETRIES,
+        compact_after: int = SPOOL_COMPACT_AFTER,
+    ):
+        """
+        Args:
+            spool_dir (Path, optional): Directory holding the spool files
+            flush_size (int, optional): Flush once this many writes are waiting
+            flush_interval (float, optional): Flush at most this many seconds after the first waiting write
+            queue_size (int, optional): In-memory queue bound
+            retries (int, optional): Attempts for a batch that hits transient errors
+            compact_after (int, optional): Acked writes the spool may hold before it is rewritten
+        """
+        self.spool_dir = Path(spool_dir)
+        self.spool_path = self.spool_dir / f"write_behind-{os.getpid()}.jsonl"
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.queue_size = queue_size
+        self.compact_after = compact_after
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._spool: Optional[TextIO] = None
+        # Runs every spool write after start(); one thread keeps them in order
+        self._io: Optional[ThreadPoolExecutor] = None
+        self._next_seq = 0
+        # Spooled but not yet committed, by sequence number
+        self._unacked: dict[int, Record] = {}
+        # Unacked writes the writer does not hold: they overflowed the queue
+        # or exhausted their retries, and are retried from _unacked
+        self._orphans: set[int] = set()
+        # Acked writes still taking up room in the spool file
+        self._acked_in_spool = 0
+        self._recovered: list[Record] = []
+        self._retry_orphans_at = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Writes accepted but not yet committed."""
+        return len(self._unacked)
+
+    def start(self) -> None:
+        """Open the spool, adopt spools left by dead processes and start the writer."""
+        if self._writer is not None:
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.spool_dir.glob("write_behind-*.jsonl")):
+            if path != self.spool_path:
+                self._adopt(path)
+        if self.spool_path.exists():
+            # Left by an earlier process that had our PID
+            with open(self.spool_path) as spool:
+                self._recovered += _unacked_records(spool)
+        self._spool = open(self.spool_path, "w")
+        if fcntl is not None:
+            # Held for our lifetime; tells other processes this spool is live
+            fcntl.flock(self._spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        recovered, self._recovered = self._recovered, []
+        for _, kind, params, write_id in recovered:
+            record = self._new_record(kind, params, write_id)
+            self._write_spool(_spool_entry(record))
+            self._recovered.append(record)
+        if self._recovered:
+            logger.info("Replaying %s spooled writes", len(self._recovered))
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-behind-spool")
+        self._queue = asyncio.Queue(self.queue_size)
+        self._writer = asyncio.ensure_future(self._run())
+
+    def _adopt(self, path: Path) -> None:
+        if fcntl is None:
+            return
+        with open(path) as spool:
+            try:
+                fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # owner is alive
+            self._recovered += _unacked_records(spool)
+            path.unlink()
+
+    def _new_record(self, kind: str, params: list, write_id: Optional[str] = None) -> Record:
+        self._next_seq += 1
+        record = (self._next_seq, kind, params, write_id or uuid.uuid4().hex)
+        self._unacked[record[0]] = record
+        return record
+
+    async def _spool_io(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._io, func, *args)
+
+    async def _append(self, kind: str, params: list, write_id: Optional[str] = None) -> Record:
+        record = self._new_record(kind, params, write_id)
+        try:
+            await self._spool_io(self._write_spool, _spool_entry(record))
+        except asyncio.CancelledError:
+            # The write still lands in the spool; let the writer pick it up
+            self._orphans.add(record[0])
+            raise
+        return record
+
+    def _write_spool(self, entry: dict[str, Any]) -> None:
+        self._spool.write(json.dumps(entry, default=str) + "\n")
+        self._spool.flush()
+        if SPOOL_FSYNC:
+            os.fsync(self._spool.fileno())
+
+    def _truncate_spool(self) -> None:
+        self._spool.seek(0)
+        self._spool.truncate()
+
+    def _rewrite_spool(self, entries: list[dict[str, Any]]) -> None:
+        """Replace the spool with one holding only ``entries``."""
+        temporary = self.spool_path.with_name(self.spool_path.name + ".tmp")
+        spool = open(temporary, "w")
+        if fcntl is not None:
+            # Locked before it takes the spool's name, so it is never adoptable
+            fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        for entry in entries:
+            spool.write(json.dumps(entry, default=str) + "\n")
+        spool.flush()
+        if SPOOL_FSYNC:
+            os.fsync(spool.fileno())
+        os.replace(temporary, self.spool_path)
+        self._spool.close()
+        self._spool = spool
+
+    async def _compact(self) -> None:
+        # Writes spooled after this snapshot are queued behind the rewrite, so they land in the new file
+        entries = [_spool_entry(record) for record in self._unacked.values()]
+        await self._spool_io(self._rewrite_spool, entries)
+        self._acked_in_spool = 0
+
+    async def submit(self, kind: str, params: tuple) -> None:
+        """
+        Accept a write; it is durable in the spool when this returns.
+
+        Args:
+            kind (str): Key of WRITE_STATEMENTS
+            params (tuple): Statement parameters
+
+        Raises:
+            KeyError: If ``kind`` is unknown
+        """
+        if kind not in WRITE_STATEMENTS:
+            raise KeyError(f"unknown write kind {kind!r}")
+        self.start()
+        record = await self._append(kind, list(params))
+        try:
+            await asyncio.wait_for(self._queue.put(record), ENQUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Stays in the spool; the writer picks it up once it catches up
+            logger.warning("Write-behind queue full; %s write left in the spool", kind)
+            self._orphans.add(record[0])
+        QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if batch:
+                await self._flush(batch)
+            if self._orphans and (stopping or time.monotonic() >= self._retry_orphans_at):
+                await self._flush_orphans()
+            if not self._unacked:
+                await self._spool_io(self._truncate_spool)
+                self._acked_in_spool = 0
+            elif self._acked_in_spool >= self.compact_after:
+                await self._compact()
+            QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _collect(self) -> tuple[list[Record], bool]:
+        if self._recovered:
+            batch, self._recovered = self._recovered[:self.flush_size], self._recovered[self.flush_size:]
+            return batch, False
+        try:
+            # Wake up periodically while orphans wait for a retry
+            first = await asyncio.wait_for(
+                self._queue.get(), ORPHAN_RETRY_INTERVAL if self._orphans else None)
+        except asyncio.TimeoutError:
+            return [], False
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            try:
+                record = self._queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(
+                    self._queue.get(), remaining)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if record is _STOP:
+                # Flush what we have, then drain whatever is still queued
+                return batch + self._drain(), True
+            batch.append(record)
+        return batch, False
+
+    def _drain(self) -> list[Record]:
+        records = []
+        while not self._queue.empty():
+            record = self._queue.get_nowait()
+            if record is not _STOP:
+                records.append(record)
+        return records
+
+    async def _flush_orphans(self) -> None:
+        orphans = [self._unacked[seq] for seq in sorted(self._orphans) if seq in self._unacked]
+        for start in range(0, len(orphans), self.flush_size):
+            await self._flush(orphans[start:start + self.flush_size])
+
+    async def _flush(self, batch: list[Record]) -> None:
+        for attempt in range(self.retries):
+            try:
+                await self._insert(batch)
+                await self._ack(batch)
+                return
+            except TRANSIENT_ERRORS as err:
+                delay = random.uniform(0, min(0.1 * 2 ** attempt, 5))
+                logger.warning("Write-behind batch of %s failed (%s); retrying in %.2fs", len(batch), err, delay)
+                await asyncio.sleep(delay)
+            except pymysql.MySQLError:
+                # A bad row fails the whole multi-row INSERT; isolate it
+                await self._ack(await self._insert_one_by_one(batch))
+                batch = [record for record in batch if record[0] in self._unacked]
+                if not batch:
+                    return
+            except Exception:
+                logger.exception("Write-behind batch of %s failed unexpectedly", len(batch))
+                break
+        logger.error("Write-behind batch of %s still failing; kept in the spool for a later retry", len(batch))
+        self._orphans.update(record[0] for record in batch)
+        self._retry_orphans_at = time.monotonic() + ORPHAN_RETRY_INTERVAL
+
+    async def _insert(self, batch: list[Record]) -> None:
+        by_kind: dict[str, list[list]] = {}
+        for _, kind, params, write_id in batch:
+            by_kind.setdefault(kind, []).append(params + [write_id])
+        async with async_transaction() as cursor:
+            for kind, rows in by_kind.items():
+                statement = WRITE_STATEMENTS[kind]
+                started = time.perf_counter()
+                with track_query(statement):
+                    # pymysql rewrites this into one multi-row INSERT
+                    await cursor.executemany(statement, rows)
+                log_query(logger, statement, (time.perf_counter() - started) * 1000, rows=len(rows))
+        for kind, rows in by_kind.items():
+            WRITES.inc(kind, "written", amount=len(rows))
+            hook = AFTER_WRITE.get(kind)
+            if hook:
+                for params in rows:
+                    hook(params)
+
+    async def _insert_one_by_one(self, batch: list[Record]) -> list[Record]:
+        """Insert rows separately; returns the ones written or rejected for good."""
+        done = []
+        for record in batch:
+            try:
+                await self._insert([record])
+            except TRANSIENT_ERRORS:
+                break
+            except pymysql.MySQLError as err:
+                WRITES.inc(record[1], "dropped")
+                logger.error("Dropping %s write that the database rejected: %s", record[1], err)
+            done.append(record)
+        return done
+
+    async def _ack(self, batch: list[Record]) -> None:
+        seqs = [record[0] for record in batch]
+        if not seqs:
+            return
+        await self._spool_io(self._write_spool, {"ack": seqs})
+        for seq in seqs:
+            self._unacked.pop(seq, None)
+        self._orphans.difference_update(seqs)
+        self._acked_in_spool += len(seqs)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """
+        Flush queued writes and stop the writer.
+
+        Writes that cannot be flushed within ``timeout`` stay in the spool
+        and are replayed by the next process.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the flush
+        """
+        if self._writer is None:
+            return
+
+        async def stop() -> None:
+            await self._queue.put(_STOP)
+            await self._writer
+
+        try:
+            await asyncio.wait_for(stop(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Write-behind flush timed out; %s writes left in the spool", self.pending)
+        self._writer = None
+        await self._spool_io(self._spool.close)
+        self._io.shutdown(wait=False)
+        self._io = None
+        if not self._unacked:
+            self.spool_path.unlink(missing_ok=True)
+
+
+def _spool_entry(record: Record) -> dict[str, Any]:
+    seq, kind, params, write_id = record
+    return {"seq": seq, "kind": kind, "params": params, "write_id": write_id}
+
+
+def _unacked_records(spool: TextIO) -> list[Record]:
+    records: dict[int, Record] = {}
+    for line in spool:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue  # torn final line from a crash
+        if "ack" in entry:
+            for seq in entry["ack"]:
+                records.pop(seq, None)
+        else:
+            # Spools written before write IDs existed get a fresh one
+            records[entry["seq"]] = (entry["seq"], entry["kind"], entry["params"],
+                                     entry.get("write_id") or uuid.uuid4().hex)
+    return list(records.values())
+
+
+_write_behind: Optional[WriteBehind] = None
+
+
+def get_write_behind() -> WriteBehind:
+    """
+    Get the worker process's write-behind queue, creating it on first use.
+
+    Returns:
+        WriteBehind: The shared queue
+    """
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = WriteBehind()
+    return _write_behind
+
+
+async def close_write_behind() -> None:
+    """Flush and stop the shared write-behind queue, if it was started."""
+    if _write_behind is not None:
+        await _write_behind.close()
+
+
+async def record_audit_event(
+    event_type: str,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    room: Optional[str] = None,
+    payload: Optional[dict[str, Any]] = None,
+) -> None:
+    """
+    Queue an audit-trail event.
+
+    Args:
+        event_type (str): What happened, e.g. "ticket_comment_added"
+        entity_type (str, optional): Kind of entity affected, e.g. "ticket"
+        entity_id (int, optional): ID of the affected entity
+        room (str, optional): Room the event happened in
+        payload (dict[str, Any], optional): Extra details, stored as JSON
+    """
+    await get_write_behind().submit("audit_event", (
+        event_type, entity_type, entity_id, room,
+        json.dumps(payload, default=str) if payload is not None else None,
+        db_timestamp(),
+    ))
@@ -0,0 +1,153 @@
+"""
+Speculative prefetch module.
+Conversations follow the flow in the model instructions: verify the phone
+number, then ask about orders or tickets. As soon as a customer is
+verified, the Prefetcher loads their recent orders, open tickets and the
+latest comment on each in the background and keeps them for the rest of
+the conversation, so the follow-up tools usually answer from memory.
+
+Lookups the prefetch did not cover, or that arrive before it finished,
+go to the repository as usual. As with the worker-wide read cache, empty
+results are not kept: the shared lookups report database errors as "no
+rows", and a blip must not turn into "no recent orders" for PREFETCH_TTL.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from ..database import repository
+from ..database.compose import gather_queries
+from ..database.statements import Row
+from ..utils.cache import TTLCache
+from ..utils.log import get_logger
+from ..utils.metrics import REGISTRY, run_shared
+
+logger = get_logger("tools")
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+# Bounds staleness for changes made outside this room, e.g. an order being delivered
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "30"))
+# Open tickets loaded per customer, each with its latest comment
+PREFETCH_OPEN_TICKETS = int(os.getenv("PREFETCH_OPEN_TICKETS", "3"))
+
+LOOKUPS = REGISTRY.counter(
+    "prefetch_lookups_total", "Tool lookups by whether the prefetch had the answer", ("kind", "result"))
+
+_MISSING = object()
+
+
+class Prefetcher:
+    """
+    One room's prefetched customer context.
+
+    Not thread-safe; intended to be used from a single event loop.
+    """
+
+    def __init__(self, order_limit: int, ttl: float = PREFETCH_TTL):
+        """
+        Args:
+            order_limit (int): Largest first page of orders a tool asks for
+            ttl (float, optional): Seconds prefetched records are served for
+        """
+        # One extra row tells a page whether older orders exist
+        self.order_limit = order_limit + 1
+        self._cache = TTLCache(ttl=ttl, maxsize=256)
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def start(self, customer_id: int) -> None:
+        """
+        Load a verified customer's context in the background.
+
+        Args:
+            customer_id (int): Customer ID; repeated calls while the data is fresh do nothing
+        """
+        if not PREFETCH_ENABLED or customer_id in self._tasks:
+            return
+        # Outlives the verifying tool call, so it must not add to that call's phases
+        task = asyncio.ensure_future(run_shared(self._load(customer_id)))
+        self._tasks[customer_id] = task
+        # Allow a later verification to prefetch again once this data expires
+        loop = asyncio.get_running_loop()
+        task.add_done_callback(lambda _: loop.call_later(self._cache.ttl, self._tasks.pop, customer_id, None))
+
+    async def _load(self, customer_id: int) -> None:
+        generation = self._cache.generation
+        orders, tickets = await gather_queries(
+            repository.get_recent_orders(customer_id, self.order_limit),
+            repository.get_open_tickets(customer_id, PREFETCH_OPEN_TICKETS),
+            return_exceptions=True,
+        )
+        if isinstance(orders, Exception):
+            logger.warning("Prefetching orders of customer %s failed: %s", customer_id, orders)
+        elif orders:
+            self._cache.set(("recent_orders", customer_id), orders)
+            for order in orders:
+                self._cache.set(("order", order["id"]), order)
+        if isinstance(tickets, Exception):
+            logger.warning("Prefetching tickets of customer %s failed: %s", customer_id, tickets)
+            return
+        # Looked up together, these are batched into one query
+        comments = await gather_queries(
+            *(repository.get_latest_comment(ticket["id"]) for ticket in tickets), return_exceptions=True
+        )
+        if self._cache.generation != generation:
+            # A ticket changed in this room while we loaded; keep these lookups live
+            return
+        for ticket, comment in zip(tickets, comments):
+            self._cache.set(("ticket", ticket["id"]), ticket)
+            if comment is not None and not isinstance(comment, Exception):
+                self._cache.set(("latest_comment", ticket["id"]), comment)
+        logger.debug("Prefetched %s orders and %s open tickets for customer %s",
+                     len(orders) if isinstance(orders, list) else 0, len(tickets), customer_id)
+
+    async def _get(self, kind: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = self._cache.get((kind, key), _MISSING)
+        if value is not _MISSING:
+            LOOKUPS.inc(kind, "hit")
+            return value
+        LOOKUPS.inc(kind, "miss")
+        return await load()
+
+    async def get_ticket_details(self, ticket_id: int) -> Optional[Row]:
+        """Like repository.get_ticket_details(), from memory when prefetched."""
+        return await self._get("ticket", ticket_id, lambda: repository.get_ticket_details(ticket_id))
+
+    async def get_latest_comment(self, ticket_id: int) -> Optional[Row]:
+        """Like repository.get_latest_comment(), from memory when prefetched."""
+        return await self._get("latest_comment", ticket_id, lambda: repository.get_latest_comment(ticket_id))
+
+    async def get_order(self, order_id: int) -> Optional[Row]:
+        """
+        Like repository.get_order(), from memory when prefetched.
+
+        Prefetched orders are the compact rows of get_recent_orders(), which
+        leave out ``order_details`` and ``delivery_address``.
+        """
+        return await self._get("order", order_id, lambda: repository.get_order(order_id))
+
+    async def get_order_history_page(
+        self, customer_id: int, page_size: int, after: Optional[str] = None,
+    ) -> tuple[list[Row], Optional[str]]:
+        """Like repository.get_order_history_page(); the first page comes from memory when prefetched."""
+        orders = None if after else self._cache.get(("recent_orders", customer_id))
+        # A short list is the customer's whole history, so any page size can be served from it
+        if orders is None or (page_size >= self.order_limit and len(orders) == self.order_limit):
+            LOOKUPS.inc("recent_orders", "miss")
+            return await repository.get_order_history_page(customer_id, page_size, after=after)
+        LOOKUPS.inc("recent_orders", "hit")
+        if len(orders) <= page_size:
+            return orders, None
+        page = orders[:page_size]
+        return page, repository.encode_order_cursor(page[-1])
+
+    def invalidate_ticket(self, ticket_id: int) -> None:
+        """Drop a prefetched ticket and its latest comment after this room changed them."""
+        self._cache.invalidate(("ticket", ticket_id))
+        self._cache.invalidate(("latest_comment", ticket_id))
+
+    async def aclose(self) -> None:
+        """Cancel prefetches still running."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,136 @@
+"""
+Streaming tool results module.
+The realtime model answers a tool call only once the call's output is
+sent, and it takes exactly one output per call. A streaming tool instead
+produces its answer in chunks: a short acknowledgement or summary first,
+then details as the remaining queries finish. The first chunk (plus
+anything else ready within a short grace period) becomes the function
+output, so the model starts speaking right away; later chunks are added to
+the conversation as system messages, each followed by a reply request
+that waits for the current response to finish.
+
+Without an attached agent (benchmarks, scripts) the chunks are simply
+joined into one output, as before.
+"""
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+
+from livekit.agents import multimodal
+
+from ..utils.log import get_logger
+
+logger = get_logger("tools")
+
+TOOL_STREAMING = os.getenv("TOOL_STREAMING", "true").lower() == "true"
+# Chunks ready this many seconds after the first still go in the function output,
+# so fast lookups are answered in one turn instead of two
+TOOL_STREAM_GRACE = float(os.getenv("TOOL_STREAM_GRACE_S", "0.15"))
+
+FAILED_FOLLOW_UP = "The remaining details could not be loaded right now."
+
+# Marks the end of a tool's chunks in the queue
+_END = object()
+
+
+class ResultStream:
+    """Delivers the later chunks of one room's streaming tools into its agent's conversation."""
+
+    def __init__(self, grace: float = TOOL_STREAM_GRACE):
+        """
+        Args:
+            grace (float, optional): Seconds to wait after the first chunk for more
+        """
+        self.grace = grace
+        self._agent: Optional[multimodal.MultimodalAgent] = None
+        self._pending: set[asyncio.Task] = set()
+        # Follow-ups from concurrent tool calls are added one at a time
+        self._lock = asyncio.Lock()
+
+    def attach(self, agent: multimodal.MultimodalAgent) -> None:
+        """Send follow-ups to ``agent``, which must already be started."""
+        self._agent = agent
+
+    @property
+    def active(self) -> bool:
+        return TOOL_STREAMING and self._agent is not None
+
+    async def run(self, chunks: AsyncIterator[str]) -> str:
+        """
+        Produce a tool's output from its chunks.
+
+        Args:
+            chunks (AsyncIterator[str]): The tool's answer, summary first;
+                each chunk is complete text (including its own newlines)
+
+        Returns:
+            str: The function output: every chunk when not streaming,
+            otherwise those ready by the end of the grace period
+
+        Raises:
+            Exception: Whatever the tool raised before its function output was complete
+        """
+        if not self.active:
+            return "".join([chunk async for chunk in chunks])
+
+        queue: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.ensure_future(self._produce(chunks, queue))
+        parts: list[str] = []
+        try:
+            item = await queue.get()
+            deadline = asyncio.get_running_loop().time() + self.grace
+            while item is not _END:
+                if isinstance(item, Exception):
+                    raise item
+                parts.append(item)
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                return "".join(parts)
+        except BaseException:
+            producer.cancel()
+            raise
+
+        task = asyncio.ensure_future(self._follow_up(queue, producer))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return "".join(parts)
+
+    @staticmethod
+    async def _produce(chunks: AsyncIterator[str], queue: asyncio.Queue) -> None:
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+        except Exception as err:
+            queue.put_nowait(err)
+        finally:
+            queue.put_nowait(_END)
+
+    async def _follow_up(self, queue: asyncio.Queue, producer: asyncio.Task) -> None:
+        try:
+            while (item := await queue.get()) is not _END:
+                if isinstance(item, Exception):
+                    logger.warning("Streaming tool failed after its first chunk: %s", item)
+                    item = FAILED_FOLLOW_UP
+                await self._deliver(item)
+        finally:
+            producer.cancel()
+
+    async def _deliver(self, text: str) -> None:
+        async with self._lock:
+            chat_ctx = self._agent.chat_ctx_copy()
+            chat_ctx.append(text=text, role="system")
+            await self._agent.set_chat_ctx(chat_ctx)
+            # Queued behind the response to the function output, not interrupting it
+            self._agent.generate_reply(on_duplicate="keep_both")
+
+    async def aclose(self) -> None:
+        """Drop follow-ups that have not been delivered yet."""
+        for task in list(self._pending):
+            task.cancel()
+        await asyncio.gather(*self._pending, return_exceptions=True)
@@ -1,22 +1,75 @@
-from typing import Annotated
-import aiohttp
+from typing import Annotated, AsyncIterator
 import asyncio
-import json
+import os
+from dataclasses import replace
 from datetime import datetime
 from livekit.agents import llm
-from ..database.connection import execute_query, execute_update
-from ..database.schema import init_schema
+from ..database import repository
+from ..database.compose import QueryScope, start_query
+from ..database.phone_index import get_phone_index
+from ..database.ticket_service import create_ticket, create_ticket_for_email
+from ..database.write_behind import db_timestamp, get_write_behind, record_audit_event
+from ..services.mcp_sidecar import get_sidecar
+from ..services.weather import get_current_weather
+from ..utils.cache import TTLCache
+from ..utils.log import get_logger
+from ..utils.metrics import instrument_tool, phase
 from ..utils.phone_utils import normalize_phone_number
+from .prefetch import Prefetcher
+from .streaming import ResultStream
+
+logger = get_logger("tools")
+
+# How long a verified customer stays cached for the rest of the conversation
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "300"))
+
+# Most orders one get_customer_recent_orders call returns
+MAX_ORDERS_PER_PAGE = int(os.getenv("MAX_ORDERS_PER_PAGE", "5"))
 
 class UnifiedFunctions(llm.FunctionContext):
-    def __init__(self):
-        super().__init__()
-        self._mcp_process = None
+    def __init__(self, room_name: str = ""):
+        """
+        Args:
+            room_name (str, optional): Room these tools serve, recorded in audit events
+        """
+        self.room_name = room_name
+        # Bounds how many queries this room's tools run at once
+        self._queries = QueryScope()
+        # Same state FunctionContext.__init__ builds, but from the per-class
+        # schemas so each room skips re-introspecting every ai_callable.
+        # Every tool is wrapped to record latency, errors and in-flight calls,
+        # and runs its queries in the room's scope.
+        self._fncs = {
+            name: replace(info, callable=instrument_tool(
+                self._queries.bind(getattr(self, info.callable.__name__)), name))
+            for name, info in type(self).compile_schemas().items()
+        }
+        self._mcp_checked = False
+        # Verified customers for this room, keyed by normalized phone number
+        self._customer_cache = TTLCache(ttl=SESSION_CACHE_TTL, maxsize=16)
+        # Long answers are spoken summary first once an agent is attached
+        self._results = ResultStream()
+        # Verified customers' orders and open tickets, loaded ahead of the follow-up questions
+        self._prefetch = Prefetcher(order_limit=MAX_ORDERS_PER_PAGE)
+
+    @classmethod
+    def compile_schemas(cls) -> dict[str, llm.FunctionInfo]:
+        """
+        Builds the ai_callable schemas for this class once per process.
+        
+        Returns:
+            dict[str, llm.FunctionInfo]: Function infos keyed by tool name
+        """
+        if "_compiled_fncs" not in cls.__dict__:
+            probe = cls.__new__(cls)
+            llm.FunctionContext.__init__(probe)
+            cls._compiled_fncs = probe._fncs
+        return cls._compiled_fncs
 
     # Helper Functions
     async def find_customer_by_phone(self, phone: str):
         """
-        Finds a customer by phone number.
+        Finds a customer by phone number, using the session cache when possible.
         
         Args:
             phone (str): The normalized phone number to search for
@@ -24,13 +77,47 @@ class UnifiedFunctions(llm.FunctionContext):
         Returns:
             dict or None: Customer record if found, None otherwise
         """
-        customer_query = "SELECT * FROM Customers WHERE phone = %s"
-        customer_results = execute_query(customer_query, (phone,))
+        customer = self._customer_cache.get(phone)
+        if customer is not None:
+            return customer
+
+        # The phone index answers most verifications without a query; its
+        # records only carry id, name and phone, which is all the tools use
+        index = get_phone_index()
+        customer = index.lookup(phone) if index is not None else None
+        if customer is None:
+            customer = await repository.get_customer_by_phone(phone)
+            if customer and index is not None:
+                index.add(customer)
+        if customer:
+            self._customer_cache.set(phone, customer)
+        return customer
+
+    def attach_agent(self, agent) -> None:
+        """
+        Streams long tool answers into ``agent``'s conversation, summary first.
         
-        if customer_results:
-            return customer_results[0]
+        Args:
+            agent (multimodal.MultimodalAgent): The started agent using these tools
+        """
+        self._results.attach(agent)
+
+    async def aclose(self) -> None:
+        """Drops streamed tool details not yet delivered and stops running prefetches."""
+        await asyncio.gather(self._results.aclose(), self._prefetch.aclose())
+
+    def invalidate_customer(self, customer_id: int = None, phone: str = None) -> None:
+        """
+        Drops cached customer records after a write that may have changed them.
         
-        return None
+        Args:
+            customer_id (int, optional): Drop every entry for this customer
+            phone (str, optional): Drop the entry for this normalized phone number
+        """
+        if phone:
+            self._customer_cache.invalidate(phone)
+        if customer_id is not None:
+            self._customer_cache.invalidate_where(lambda _, customer: customer["id"] == customer_id)
 
     # Assistant Functions
     @llm.ai_callable()
@@ -39,14 +126,10 @@ class UnifiedFunctions(llm.FunctionContext):
         location: Annotated[str, llm.TypeInfo(description="The location to get the weather for")],
     ):
         """Returns weather details for the given location."""
-        url = f"https://wttr.in/{location}?format=%C+%t"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    weather_data = await response.text()
-                    return f"The weather in {location} is {weather_data}."
-                else:
-                    raise Exception(f"Failed to get weather data, status code: {response.status}")
+        with phase("http"):
+            # Shared keep-alive session with timeouts, cached per location
+            weather_data = await get_current_weather(location)
+        return f"The weather in {location} is {weather_data}."
 
     @llm.ai_callable()
     async def get_current_datetime(self):
@@ -56,29 +139,13 @@ class UnifiedFunctions(llm.FunctionContext):
 
     # Zomato Support Functions
     async def start_mcp_server(self):
-        """Starts the MCP MySQL server if not already running."""
-        if self._mcp_process is None:
-            config = {
-                "mysqlHost": "localhost",
-                "mysqlUser": "sharad",
-                "mysqlDatabase": "zomato_support_db",
-                "mysqlPassword": "password"
-            }
-            cmd = [
-                "npx", "-y", "@smithery/cli@latest",
-                "run", "@f4ww4z/mcp-mysql-server",
-                "--config", json.dumps(config)
-            ]
-            self._mcp_process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            # Wait a short while for the server to start
-            await asyncio.sleep(2)
-            
-            # Initialize the database schema
-            await init_schema()
+        """Ensures the worker's shared MCP MySQL sidecar is running (checked once per room)."""
+        if not self._mcp_checked:
+            self._mcp_checked = True
+            with phase("mcp"):
+                ready = await get_sidecar().ensure_ready()
+            if not ready:
+                logger.warning("MCP sidecar not ready yet; continuing without waiting")
 
     @llm.ai_callable()
     async def create_zomato_ticket(
@@ -93,33 +160,15 @@ class UnifiedFunctions(llm.FunctionContext):
         """Creates a support ticket for a Zomato customer."""
         await self.start_mcp_server()
 
-        # Check if customer exists
-        query = "SELECT * FROM Customers WHERE email = %s"
-        results = execute_query(query, (customer_email,))
-        if results:
-            customer = results[0]
-        else:
-            # Create new customer
-            insert_customer = "INSERT INTO Customers (name, email, phone, address) VALUES (%s, %s, %s, %s)"
-            name = customer_email.split('@')[0]
-            execute_update(insert_customer, (name, customer_email, phone, address))
-            customer = execute_query("SELECT * FROM Customers WHERE email = %s", (customer_email,))[0]
-
-        # Create ticket
-        insert_ticket = "INSERT INTO Tickets (customer_id, subject, description, status) VALUES (%s, %s, %s, %s)"
-        ticket_status = "Open"
-        execute_update(insert_ticket, (customer["id"], subject, description, ticket_status))
-        ticket = execute_query("SELECT * FROM Tickets WHERE customer_id = %s ORDER BY id DESC LIMIT 1", (customer["id"],))[0]
-
-        # Assign a support agent if available
-        agent_query = "SELECT * FROM SupportAgents WHERE available = TRUE LIMIT 1"
-        agents = execute_query(agent_query, ())
-        assigned_agent = None
-        if agents:
-            assigned_agent = agents[0]
-            execute_update("UPDATE Tickets SET assigned_agent_id = %s WHERE id = %s", (assigned_agent["id"], ticket["id"]))
-
-        return f"Created ticket #{ticket['id']} for {customer_email}. Assigned to: {assigned_agent['name'] if assigned_agent else 'pending assignment'}. You will receive updates about this ticket over WhatsApp."
+        # Find or create the customer, insert the ticket and assign an agent in one transaction
+        customer, ticket = await create_ticket_for_email(
+            customer_email, subject, description, phone=phone, address=address, order_id=order_id
+        )
+        self.invalidate_customer(customer["id"], normalize_phone_number(phone) if phone else None)
+        await record_audit_event("ticket_created", "ticket", ticket["id"], self.room_name,
+                                 {"customer_id": customer["id"], "subject": subject})
+
+        return f"Created ticket #{ticket['id']} for {customer_email}. Assigned to: {ticket['agent_name'] or 'pending assignment'}. You will receive updates about this ticket over WhatsApp."
 
     @llm.ai_callable()
     async def get_zomato_ticket_status(
@@ -129,33 +178,33 @@ class UnifiedFunctions(llm.FunctionContext):
         """Retrieves the status and details of a support ticket."""
         await self.start_mcp_server()
 
-        query = """
-         SELECT t.*, c.email as customer_email, c.name as customer_name, sa.name as agent_name
-         FROM Tickets t
-         JOIN Customers c ON t.customer_id = c.id
-         LEFT JOIN SupportAgents sa ON t.assigned_agent_id = sa.id
-         WHERE t.id = %s
-         """
-        results = execute_query(query, (ticket_id,))
-        if not results:
-            return f"No ticket found with ID {ticket_id}"
-        ticket = results[0]
-
-        comment_query = "SELECT * FROM TicketComments WHERE ticket_id = %s ORDER BY created_at DESC LIMIT 1"
-        comments = execute_query(comment_query, (ticket_id,))
-        status_msg = (
-            f"Ticket #{ticket_id}\n"
-            f"Status: {ticket['status']}\n"
-            f"Customer: {ticket['customer_name']} ({ticket['customer_email']})\n"
-            f"Subject: {ticket['subject']}\n"
-            f"Priority: {ticket['priority']}\n"
-            f"Category: {ticket['category']}\n"
-            f"Created: {ticket['created_date'].strftime('%d %b %Y, %I:%M %p')}\n"
-            f"Assigned to: {ticket['agent_name'] or 'Unassigned'}\n"
-        )
-        if comments:
-            status_msg += f"Latest comment: {comments[0]['comment']}\n"
-        return status_msg
+        return await self._results.run(self._ticket_status_chunks(ticket_id))
+
+    async def _ticket_status_chunks(self, ticket_id: int) -> AsyncIterator[str]:
+        # Both lookups go out together and are batched with other rooms' lookups;
+        # the status is sent as soon as the ticket is in, the comment follows
+        comment_lookup = start_query(self._prefetch.get_latest_comment(ticket_id))
+        try:
+            ticket = await self._prefetch.get_ticket_details(ticket_id)
+            if not ticket:
+                yield f"No ticket found with ID {ticket_id}"
+                return
+
+            yield (
+                f"Ticket #{ticket_id}\n"
+                f"Status: {ticket['status']}\n"
+                f"Customer: {ticket['customer_name']} ({ticket['customer_email']})\n"
+                f"Subject: {ticket['subject']}\n"
+                f"Priority: {ticket['priority']}\n"
+                f"Category: {ticket['category']}\n"
+                f"Created: {ticket['created_date'].strftime('%d %b %Y, %I:%M %p')}\n"
+                f"Assigned to: {ticket['agent_name'] or 'Unassigned'}\n"
+            )
+            latest_comment = await comment_lookup
+            if latest_comment:
+                yield f"Latest comment on ticket #{ticket_id}: {latest_comment['comment']}\n"
+        finally:
+            comment_lookup.cancel()
 
     @llm.ai_callable()
     async def add_zomato_ticket_comment(
@@ -168,11 +217,13 @@ class UnifiedFunctions(llm.FunctionContext):
         await self.start_mcp_server()
 
         # Verify the ticket exists
-        if not execute_query("SELECT id FROM Tickets WHERE id = %s", (ticket_id,)):
+        if not await self._prefetch.get_ticket_details(ticket_id):
             return f"No ticket found with ID {ticket_id}"
+        self._prefetch.invalidate_ticket(ticket_id)
 
-        insert_comment = "INSERT INTO TicketComments (ticket_id, comment, author) VALUES (%s, %s, %s)"
-        execute_update(insert_comment, (ticket_id, comment, author))
+        # Spooled and written in the background; the cached ticket is refreshed once it commits
+        await get_write_behind().submit("ticket_comment", (ticket_id, comment, author, db_timestamp()))
+        await record_audit_event("ticket_comment_added", "ticket", ticket_id, self.room_name, {"author": author})
         return f"Comment added to ticket #{ticket_id}"
 
     @llm.ai_callable()
@@ -183,11 +234,9 @@ class UnifiedFunctions(llm.FunctionContext):
         """Retrieves the status of a Zomato order."""
         await self.start_mcp_server()
 
-        query = "SELECT * FROM Orders WHERE id = %s"
-        results = execute_query(query, (order_id,))
-        if not results:
+        order = await self._prefetch.get_order(order_id)
+        if not order:
             return f"No order found with ID {order_id}"
-        order = results[0]
         return f"Order #{order_id} for restaurant {order['restaurant_name']} is currently {order['order_status']}."
 
     @llm.ai_callable()
@@ -201,20 +250,22 @@ class UnifiedFunctions(llm.FunctionContext):
         """
         await self.start_mcp_server()
         
-        print(f"verify_mobile_number called with mobile: {mobile}")
-        
         # Normalize the phone number
-        standard_phone = normalize_phone_number(mobile)
+        with phase("normalization"):
+            standard_phone = normalize_phone_number(mobile)
         if not standard_phone:
             return f"Invalid phone number format: {mobile}"
-            
-        print(f"Standard phone number: {standard_phone}")
         
         # Find the customer
         customer = await self.find_customer_by_phone(standard_phone)
         if not customer:
+            logger.info("verify_mobile_number: no customer for %s", standard_phone)
             return f"No customer found with mobile {mobile}."
         
+        await record_audit_event("customer_verified", "customer", customer["id"], self.room_name)
+        # Orders or tickets come up next; load them while the greeting is spoken
+        self._prefetch.start(customer["id"])
+
         # Return a greeting if customer is found
         return f"Hi {customer['name']}, we found your account details. How can I assist you today?"
 
@@ -228,7 +279,8 @@ class UnifiedFunctions(llm.FunctionContext):
         await self.start_mcp_server()
         
         # Normalize the phone number
-        standard_phone = normalize_phone_number(mobile)
+        with phase("normalization"):
+            standard_phone = normalize_phone_number(mobile)
         if not standard_phone:
             return f"Invalid phone number format: {mobile}"
             
@@ -237,69 +289,74 @@ class UnifiedFunctions(llm.FunctionContext):
         if not customer:
             return f"No customer found with mobile {mobile}."
         
-        # Create a ticket
-        insert_ticket = "INSERT INTO Tickets (customer_id, subject, description, status) VALUES (%s, %s, %s, %s)"
-        ticket_status = "Open"
-        execute_update(insert_ticket, (customer["id"], issue_description, "", ticket_status))
-        ticket = execute_query("SELECT * FROM Tickets WHERE customer_id = %s ORDER BY id DESC LIMIT 1", (customer["id"],))[0]
+        # Create the ticket and assign an agent in one transaction
+        ticket = await create_ticket(customer["id"], issue_description, "")
+        await record_audit_event("ticket_created", "ticket", ticket["id"], self.room_name,
+                                 {"customer_id": customer["id"]})
         
-        # Assign a support agent if available
-        agent_query = "SELECT * FROM SupportAgents WHERE available = TRUE LIMIT 1"
-        agents = execute_query(agent_query, ())
-        assigned_agent = None
-        if agents:
-            assigned_agent = agents[0]
-            execute_update("UPDATE Tickets SET assigned_agent_id = %s WHERE id = %s", (assigned_agent["id"], ticket["id"]))
-        
-        return f"Ticket #{ticket['id']} created for your issue: '{issue_description}'. Assigned to: {assigned_agent['name'] if assigned_agent else 'pending assignment'}. You will receive updates about this ticket over WhatsApp."
+        return f"Ticket #{ticket['id']} created for your issue: '{issue_description}'. Assigned to: {ticket['agent_name'] or 'pending assignment'}. You will receive updates about this ticket over WhatsApp."
 
     @llm.ai_callable()
     async def get_customer_recent_orders(
         self,
         mobile: Annotated[str, llm.TypeInfo(description="Customer's mobile number")],
-        limit: Annotated[int, llm.TypeInfo(description="Number of recent orders to return")] = 5
+        limit: Annotated[int, llm.TypeInfo(description=f"Number of orders to return, at most {MAX_ORDERS_PER_PAGE}")] = 5,
+        page_token: Annotated[str, llm.TypeInfo(description="Token from a previous call to continue with older orders, optional")] = "",
     ) -> str:
-        """Retrieves recent orders for a customer identified by mobile number."""
+        """Retrieves recent orders for a customer identified by mobile number, one page at a time."""
         await self.start_mcp_server()
         
-        print(f"get_customer_recent_orders called with mobile: {mobile}")
-
         # Normalize the phone number
-        standard_phone = normalize_phone_number(mobile)
+        with phase("normalization"):
+            standard_phone = normalize_phone_number(mobile)
         if not standard_phone:
             return f"Invalid phone number format: {mobile}"
-            
-        print(f"Standard phone number: {standard_phone}")
         
         # Find the customer
         customer = await self.find_customer_by_phone(standard_phone)
         if not customer:
             return f"No customer found with mobile {mobile}."
         
-        # Get recent orders for this customer
-        orders_query = """
-            SELECT o.id, o.restaurant_name, o.order_status, o.order_total, 
-                   o.payment_method, o.order_timestamp, o.delivery_timestamp,
-                   o.order_details
-            FROM Orders o
-            WHERE o.customer_id = %s
-            ORDER BY o.order_timestamp DESC
-            LIMIT %s
-        """
-        orders = execute_query(orders_query, (customer["id"], limit))
-        
+        # Reject a bad token now rather than after the acknowledgement is spoken
+        if page_token:
+            try:
+                repository.decode_order_cursor(page_token)
+            except ValueError:
+                return "That page token is not valid; ask for the most recent orders again."
+
+        # Get one page of orders; the model cannot ask for an unbounded list
+        page_size = min(max(limit, 1), MAX_ORDERS_PER_PAGE)
+        return await self._results.run(self._order_history_chunks(customer, page_size, page_token))
+
+    async def _order_history_chunks(self, customer, page_size: int, page_token: str) -> AsyncIterator[str]:
+        # Acknowledge first: the model can start answering while the page loads
+        if page_token:
+            yield f"Looking up older orders for {customer['name']}.\n"
+        else:
+            yield f"Hi {customer['name']}, looking up your recent orders.\n"
+
+        orders, next_token = await self._prefetch.get_order_history_page(
+            customer["id"], page_size, after=page_token or None
+        )
         if not orders:
-            return f"Hi {customer['name']}, you don't have any recent orders."
-        
-        # Format order information
+            if page_token:
+                yield f"{customer['name']} has no older orders."
+            else:
+                yield f"{customer['name']} doesn't have any recent orders."
+            return
+
+        # One short line per order keeps the spoken answer brief
         orders_info = [
-            f"Order #{order['id']} from {order['restaurant_name']}\n"
-            f"Status: {order['order_status']}\n"
-            f"Date: {order['order_timestamp'].strftime('%d %b %Y, %I:%M %p')}\n"
-            f"Total: ₹{order['order_total']}"
+            f"Order #{order['id']} from {order['restaurant_name']}, {order['order_status']}, "
+            f"{order['order_timestamp'].strftime('%d %b %Y')}, ₹{order['order_total']}"
             for order in orders
         ]
-        
-        response = f"Hi {customer['name']}, here are your {len(orders)} most recent orders:\n\n"
-        response += "\n\n".join(orders_info)
-        return response 
\ No newline at end of file
+
+        if page_token:
+            response = f"Here are {len(orders)} older orders:\n"
+        else:
+            response = f"Here are {customer['name']}'s {len(orders)} most recent orders:\n"
+        response += "\n".join(orders_info)
+        if next_token:
+            response += f"\nMore orders are available; call again with page_token '{next_token}' to continue."
+        yield response
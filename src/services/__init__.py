@@ -0,0 +1,18 @@
+"""
+Worker-owned services package.
+Long-lived resources shared by every room handled by a worker process.
+"""
+
+from .http_client import HTTPClient, HTTPRequestError, close_http_client, get_http_client
+from .mcp_sidecar import MCPSidecar, get_sidecar
+from .weather import get_current_weather
+
+__all__ = [
+    'HTTPClient',
+    'HTTPRequestError',
+    'close_http_client',
+    'get_http_client',
+    'MCPSidecar',
+    'get_sidecar',
+    'get_current_weather'
+]
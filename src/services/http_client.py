@@ -0,0 +1,137 @@
+"""
+Shared HTTP client module.
+One keep-alive aiohttp session per worker process with bounded timeouts and
+retries with jittered exponential backoff, used by tools that call external
+HTTP APIs.
+"""
+import asyncio
+import os
+import random
+from typing import Any, Optional
+
+import aiohttp
+
+from ..utils.log import get_logger
+
+logger = get_logger("http")
+
+# Whole-request and connect timeouts in seconds; a tool call must never hang
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "4"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "1.5"))
+# Extra attempts after the first for timeouts, connection errors and 5xx/429
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HTTPRequestError(Exception):
+    """An HTTP request failed after all retries."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPClient:
+    """Owns the worker's aiohttp session, created lazily on the running loop."""
+
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+    ):
+        """
+        Args:
+            timeout (float, optional): Seconds allowed for one attempt
+            connect_timeout (float, optional): Seconds allowed to get a connection
+            retries (int, optional): Extra attempts after the first
+            backoff (float, optional): Base delay in seconds, doubled per retry
+            max_connections (int, optional): Connection pool size
+        """
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared session, creating it on first use.
+
+        Returns:
+            aiohttp.ClientSession: Session with a keep-alive connection pool
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def get_text(self, url: str, params: Optional[dict[str, Any]] = None) -> str:
+        """
+        GET a URL and return the body, retrying transient failures.
+
+        Args:
+            url (str): URL to fetch
+            params (dict[str, Any], optional): Query string parameters
+
+        Returns:
+            str: Response body
+
+        Raises:
+            HTTPRequestError: On a non-retryable status or once retries are exhausted
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.session().get(url, params=params) as response:
+                    if response.status == 200:
+                        return await response.text()
+                    error = HTTPRequestError(f"GET {url} returned {response.status}", response.status)
+                    if response.status not in RETRYABLE_STATUSES:
+                        raise error
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                error = HTTPRequestError(f"GET {url} failed: {err!r}")
+            if attempt >= self.retries:
+                raise error
+            # Full jitter keeps retries from many rooms from arriving in lockstep
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            attempt += 1
+            logger.info("Retrying %s in %.2fs (attempt %s): %s", url, delay, attempt + 1, error)
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_client: Optional[HTTPClient] = None
+
+
+def get_http_client() -> HTTPClient:
+    """
+    Get the worker process's HTTP client, creating it on first use.
+
+    Returns:
+        HTTPClient: The shared client
+    """
+    global _client
+    if _client is None:
+        _client = HTTPClient()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client's session, if one was opened."""
+    if _client is not None:
+        await _client.close()
@@ -0,0 +1,260 @@
+"""
+MCP MySQL sidecar supervision module.
+Runs one MCP server subprocess per worker process, probes it for readiness
+over its stdio JSON-RPC channel, restarts it when it crashes and stops it
+on shutdown.
+"""
+import asyncio
+import atexit
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Optional
+
+from ..utils.log import get_logger
+
+logger = get_logger("mcp")
+
+# MCP server configuration
+MCP_CONFIG = {
+    "mysqlHost": "localhost",
+    "mysqlUser": "sharad",
+    "mysqlDatabase": "zomato_support_db",
+    "mysqlPassword": "password"
+}
+
+MCP_COMMAND = [
+    "npx", "-y", "@smithery/cli@latest",
+    "run", "@f4ww4z/mcp-mysql-server",
+    "--config", json.dumps(MCP_CONFIG)
+]
+
+# How long a tool call waits for a sidecar that is still starting
+MCP_READY_TIMEOUT = float(os.getenv("MCP_READY_TIMEOUT", "5"))
+
+_PROBE_ID = "readiness-probe"
+
+
+class MCPSidecar:
+    """Supervises a single MCP server subprocess."""
+
+    def __init__(
+        self,
+        command: list[str],
+        min_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        stable_after: float = 60.0,
+    ):
+        """
+        Args:
+            command (list[str]): Command line that starts the MCP server
+            min_backoff (float, optional): First restart delay in seconds
+            max_backoff (float, optional): Upper bound for the restart delay
+            stable_after (float, optional): Uptime after which a crash resets the backoff
+        """
+        self.command = command
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.restarts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._ready = threading.Event()
+        # Set while no process is running: it crashed and is in backoff, failed to spawn, or was stopped
+        self._down = threading.Event()
+        self._stopping = threading.Event()
+        # (loop, event) of each ensure_ready() call waiting for a change of state
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._supervisor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the sidecar answered its readiness probe."""
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        """Start supervising the sidecar if it is not running yet. Does not block."""
+        with self._lock:
+            if self._supervisor is not None and self._supervisor.is_alive():
+                return
+            self._stopping.clear()
+            self._down.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="mcp-sidecar", daemon=True)
+            self._supervisor.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the sidecar is ready.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to forever.
+
+        Returns:
+            bool: True if the sidecar is ready
+        """
+        return self._ready.wait(timeout)
+
+    async def ensure_ready(self, timeout: float = MCP_READY_TIMEOUT) -> bool:
+        """
+        Start the sidecar if needed and wait for it without blocking the loop.
+
+        Returns at once when the sidecar is known to be down (crashed and
+        waiting to restart), and as soon as it goes down while starting.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to MCP_READY_TIMEOUT.
+
+        Returns:
+            bool: True if the sidecar is ready
+        """
+        if self._ready.is_set():
+            return True
+        self.start()
+        if self._down.is_set():
+            return False
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            # Checked after registering, so a change in between is not missed
+            if not (self._ready.is_set() or self._down.is_set()):
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+        return self._ready.is_set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop supervising and terminate the sidecar, killing it if it does not exit.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a graceful exit
+        """
+        self._stopping.set()
+        self._ready.clear()
+        self._down.set()
+        self._notify()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if self._supervisor is not None and self._supervisor is not threading.current_thread():
+            self._supervisor.join(timeout)
+
+    async def aclose(self) -> None:
+        """Async wrapper around stop() for shutdown callbacks."""
+        await asyncio.get_running_loop().run_in_executor(None, self.stop)
+
+    def _supervise(self) -> None:
+        backoff = self.min_backoff
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            self._down.clear()
+            try:
+                self._spawn()
+                returncode = self._process.wait()
+            except OSError as err:
+                returncode = None
+                logger.error("Failed to start MCP sidecar: %s", err)
+            self._ready.clear()
+            self._down.set()
+            self._notify()
+            if self._stopping.is_set():
+                break
+            if time.monotonic() - started >= self.stable_after:
+                backoff = self.min_backoff
+            logger.warning("MCP sidecar exited with code %s; restarting in %.1fs", returncode, backoff)
+            self.restarts += 1
+            if self._stopping.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _spawn(self) -> None:
+        process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._process = process
+        if self._stopping.is_set():
+            # stop() ran while we were spawning and could not see this process
+            process.terminate()
+            return
+        # Both pipes must be drained or the server blocks once a buffer fills
+        threading.Thread(target=self._read_stdout, args=(process,), daemon=True).start()
+        threading.Thread(target=self._drain, args=(process.stderr,), daemon=True).start()
+        self._send(process, {
+            "jsonrpc": "2.0",
+            "id": _PROBE_ID,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "zomato-support-agent", "version": "1.0"},
+            },
+        })
+
+    def _read_stdout(self, process: subprocess.Popen) -> None:
+        for line in process.stdout:
+            if self._ready.is_set() or not line.startswith("{"):
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("id") == _PROBE_ID and "result" in message:
+                self._send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+                self._ready.set()
+                self._notify()
+
+    def _notify(self) -> None:
+        """Wake every ensure_ready() call to re-check the state; safe from any thread."""
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the waiter's loop has closed
+
+    @staticmethod
+    def _drain(stream) -> None:
+        for _ in stream:
+            pass
+
+    @staticmethod
+    def _send(process: subprocess.Popen, message: dict) -> None:
+        try:
+            process.stdin.write(json.dumps(message) + "\n")
+            process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            pass
+
+
+_sidecar: Optional[MCPSidecar] = None
+
+
+def get_sidecar() -> MCPSidecar:
+    """
+    Get the worker process's MCP sidecar, creating (but not starting) it on first use.
+
+    Returns:
+        MCPSidecar: The shared sidecar supervisor
+    """
+    global _sidecar
+    if _sidecar is None:
+        _sidecar = MCPSidecar(MCP_COMMAND)
+        atexit.register(_sidecar.stop)
+    return _sidecar
@@ -0,0 +1,65 @@
+"""
+Weather lookup service.
+Fetches current conditions from wttr.in through the shared HTTP client,
+caching them per normalized location and coalescing concurrent lookups for
+the same place into one request.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from ..utils.cache import TTLCache
+from ..utils.singleflight import SingleFlight
+from .http_client import get_http_client
+
+WEATHER_URL = "https://wttr.in/{location}"
+
+# Conditions barely change within minutes
+WEATHER_CACHE = TTLCache(
+    ttl=float(os.getenv("WEATHER_CACHE_TTL", "600")),
+    maxsize=int(os.getenv("WEATHER_CACHE_SIZE", "1000")),
+)
+WEATHER_FLIGHTS = SingleFlight("weather")
+
+_SEPARATORS = re.compile(r"[\s,]+")
+
+
+def normalize_location(location: str) -> str:
+    """
+    Canonical form of a location so "New Delhi", " new  delhi," share a cache entry.
+
+    Args:
+        location (str): Location as spoken by the user
+
+    Returns:
+        str: Lower-cased location with separators collapsed
+    """
+    return _SEPARATORS.sub(" ", location).strip(" .").casefold()
+
+
+async def _fetch(location: str) -> str:
+    weather = (await get_http_client().get_text(
+        WEATHER_URL.format(location=quote(location)), params={"format": "%C %t"}
+    )).strip()
+    WEATHER_CACHE.set(location, weather)
+    return weather
+
+
+async def get_current_weather(location: str) -> str:
+    """
+    Get a short description of the current weather, e.g. "Sunny +31°C".
+
+    Args:
+        location (str): City or place name
+
+    Returns:
+        str: Current conditions and temperature
+
+    Raises:
+        HTTPRequestError: If the weather service could not be reached
+    """
+    key = normalize_location(location)
+    weather = WEATHER_CACHE.get(key)
+    if weather is None:
+        weather = await WEATHER_FLIGHTS.do(key, lambda: _fetch(key))
+    return weather
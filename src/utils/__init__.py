@@ -3,6 +3,6 @@ Utility functions package.
 Contains general-purpose utility functions used across the application.
 """
 
-from .phone_utils import normalize_phone_number
+from .phone_utils import normalize_phone_number, normalize_phone_numbers
 
-__all__ = ['normalize_phone_number'] 
\ No newline at end of file
+__all__ = ['normalize_phone_number', 'normalize_phone_numbers'] 
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Batched loading utilities.
+A DataLoader-style helper that collects individual key lookups made within
+a short window and resolves them with one batched call.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from .log import get_logger
+from .metrics import REGISTRY, run_shared
+
+logger = get_logger("batching")
+
+# How long the first lookup of a batch waits for others to join (0 = next loop tick)
+BATCH_WINDOW_MS = float(os.getenv("DB_BATCH_WINDOW_MS", "2"))
+BATCH_MAX_SIZE = int(os.getenv("DB_BATCH_MAX_SIZE", "100"))
+
+BATCH_SIZE = REGISTRY.histogram(
+    "batch_loader_keys", "Distinct keys resolved per batched call", ("loader",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+
+BatchFunction = Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]]
+
+
+class BatchLoader:
+    """
+    Coalesces lookups by key into batched calls.
+
+    Lookups of the same key within a batch share one result; the batch
+    function is called with the distinct keys and returns a mapping from
+    key to value (missing keys resolve to None). Not thread-safe; intended
+    to be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: BatchFunction,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch_size: int = BATCH_MAX_SIZE,
+    ):
+        """
+        Args:
+            name (str): Loader name used in metrics, e.g. "tickets"
+            batch_fn (BatchFunction): Loads many keys at once
+            window_ms (float, optional): Collection window after the first lookup
+            max_batch_size (int, optional): Dispatch early once this many keys are waiting
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._timer: Optional[asyncio.Handle] = None
+        # Strong references keep running batches from being garbage-collected
+        self._running: set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        Load one key as part of the next batch.
+
+        Args:
+            key (Hashable): Key to load
+
+        Returns:
+            Any: The value for ``key``, or None if the batch had none
+        """
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = (loop.call_later(self.window, self._dispatch) if self.window > 0
+                               else loop.call_soon(self._dispatch))
+        # A cancelled caller must not cancel the result for other waiters
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list[Any]:
+        """
+        Load several keys; they all land in the same batch.
+
+        Returns:
+            list[Any]: Values in the order of ``keys``
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(run_shared(self._run(batch)))
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Batch of %s failed outside its batch function", self.name, exc_info=task.exception())
+
+    async def _run(self, batch: dict[Hashable, asyncio.Future]) -> None:
+        BATCH_SIZE.observe(len(batch), self.name)
+        try:
+            results = await self.batch_fn(list(batch))
+        except asyncio.CancelledError:
+            # Waiters must never be left pending
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as err:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(err)
+            return
+        try:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            # e.g. a batch function that returned something other than a mapping
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self.name} batch returned no result"))
@@ -0,0 +1,115 @@
+"""
+In-memory caching utilities.
+Provides a small LRU cache with per-entry time-to-live expiry.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after a time-to-live.
+
+    Not thread-safe; intended to be used from a single event loop.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        """
+        Args:
+            ttl (float): Default time-to-live of an entry in seconds
+            maxsize (int, optional): Maximum number of entries. Defaults to 1024.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped by every invalidation so in-flight loads can tell they raced a write
+        self.generation = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a live entry, refreshing its LRU position.
+
+        Args:
+            key (Hashable): Cache key
+            default (Any, optional): Returned on a miss. Defaults to None.
+
+        Returns:
+            Any: The cached value or ``default``
+        """
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+            ttl (float, optional): Overrides the default time-to-live
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop one entry if present."""
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Drop every entry for which ``predicate(key, value)`` is true.
+
+        Returns:
+            int: Number of entries dropped
+        """
+        self.generation += 1
+        stale = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self.generation += 1
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Report cache counters.
+
+        Returns:
+            dict[str, int]: hits, misses, evictions and current size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+        }
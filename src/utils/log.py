@@ -0,0 +1,156 @@
+"""
+Logging and query telemetry utilities.
+Sets up a queued, non-blocking logger for the application with PII
+redaction (phone numbers, emails) and sampled per-query timing records.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+from typing import Any, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Share of successful, fast queries that are logged at DEBUG level
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", "0.01"))
+
+# Queries slower than this are always logged as warnings
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+ROOT_LOGGER_NAME = "support"
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# 10 to 14 digits, optionally with a leading + and single space/dash separators
+PHONE_PATTERN = re.compile(r"(?<![\w-])\+?\d(?:[\s-]?\d){9,13}(?!\w)")
+_WHITESPACE = re.compile(r"\s+")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def redact(text: str) -> str:
+    """
+    Mask email addresses and phone numbers in a string.
+
+    Phone numbers keep their last two digits so log lines stay correlatable.
+
+    Args:
+        text (str): Text that may contain PII
+
+    Returns:
+        str: Text with PII replaced
+    """
+    text = EMAIL_PATTERN.sub("<email>", text)
+    return PHONE_PATTERN.sub(lambda match: "<phone:**" + match.group()[-2:] + ">", text)
+
+
+class RedactingFilter(logging.Filter):
+    """Renders the record's message once and strips PII from it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.fields = {
+                key: redact(value) if isinstance(value, str) else value
+                for key, value in fields.items()
+            }
+        return True
+
+
+class FieldsFormatter(logging.Formatter):
+    """Appends the record's structured ``fields`` as key=value pairs."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}"
+                                   for key, value in fields.items())
+        return line
+
+
+def setup_logging() -> logging.Logger:
+    """
+    Configure the application logger once per process.
+
+    Records are redacted on the calling thread and handed to a queue; a
+    background listener thread does the actual (blocking) stream writes.
+
+    Returns:
+        logging.Logger: The application's root logger
+    """
+    global _listener
+    logger = logging.getLogger(ROOT_LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(FieldsFormatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RedactingFilter())
+
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a child of the application logger, configuring logging on first use.
+
+    Args:
+        name (str): Component name, e.g. "db" or "tools"
+
+    Returns:
+        logging.Logger: Logger named ``support.<name>``
+    """
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def log_query(
+    logger: logging.Logger,
+    query: str,
+    duration_ms: float,
+    rows: Optional[int] = None,
+    error: Optional[Exception] = None,
+    **fields: Any,
+) -> None:
+    """
+    Record one SQL statement with its timing.
+
+    Failures are logged as errors and slow statements as warnings; other
+    statements are sampled at QUERY_LOG_SAMPLE_RATE. Parameters are never
+    logged.
+
+    Args:
+        logger (logging.Logger): Logger to write to
+        query (str): SQL text
+        duration_ms (float): Time spent executing and fetching
+        rows (int, optional): Rows returned or affected
+        error (Exception, optional): Error raised by the statement
+        **fields (Any): Extra structured fields
+    """
+    if error is None and duration_ms < SLOW_QUERY_MS:
+        if not logger.isEnabledFor(logging.DEBUG) or random.random() >= QUERY_LOG_SAMPLE_RATE:
+            return
+    fields.update(sql=_WHITESPACE.sub(" ", query).strip(), duration_ms=round(duration_ms, 2))
+    if rows is not None:
+        fields["rows"] = rows
+    if error is not None:
+        fields["error"] = str(error)
+        logger.error("query failed", extra={"fields": fields})
+    elif duration_ms >= SLOW_QUERY_MS:
+        logger.warning("slow query", extra={"fields": fields})
+    else:
+        logger.debug("query", extra={"fields": fields})
@@ -0,0 +1,390 @@
+"""
+In-process metrics module.
+Counters, gauges and histograms for tool calls and SQL statements, a
+decorator that instruments ai_callable tools (latency split by phase),
+and a small HTTP endpoint serving everything in the Prometheus text
+exposition format.
+"""
+import functools
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from .log import get_logger
+
+logger = get_logger("metrics")
+
+# Upper bounds in seconds; sized for calls between a few ms and a few s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Format the metric in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines += self._samples()
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+                for labels, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count, sum]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += seconds
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return int(sum(state[:-1])) if state else 0
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for labels, state in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {state[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name!r} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Format every registered metric for a Prometheus scrape.
+
+        Returns:
+            str: Exposition text, newline terminated
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_LATENCY = REGISTRY.histogram(
+    "tool_call_duration_seconds", "Wall time of ai_callable tool calls", ("tool",))
+TOOL_PHASE_LATENCY = REGISTRY.histogram(
+    "tool_phase_duration_seconds", "Time tool calls spend per phase (normalization, db, http, mcp, other)",
+    ("tool", "phase"))
+TOOL_ERRORS = REGISTRY.counter(
+    "tool_call_errors_total", "Tool calls that raised", ("tool",))
+TOOL_IN_FLIGHT = REGISTRY.gauge(
+    "tool_calls_in_flight", "Tool calls currently running", ("tool",))
+
+QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds", "Wall time of SQL statements, including pool checkout", ("query",))
+QUERY_ERRORS = REGISTRY.counter(
+    "db_query_errors_total", "SQL statements that failed", ("query",))
+QUERY_IN_FLIGHT = REGISTRY.gauge(
+    "db_queries_in_flight", "SQL statements currently running", ("query",))
+
+SINGLEFLIGHT_CALLS = REGISTRY.counter(
+    "singleflight_calls_total", "Lookups that went through a single-flight group", ("namespace",))
+SINGLEFLIGHT_COALESCED = REGISTRY.counter(
+    "singleflight_coalesced_total", "Lookups that joined a call already in flight", ("namespace",))
+SINGLEFLIGHT_IN_FLIGHT = REGISTRY.gauge(
+    "singleflight_keys_in_flight", "Distinct keys currently being loaded", ("namespace",))
+
+# Phase durations of the tool call running in the current context
+_tool_phases: ContextVar[Optional[dict[str, float]]] = ContextVar("tool_phases", default=None)
+
+_QUERY_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=512)
+def query_label(query: str) -> str:
+    """
+    Reduce a SQL statement to a low-cardinality label such as ``select Orders``.
+
+    Args:
+        query (str): SQL text
+
+    Returns:
+        str: Statement verb followed by the first table it touches
+    """
+    words = query.split(None, 1)
+    verb = words[0].lower() if words else "unknown"
+    table = _QUERY_TABLE.search(query)
+    return f"{verb} {table.group(1)}" if table else verb
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """
+    Attribute time to a phase of the tool call running in this context.
+
+    Does nothing outside an instrumented tool call.
+
+    Args:
+        name (str): Phase name, e.g. "db" or "http"
+        seconds (float): Time spent
+    """
+    phases = _tool_phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as one phase of the current tool call."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+async def run_shared(awaitable: Awaitable[Any]) -> Any:
+    """
+    Await work done on behalf of several tool calls, outside every call's phases.
+
+    Shared tasks (batched and coalesced loads, prefetches) copy the context
+    of whichever call started them, so their queries would all be charged
+    to that call, possibly after it finished. Each caller times its own
+    wait instead, e.g. with ``phase("db")``.
+
+    Args:
+        awaitable (Awaitable[Any]): The shared work; run this as the task's coroutine
+
+    Returns:
+        Any: The awaitable's result
+    """
+    # Only affects the context of the task running this coroutine
+    _tool_phases.set(None)
+    return await awaitable
+
+
+@contextmanager
+def track_query(query: str) -> Iterator[None]:
+    """
+    Record latency, errors and in-flight count for one SQL statement.
+
+    The time also counts towards the current tool call's "db" phase.
+    Exceptions raised in the block are counted and re-raised.
+
+    Args:
+        query (str): SQL text
+    """
+    label = query_label(query)
+    QUERY_IN_FLIGHT.inc(label)
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        QUERY_IN_FLIGHT.dec(label)
+        record_query(query, time.perf_counter() - started, failed)
+
+
+def record_query(query: str, seconds: float, failed: bool = False) -> None:
+    """
+    Record an SQL statement timed by the caller, e.g. only the fetches of a streamed result.
+
+    Args:
+        query (str): SQL text
+        seconds (float): Time spent in the database
+        failed (bool, optional): Whether the statement raised
+    """
+    label = query_label(query)
+    if failed:
+        QUERY_ERRORS.inc(label)
+    QUERY_LATENCY.observe(seconds, label)
+    record_phase("db", seconds)
+
+
+def instrument_tool(func: Callable[..., Awaitable[Any]], name: Optional[str] = None) -> Callable[..., Awaitable[Any]]:
+    """
+    Wrap an async tool so every call records latency, errors and in-flight count.
+
+    Time not attributed to an explicit phase (db, http, normalization, ...)
+    is recorded as the "other" phase, which is mostly response formatting.
+
+    Args:
+        func (Callable[..., Awaitable[Any]]): The tool coroutine function
+        name (str, optional): Tool name label. Defaults to ``func.__name__``.
+
+    Returns:
+        Callable[..., Awaitable[Any]]: The instrumented coroutine function
+    """
+    tool = name or func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        phases: dict[str, float] = {}
+        token = _tool_phases.set(phases)
+        TOOL_IN_FLIGHT.inc(tool)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            TOOL_ERRORS.inc(tool)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _tool_phases.reset(token)
+            TOOL_IN_FLIGHT.dec(tool)
+            TOOL_LATENCY.observe(elapsed, tool)
+            for phase_name, seconds in phases.items():
+                TOOL_PHASE_LATENCY.observe(seconds, tool, phase_name)
+            TOOL_PHASE_LATENCY.observe(max(elapsed - sum(phases.values()), 0.0), tool, "other")
+
+    return wrapper
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes are too frequent to log
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1", attempts: int = 1) -> Optional[int]:
+    """
+    Serve /metrics from a background thread, once per process.
+
+    Every job process has its own metrics, so when the port is taken the
+    next ones are tried, up to ``attempts`` ports in total.
+
+    Args:
+        port (int): First port to try
+        host (str, optional): Interface to bind. Defaults to localhost.
+        attempts (int, optional): Number of consecutive ports to try
+
+    Returns:
+        Optional[int]: The port being served, or None if none was free
+    """
+    global _server
+    if _server is not None:
+        return _server.server_address[1]
+    for candidate in range(port, port + attempts):
+        try:
+            _server = ThreadingHTTPServer((host, candidate), _MetricsHandler)
+        except OSError:
+            continue
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return candidate
+    logger.warning("No free metrics port in %s-%s; metrics endpoint disabled", port, port + attempts - 1)
+    return None
@@ -2,25 +2,62 @@
 Phone number utility functions.
 Provides functions for handling and normalizing phone numbers.
 """
+import re
+from functools import lru_cache
+from typing import Any, Iterable
 
+# Separators seen in real exports, stripped by one C-level translate; numbers
+# with anything else left over fall back to the regex
+_SEPARATORS = str.maketrans("", "", " -()+./\t")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def _digits(mobile: str) -> str:
+    digits = mobile.translate(_SEPARATORS)
+    if not (digits.isascii() and digits.isdigit()):
+        digits = _NON_DIGITS.sub("", digits)
+    return digits
+
+
+def _format(digits: str) -> str:
+    # Handle Indian phone number formats
+    if len(digits) == 10:
+        return f"+91-{digits}"
+    elif len(digits) == 12 and digits.startswith("91"):
+        return f"+91-{digits[2:]}"
+
+    # Invalid format
+    return ""
+
+@lru_cache(maxsize=1024)
 def normalize_phone_number(mobile: str) -> str:
     """
     Normalizes a phone number into a standard format.
-    
+
     Args:
         mobile (str): The raw phone number input
-        
+
     Returns:
         str: Standardized phone number in +91-XXXXXXXXXX format or empty string if invalid
     """
-    # Normalize phone number: remove non-digit characters
-    normalized_digits = ''.join(filter(str.isdigit, mobile))
-    
-    # Handle Indian phone number formats
-    if len(normalized_digits) == 10:
-        return f"+91-{normalized_digits}"
-    elif len(normalized_digits) == 12 and normalized_digits.startswith("91"):
-        return f"+91-{normalized_digits[2:]}"
-    
-    # Invalid format
-    return "" 
\ No newline at end of file
+    return _format(_digits(mobile))
+
+def normalize_phone_numbers(numbers: Iterable[Any]) -> list[str]:
+    """
+    Normalizes many phone numbers at once, for bulk imports.
+
+    Skips the per-call cache, which would only churn on millions of
+    distinct numbers. Non-string values (e.g. numbers parsed from JSON)
+    are converted with str(); None counts as invalid.
+
+    Args:
+        numbers (Iterable[Any]): Raw phone number inputs
+
+    Returns:
+        list[str]: Numbers in +91-XXXXXXXXXX format, in input order, with an
+        empty string for each invalid input
+    """
+    return [
+        _format(_digits(number if isinstance(number, str) else str(number))) if number is not None else ""
+        for number in numbers
+    ]
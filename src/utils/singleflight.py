@@ -0,0 +1,88 @@
+"""
+Request coalescing utilities.
+Lets concurrent callers asking for the same key share one in-flight call
+instead of each starting their own.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from .metrics import SINGLEFLIGHT_CALLS, SINGLEFLIGHT_COALESCED, SINGLEFLIGHT_IN_FLIGHT, run_shared
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async calls by key.
+
+    The call runs as its own task, so a caller that is cancelled (e.g. the
+    user interrupted the agent) does not cancel the result for the others.
+    That task records no tool phases; callers time their own wait.
+    Not thread-safe; intended to be used from a single event loop.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Namespace used in stats and metrics, e.g. "orders"
+        """
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``loader`` for ``key``, or join the call already running for it.
+
+        Args:
+            key (Hashable): Identity of the call
+            loader (Callable[[], Awaitable[Any]]): Coroutine factory doing the work
+
+        Returns:
+            Any: The loader's result; its exception is raised to every waiter
+        """
+        self.calls += 1
+        SINGLEFLIGHT_CALLS.inc(self.name)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run_shared(loader()))
+            self._in_flight[key] = task
+            SINGLEFLIGHT_IN_FLIGHT.inc(self.name)
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        else:
+            self.coalesced += 1
+            SINGLEFLIGHT_COALESCED.inc(self.name)
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Stop sharing the call in flight for ``key``; later callers start a new one.
+
+        Call this after a write so readers do not join a read that began
+        before it. Callers already waiting still get the old result.
+        """
+        if self._in_flight.pop(key, None) is not None:
+            SINGLEFLIGHT_IN_FLIGHT.dec(self.name)
+
+    def forget_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Forget every in-flight key for which ``predicate(key)`` is true."""
+        for key in [key for key in self._in_flight if predicate(key)]:
+            self.forget(key)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            self.forget(key)
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Report coalescing counters.
+
+        Returns:
+            dict[str, int]: calls, coalesced calls and keys currently in flight
+        """
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
@@ -0,0 +1,38 @@
+"""
+Startup timing utilities.
+Records how long each phase of worker/process startup takes and prints a
+short report.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StartupTimer:
+    """Collects named phase durations relative to a start time."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one phase."""
+        phase_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - phase_started))
+
+    def report(self) -> str:
+        """
+        Format the recorded phases and the total elapsed time.
+
+        Returns:
+            str: Multi-line report, one phase per line
+        """
+        lines = [f"{self.label} startup:"]
+        lines += [f"  {name:<24} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"  {'total':<24} {(time.perf_counter() - self.started) * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,93 @@
+import asyncio
+import gc
+
+import pytest
+
+from src.utils.batching import BatchLoader
+
+
+def test_lookups_in_one_window_share_one_call():
+    calls = []
+
+    async def load(keys):
+        calls.append(sorted(keys))
+        return {key: key * 10 for key in keys if key != 3}
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=1)
+        return await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(3))
+
+    assert asyncio.run(main()) == [10, 20, 10, None]
+    assert calls == [[1, 2, 3]]
+
+
+def test_max_batch_size_dispatches_early():
+    calls = []
+
+    async def load(keys):
+        calls.append(len(keys))
+        return {key: key for key in keys}
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=1000, max_batch_size=2)
+        return await asyncio.wait_for(asyncio.gather(loader.load(1), loader.load(2)), 1)
+
+    assert asyncio.run(main()) == [1, 2]
+    assert calls == [2]
+
+
+def test_errors_reach_every_waiter():
+    async def load(keys):
+        raise RuntimeError("db down")
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=0)
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_bad_batch_result_fails_waiters_instead_of_hanging():
+    async def load(keys):
+        return None
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=0)
+        return await asyncio.wait_for(loader.load(1), 1)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+
+
+def test_running_batch_survives_garbage_collection():
+    async def load(keys):
+        await asyncio.sleep(0.01)
+        gc.collect()
+        await asyncio.sleep(0.01)
+        return {key: "ok" for key in keys}
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=0)
+        result = await asyncio.wait_for(loader.load(1), 1)
+        return result, loader._running
+
+    result, running = asyncio.run(main())
+    assert result == "ok"
+    assert not running
+
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    async def load(keys):
+        await asyncio.sleep(0.01)
+        return {key: key for key in keys}
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=0)
+        first = asyncio.ensure_future(loader.load(1))
+        second = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 1
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from src.database.compose import QueryScope, gather_queries, start_query
+
+
+async def _lookup(value, running, delay=0.02):
+    running[0] += 1
+    running[1] = max(running[1], running[0])
+    try:
+        await asyncio.sleep(delay)
+        return value
+    finally:
+        running[0] -= 1
+
+
+def test_gather_queries_keeps_order_and_runs_concurrently():
+    running = [0, 0]
+
+    async def main():
+        return await gather_queries(*(_lookup(value, running, delay=0.05 - value / 100) for value in range(4)))
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+    # Unscoped queries run unbounded
+    assert running[1] == 4
+
+
+def test_gather_queries_propagates_or_returns_errors():
+    async def failing():
+        raise LookupError("missing")
+
+    async def main():
+        with pytest.raises(LookupError):
+            await gather_queries(failing(), _lookup(1, [0, 0]))
+        return await gather_queries(failing(), _lookup(1, [0, 0]), return_exceptions=True)
+
+    error, value = asyncio.run(main())
+    assert isinstance(error, LookupError)
+    assert value == 1
+
+
+def test_bound_tools_share_their_room_limit():
+    running = [0, 0]
+    scope = QueryScope(limit=2)
+
+    @scope.bind
+    async def tool(count):
+        return await gather_queries(*(_lookup(value, running) for value in range(count)))
+
+    async def main():
+        # Two tool calls in one room share its two slots
+        return await asyncio.gather(tool(3), tool(2))
+
+    assert asyncio.run(main()) == [[0, 1, 2], [0, 1]]
+    assert running[1] == 2
+
+
+def test_tasks_started_in_a_scope_inherit_it():
+    running = [0, 0]
+    scope = QueryScope(limit=1)
+
+    @scope.bind
+    async def tool():
+        first = start_query(_lookup("summary", running))
+        second = start_query(_lookup("details", running))
+        return await first, await second
+
+    assert asyncio.run(tool()) == ("summary", "details")
+    assert running[1] == 1
+
+
+def test_cancelled_queries_waiting_for_a_slot_are_closed():
+    started = []
+    scope = QueryScope(limit=1)
+
+    async def query(name):
+        started.append(name)
+        await asyncio.sleep(0.05)
+        return name
+
+    @scope.bind
+    async def tool():
+        first = start_query(query("first"))
+        second = query("second")
+        waiting = start_query(second)
+        await asyncio.sleep(0)
+        waiting.cancel()
+        return await first, second
+
+    result, second = asyncio.run(tool())
+    assert result == "first"
+    assert started == ["first"]
+    # Closed rather than left to warn "was never awaited"
+    assert second.cr_frame is None
@@ -0,0 +1,30 @@
+import asyncio
+
+from src import core
+
+
+class FakeFunctions:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_worker_resources_close_with_the_last_room(monkeypatch):
+    closes = []
+
+    async def close_worker_resources():
+        closes.append(True)
+
+    monkeypatch.setattr(core, "_close_worker_resources", close_worker_resources)
+    monkeypatch.setattr(core, "_active_rooms", 0)
+    first, second = FakeFunctions(), FakeFunctions()
+
+    core._room_started()
+    core._room_started()
+    asyncio.run(core._shutdown(first))
+    # Another room is still live, so only the first room's own work stops
+    assert first.closed and not closes
+    asyncio.run(core._shutdown(second))
+    assert second.closed and closes == [True]
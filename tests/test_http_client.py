@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.services import weather
+from src.services.http_client import HTTPClient, HTTPRequestError
+
+
+def _serve(responses, test):
+    """Run ``test(url, hits)`` against a local server answering with ``responses`` in turn."""
+    hits = []
+
+    async def handler(request):
+        hits.append(request.query_string)
+        status, delay = responses[min(len(hits), len(responses)) - 1]
+        await asyncio.sleep(delay)
+        return web.Response(status=status, text="ok" if status == 200 else "error")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await test(f"http://127.0.0.1:{port}/", hits)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_transient_statuses_are_retried():
+    async def test(url, hits):
+        client = HTTPClient(retries=2, backoff=0.01)
+        try:
+            return await client.get_text(url, params={"q": "x"}), len(hits)
+        finally:
+            await client.close()
+
+    assert _serve([(503, 0), (429, 0), (200, 0)], test) == ("ok", 3)
+
+
+def test_other_statuses_fail_without_retrying():
+    async def test(url, hits):
+        client = HTTPClient(retries=2, backoff=0.01)
+        try:
+            with pytest.raises(HTTPRequestError) as error:
+                await client.get_text(url)
+            return error.value.status, len(hits)
+        finally:
+            await client.close()
+
+    assert _serve([(404, 0)], test) == (404, 1)
+
+
+def test_timeouts_give_up_after_the_retries():
+    async def test(url, hits):
+        client = HTTPClient(timeout=0.05, retries=1, backoff=0.01)
+        try:
+            with pytest.raises(HTTPRequestError) as error:
+                await client.get_text(url)
+            return error.value.status, len(hits)
+        finally:
+            await client.close()
+
+    assert _serve([(200, 0.5)], test) == (None, 2)
+
+
+class FakeClient:
+    def __init__(self):
+        self.urls = []
+
+    async def get_text(self, url, params=None):
+        self.urls.append(url)
+        await asyncio.sleep(0.01)
+        return " Sunny +31°C\n"
+
+
+def test_weather_is_coalesced_and_cached_per_normalized_location(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(weather, "get_http_client", lambda: client)
+    monkeypatch.setattr(weather, "WEATHER_CACHE", weather.TTLCache(ttl=60, maxsize=10))
+
+    async def main():
+        first = await asyncio.gather(weather.get_current_weather("New Delhi"),
+                                     weather.get_current_weather(" new  delhi,"))
+        return first + [await weather.get_current_weather("NEW DELHI")]
+
+    assert asyncio.run(main()) == ["Sunny +31°C"] * 3
+    assert client.urls == ["https://wttr.in/new%20delhi"]
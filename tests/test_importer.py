@@ -0,0 +1,21 @@
+from src.database import importer
+
+
+def test_dry_run_validates_without_counting_rows_as_written(tmp_path, monkeypatch):
+    export = tmp_path / "customers.csv"
+    export.write_text(
+        "name,email,phone\n"
+        "Ada,ada@example.com,98765 43210\n"
+        "Bob,bob@example.com,12345\n"
+    )
+
+    def no_connection():
+        raise AssertionError("a dry run must not connect")
+
+    monkeypatch.setattr(importer, "get_db_connection", no_connection)
+
+    stats = importer.import_customers(export, dry_run=True)
+
+    assert (stats.rows_read, stats.rows_validated, stats.rows_written, stats.rows_invalid) == (2, 1, 0, 1)
+    assert "1 validated" in stats.summary()
+    assert "written" not in stats.summary()
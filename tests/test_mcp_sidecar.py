@@ -0,0 +1,51 @@
+import asyncio
+import sys
+import time
+
+from src.services.mcp_sidecar import MCPSidecar
+
+# Answers the readiness probe after a short delay, then stays up
+SERVER = (
+    "import json, sys, time\n"
+    "sys.stdin.readline()\n"
+    "time.sleep(0.2)\n"
+    "print(json.dumps({'jsonrpc': '2.0', 'id': 'readiness-probe', 'result': {}}), flush=True)\n"
+    "sys.stdin.read()\n"
+)
+
+
+def test_ensure_ready_wakes_when_the_probe_answers():
+    sidecar = MCPSidecar([sys.executable, "-c", SERVER])
+
+    async def main():
+        started = time.monotonic()
+        ready = await sidecar.ensure_ready(timeout=10)
+        return ready, time.monotonic() - started
+
+    try:
+        ready, elapsed = asyncio.run(main())
+    finally:
+        sidecar.stop()
+    assert ready
+    assert elapsed < 5
+
+
+def test_ensure_ready_fails_fast_while_the_sidecar_is_down():
+    sidecar = MCPSidecar([sys.executable, "-c", "import sys; sys.exit(1)"], min_backoff=30)
+
+    async def main():
+        started = time.monotonic()
+        first = await sidecar.ensure_ready(timeout=10)
+        first_elapsed = time.monotonic() - started
+        started = time.monotonic()
+        second = await sidecar.ensure_ready(timeout=10)
+        return first, first_elapsed, second, time.monotonic() - started
+
+    try:
+        first, first_elapsed, second, second_elapsed = asyncio.run(main())
+    finally:
+        sidecar.stop()
+    assert not first and not second
+    # Woken by the crash rather than the timeout, then answered from the backoff state
+    assert first_elapsed < 5
+    assert second_elapsed < 0.1
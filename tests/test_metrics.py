@@ -0,0 +1,66 @@
+import asyncio
+
+from src.utils import metrics
+from src.utils.batching import BatchLoader
+from src.utils.metrics import instrument_tool, phase, track_query
+from src.utils.singleflight import SingleFlight
+
+
+class PhaseRecorder:
+    def __init__(self):
+        self.observed = {}
+
+    def observe(self, seconds, tool, phase_name):
+        self.observed[(tool, phase_name)] = self.observed.get((tool, phase_name), 0.0) + seconds
+
+
+def _record_phases(monkeypatch):
+    recorder = PhaseRecorder()
+    monkeypatch.setattr(metrics, "TOOL_PHASE_LATENCY", recorder)
+    return recorder.observed
+
+
+def test_every_caller_of_a_batched_load_gets_its_db_wait(monkeypatch):
+    observed = _record_phases(monkeypatch)
+
+    async def load(keys):
+        with track_query("SELECT * FROM Orders"):
+            await asyncio.sleep(0.1)
+        return {key: key for key in keys}
+
+    async def main():
+        loader = BatchLoader("test", load, window_ms=1)
+
+        async def lookup(key):
+            with phase("db"):
+                return await loader.load(key)
+
+        first = instrument_tool(lookup, "first")
+        second = instrument_tool(lookup, "second")
+        return await asyncio.gather(first(1), second(2))
+
+    assert asyncio.run(main()) == [1, 2]
+    # Each caller's wait counts once, not the shared query on top of the first caller's
+    assert 0.1 <= observed[("first", "db")] < 0.15
+    assert 0.1 <= observed[("second", "db")] < 0.15
+
+
+def test_every_caller_of_a_coalesced_load_gets_its_db_wait(monkeypatch):
+    observed = _record_phases(monkeypatch)
+    flights = SingleFlight("test")
+
+    async def load():
+        with track_query("SELECT * FROM Tickets"):
+            await asyncio.sleep(0.1)
+        return "ticket"
+
+    async def main():
+        async def lookup():
+            with phase("db"):
+                return await flights.do("key", load)
+
+        return await asyncio.gather(instrument_tool(lookup, "first")(), instrument_tool(lookup, "second")())
+
+    assert asyncio.run(main()) == ["ticket", "ticket"]
+    assert 0.1 <= observed[("first", "db")] < 0.15
+    assert 0.1 <= observed[("second", "db")] < 0.15
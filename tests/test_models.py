@@ -0,0 +1,79 @@
+import pytest
+
+from src.database import connection
+from src.database.models import Customer
+
+
+class FakeCursor:
+    def __init__(self, server):
+        self.server = server
+        self.lastrowid = None
+
+    def execute(self, query, params=None):
+        self.server.statements.append(query)
+        if query == connection.AUTOINC_SETTINGS_QUERY:
+            self.result = (self.server.lock_mode, 1)
+            return
+        # Another session's insert lands between ours, as under interleaved locking
+        self.server.next_id += 2
+        self.lastrowid = self.server.next_id
+
+    def executemany(self, query, rows):
+        self.server.statements.append("multi-row")
+        self.lastrowid = self.server.next_id + 1
+        self.server.next_id += len(rows)
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeServer:
+    def __init__(self, lock_mode):
+        self.lock_mode = lock_mode
+        self.next_id = 100
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def server(request, monkeypatch):
+    server = FakeServer(request.param)
+    monkeypatch.setattr(connection, "get_db_connection", lambda: server)
+    monkeypatch.setattr(connection, "_consecutive_ids", None)
+    return server
+
+
+@pytest.mark.parametrize("server", [1], indirect=True)
+def test_create_many_uses_one_statement_when_ids_are_consecutive(server):
+    customers = Customer.create_many([Customer("A", "a@x", "+91-1"), Customer("B", "b@x", "+91-2")])
+
+    assert [customer.id for customer in customers] == [101, 102]
+    assert server.statements.count("multi-row") == 1
+
+
+@pytest.mark.parametrize("server", [2], indirect=True)
+def test_create_many_reads_each_id_under_interleaved_locking(server):
+    customers = Customer.create_many([Customer("A", "a@x", "+91-1"), Customer("B", "b@x", "+91-2")])
+
+    assert [customer.id for customer in customers] == [102, 104]
+    assert "multi-row" not in server.statements
+
+
+@pytest.mark.parametrize("server", [1], indirect=True)
+def test_insert_many_of_nothing_is_not_a_failure(server):
+    assert connection.execute_insert_many("INSERT INTO Customers (name) VALUES (%s)", []) == []
+    assert server.statements == []
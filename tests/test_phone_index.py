@@ -0,0 +1,76 @@
+import asyncio
+import struct
+from array import array
+
+from src.database import phone_index
+from src.database.phone_index import PhoneIndex, _HEADER, _MAGIC
+
+
+def _write_snapshot(path, entries, watermark):
+    phones, offsets, ids, names = array("q"), array("Q", [0]), array("i"), bytearray()
+    for phone, customer_id, name in sorted(entries):
+        phones.append(phone)
+        ids.append(customer_id)
+        names += name.encode()
+        offsets.append(len(names))
+    with open(path, "wb") as snapshot:
+        snapshot.write(_HEADER.pack(_MAGIC, len(phones), len(names), watermark))
+        phones.tofile(snapshot)
+        offsets.tofile(snapshot)
+        ids.tofile(snapshot)
+        snapshot.write(names)
+
+
+def test_lookup_from_snapshot(tmp_path):
+    path = tmp_path / "index.bin"
+    _write_snapshot(path, [(9876543210, 1, "Asha"), (9123456789, 2, "Ravi")], watermark=2)
+    index = PhoneIndex(path)
+
+    assert index.open()
+    assert index.lookup("+91-9876543210") == {"id": 1, "name": "Asha", "phone": "+91-9876543210"}
+    assert index.lookup("+91-9000000000") is None
+    assert index.watermark == 2
+
+
+def test_truncated_or_foreign_files_are_ignored(tmp_path):
+    path = tmp_path / "index.bin"
+    _write_snapshot(path, [(9876543210, 1, "Asha")], watermark=1)
+    path.write_bytes(path.read_bytes()[:-3])
+    assert not PhoneIndex(path).open()
+
+    path.write_bytes(b"PHONE")
+    assert not PhoneIndex(path).open()
+
+    path.write_bytes(struct.pack("<8sQQQ", b"NOTINDEX", 0, 0, 0))
+    assert not PhoneIndex(path).open()
+
+    assert not PhoneIndex(tmp_path / "missing.bin").open()
+
+
+def test_without_snapshot_refresh_starts_at_current_max_id(tmp_path, monkeypatch):
+    queries = []
+
+    async def fetch(query, params=None, replica=False):
+        queries.append(query)
+        if query == phone_index.MAX_CUSTOMER_ID_QUERY:
+            return [{"max_id": 500}]
+        return [{"id": 501, "phone": "+91-9876543210", "name": "Asha"}]
+
+    monkeypatch.setattr(phone_index, "async_fetch_rows", fetch)
+    index = PhoneIndex(tmp_path / "missing.bin")
+    index.open()
+
+    assert asyncio.run(index.refresh()) == 0
+    assert index.watermark == 500 and len(index) == 0
+    assert asyncio.run(index.refresh()) == 1
+    assert index.lookup("+91-9876543210")["id"] == 501
+    assert queries[0] == phone_index.MAX_CUSTOMER_ID_QUERY
+
+
+def test_overlay_is_capped(tmp_path):
+    index = PhoneIndex(tmp_path / "missing.bin", overlay_max=2)
+    for customer_id in range(5):
+        index.add({"id": customer_id, "phone": f"+91-987654321{customer_id}", "name": "x"})
+
+    assert len(index) == 2
+    assert index.lookup("+91-9876543214") is None
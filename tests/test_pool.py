@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from src.database.pool import PoolManager, PoolSettings, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    async def ping(self, reconnect=False):
+        if not self.healthy:
+            raise ConnectionError("gone")
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool:
+    def __init__(self, connections):
+        self.maxsize = len(connections)
+        self.size = len(connections)
+        self._free = asyncio.Queue()
+        for conn in connections:
+            self._free.put_nowait(conn)
+
+    @property
+    def freesize(self):
+        return self._free.qsize()
+
+    async def acquire(self):
+        return await self._free.get()
+
+    def release(self, conn):
+        self._free.put_nowait(conn)
+
+
+def _manager(connections, **settings):
+    manager = PoolManager({}, PoolSettings(maxsize=len(connections), **settings))
+    manager._pool = FakePool(connections)
+    return manager
+
+
+def test_size_follows_worker_concurrency(monkeypatch):
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    monkeypatch.setenv("WORKER_CONCURRENCY", "3")
+    monkeypatch.setenv("DB_CONNECTIONS_PER_ROOM", "4")
+    monkeypatch.setenv("DB_POOL_MAX", "20")
+    assert PoolSettings.from_env().maxsize == 12
+    monkeypatch.setenv("WORKER_CONCURRENCY", "10")
+    assert PoolSettings.from_env().maxsize == 20
+    monkeypatch.setenv("DB_POOL_SIZE", "7")
+    assert PoolSettings.from_env().maxsize == 7
+
+
+def test_min_size_never_exceeds_max(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    monkeypatch.setenv("DB_POOL_MIN", "5")
+    settings = PoolSettings.from_env()
+    assert (settings.minsize, settings.maxsize) == (2, 2)
+
+
+def test_checkout_times_out_when_the_pool_stays_exhausted():
+    manager = _manager([FakeConnection()], acquire_timeout=0.05)
+
+    async def main():
+        async with manager.acquire():
+            with pytest.raises(PoolTimeoutError):
+                async with manager.acquire():
+                    pass
+            assert manager.snapshot()["saturation"] == 1.0
+        # Released connections serve the next caller
+        async with manager.acquire():
+            pass
+
+    asyncio.run(main())
+    snapshot = manager.snapshot()
+    assert (snapshot["timeouts"], snapshot["acquisitions"], snapshot["in_use"]) == (1, 2, 0)
+
+
+def test_idle_connections_that_fail_a_ping_are_replaced():
+    stale, fresh = FakeConnection(healthy=False), FakeConnection()
+    manager = _manager([stale, fresh], ping_after_idle=0.0)
+    # Both have been handed out before, so both are pinged
+    manager._last_used[stale] = manager._last_used[fresh] = 0.0
+
+    async def main():
+        async with manager.acquire() as conn:
+            return conn
+
+    assert asyncio.run(main()) is fresh
+    assert stale.closed
+    assert manager.snapshot()["health_check_failures"] == 1
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+
+from src.database import repository
+from src.functions.prefetch import Prefetcher
+
+ORDER = {"id": 7, "customer_id": 1, "order_timestamp": datetime(2026, 1, 1)}
+TICKET = {"id": 11}
+
+
+def _patch(monkeypatch, orders, tickets, comment=None):
+    calls = []
+
+    async def recent(customer_id, limit):
+        calls.append("recent")
+        return orders
+
+    async def open_tickets(customer_id, limit):
+        if isinstance(tickets, Exception):
+            raise tickets
+        return tickets
+
+    async def latest(ticket_id):
+        calls.append("comment")
+        return comment
+
+    async def page(customer_id, page_size, after=None):
+        calls.append("page")
+        return [ORDER], None
+
+    monkeypatch.setattr(repository, "get_recent_orders", recent)
+    monkeypatch.setattr(repository, "get_open_tickets", open_tickets)
+    monkeypatch.setattr(repository, "get_latest_comment", latest)
+    monkeypatch.setattr(repository, "get_order_history_page", page)
+    return calls
+
+
+def _prefetched(prefetcher, customer_id):
+    async def main():
+        prefetcher.start(customer_id)
+        await asyncio.gather(*prefetcher._tasks.values())
+    asyncio.run(main())
+
+
+def test_prefetched_page_is_served_from_memory(monkeypatch):
+    calls = _patch(monkeypatch, [ORDER], [TICKET], comment={"comment": "on its way"})
+    prefetcher = Prefetcher(order_limit=5)
+    _prefetched(prefetcher, 1)
+    calls.clear()
+
+    assert asyncio.run(prefetcher.get_order_history_page(1, 5)) == ([ORDER], None)
+    assert asyncio.run(prefetcher.get_latest_comment(11)) == {"comment": "on its way"}
+    assert calls == []
+
+
+def test_empty_or_failed_results_are_not_cached(monkeypatch):
+    calls = _patch(monkeypatch, [], RuntimeError("db down"))
+    prefetcher = Prefetcher(order_limit=5)
+    _prefetched(prefetcher, 1)
+    calls.clear()
+
+    assert asyncio.run(prefetcher.get_order_history_page(1, 5)) == ([ORDER], None)
+    assert calls == ["page"]
+
+
+def test_missing_comment_is_looked_up_again(monkeypatch):
+    calls = _patch(monkeypatch, [ORDER], [TICKET], comment=None)
+    prefetcher = Prefetcher(order_limit=5)
+    _prefetched(prefetcher, 1)
+    calls.clear()
+
+    asyncio.run(prefetcher.get_latest_comment(11))
+    assert calls == ["comment"]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from src.config import model
+from src.config.profiles import ProfileRegistry
+
+
+def _registry(tmp_path, profiles, default, routing=()):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"default_profile": default, "profiles": profiles, "routing": list(routing)}))
+    return ProfileRegistry(path)
+
+
+OPENAI = {"provider": "openai", "instructions": "Help the customer."}
+GEMINI = {"provider": "gemini", "instructions": "Help the customer."}
+
+
+def test_providers_cover_every_profile_default_first(tmp_path):
+    registry = _registry(tmp_path, {"a": OPENAI, "b": GEMINI, "c": GEMINI}, "b")
+    assert registry.providers() == ["gemini", "openai"]
+
+
+def test_prewarm_imports_every_provider_in_use(tmp_path, monkeypatch):
+    registry = _registry(tmp_path, {"a": OPENAI, "b": GEMINI}, "a")
+    imported = []
+    monkeypatch.setattr(model, "get_registry", lambda: registry)
+    monkeypatch.setattr(model.importlib, "import_module", lambda name: imported.append(name) or name)
+
+    model.load_providers()
+
+    assert imported == [model.PROVIDER_MODULES["openai"], model.PROVIDER_MODULES["gemini"]]
+
+
+def test_requested_profile_wins_then_rules_then_default(tmp_path):
+    registry = _registry(tmp_path, {"a": OPENAI, "b": GEMINI}, "a",
+                         routing=[{"room_prefix": "vip-", "profile": "b"}])
+    assert registry.resolve("vip-1", requested="a").name == "a"
+    assert registry.resolve("vip-1").name == "b"
+    assert registry.resolve("room-1").name == "a"
+    # Unknown requests fall through to the rules
+    assert registry.resolve("vip-1", requested="missing").name == "b"
+
+
+def test_splits_are_deterministic_and_follow_the_weights(tmp_path):
+    registry = _registry(tmp_path, {"a": OPENAI, "b": GEMINI}, "a",
+                         routing=[{"room_prefix": "", "split": {"a": 3, "b": 1}}])
+    rooms = [f"room-{index}" for index in range(4000)]
+    chosen = [registry.resolve(room).name for room in rooms]
+    assert chosen == [registry.resolve(room).name for room in rooms]
+    assert 0.2 < chosen.count("b") / len(rooms) < 0.3
+
+
+def test_zero_weight_profiles_are_never_chosen(tmp_path):
+    registry = _registry(tmp_path, {"a": OPENAI, "b": GEMINI}, "a",
+                         routing=[{"room_prefix": "", "split": {"a": 0, "b": 1}}])
+    assert {registry.resolve(f"room-{index}").name for index in range(200)} == {"b"}
+
+
+def test_invalid_rules_are_rejected(tmp_path):
+    for rule in ({"profile": "missing"}, {"split": {"a": -1, "b": 2}}, {"split": {"a": 0}}):
+        with pytest.raises(ValueError):
+            _registry(tmp_path, {"a": OPENAI, "b": GEMINI}, "a", routing=[rule])
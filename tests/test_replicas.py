@@ -0,0 +1,92 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pymysql
+import pytest
+
+from src.database import async_connection, replicas
+from src.database.pool import ASYNC_DB_CONFIG, PoolTimeoutError
+from src.database.replicas import ReadRouter, Replica
+
+
+def _replica(name, healthy=True, lag=0.0, outstanding=0):
+    replica = Replica(name, {})
+    replica.healthy, replica.lag, replica.outstanding = healthy, lag, outstanding
+    return replica
+
+
+def _router(*replica_list):
+    router = ReadRouter(replica_list)
+    # No background lag checks in these tests
+    router._checked_at = time.monotonic() + 3600
+    return router
+
+
+def test_choose_prefers_the_least_busy_usable_replica():
+    busy, idle = _replica("busy", outstanding=3), _replica("idle", outstanding=1)
+    assert _router(busy, idle).choose() is idle
+
+
+def test_lagging_and_unhealthy_replicas_are_skipped(monkeypatch):
+    monkeypatch.setattr(replicas, "REPLICA_MAX_LAG", 2.0)
+    lagging = _replica("lagging", lag=5.0)
+    down = _replica("down", healthy=False)
+    fine = _replica("fine", lag=1.0, outstanding=10)
+    assert _router(lagging, down, fine).choose() is fine
+    # Unknown lag (no privilege to read it) routes on health alone
+    assert _router(_replica("unknown", lag=None)).choose().name == "unknown"
+
+
+def test_no_usable_replica_falls_back_to_the_primary():
+    assert _router(_replica("down", healthy=False)).choose() is None
+    assert ReadRouter().choose() is None
+
+
+def test_written_keys_stay_on_the_primary_for_the_window(monkeypatch):
+    monkeypatch.setattr(replicas, "READ_YOUR_WRITES_WINDOW", 0.05)
+    router = _router(_replica("r1"))
+    router.mark_written(("ticket", 1))
+    assert router.needs_primary([("ticket", 1), ("ticket", 2)])
+    assert not router.needs_primary([("ticket", 2)])
+    time.sleep(0.06)
+    assert not router.needs_primary([("ticket", 1)])
+
+
+def test_replicas_use_the_primary_credentials(monkeypatch):
+    monkeypatch.setattr(replicas, "REPLICA_HOSTS", ["replica-1:3307"])
+    monkeypatch.setattr(replicas, "_router", None)
+    [replica] = replicas.get_read_router().replicas
+    config = replica.manager.db_config
+    assert (config["host"], config["port"]) == ("replica-1", 3307)
+    assert config["user"] == ASYNC_DB_CONFIG["user"]
+    assert config["db"] == ASYNC_DB_CONFIG["db"]
+
+
+def _route_to(monkeypatch, replica, error):
+    @asynccontextmanager
+    async def acquire():
+        raise error
+        yield
+
+    monkeypatch.setattr(replica, "acquire", acquire)
+    monkeypatch.setattr(async_connection, "get_read_router", lambda: _router(replica))
+
+    async def read():
+        async with async_connection._read_connection(True):
+            pass
+
+    with pytest.raises(type(error)):
+        asyncio.run(read())
+
+
+def test_a_saturated_replica_is_not_marked_down(monkeypatch):
+    replica = _replica("r1")
+    _route_to(monkeypatch, replica, PoolTimeoutError("no connection within 1s"))
+    assert replica.healthy
+
+
+def test_a_failing_replica_is_marked_down(monkeypatch):
+    replica = _replica("r1")
+    _route_to(monkeypatch, replica, pymysql.err.OperationalError(2003, "Can't connect"))
+    assert not replica.healthy
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.database import repository
+from src.database.statements import row_type
+
+OrderRow = row_type(("id", "customer_id", "order_timestamp"))
+BASE = datetime(2026, 1, 1)
+
+
+def _orders(customer_id, ids):
+    # Higher id = newer order
+    return [OrderRow((order_id, customer_id, BASE + timedelta(minutes=order_id))) for order_id in ids]
+
+
+def _fake_fetch(monkeypatch, history, queries):
+    async def fetch(query, params, replica=False):
+        queries.append(params)
+        rows = []
+        # Subqueries come back in an arbitrary order, as UNION ALL allows
+        for customer_id, limit in reversed(list(zip(params[::2], params[1::2]))):
+            rows += list(reversed(history[customer_id][:limit]))
+        return rows
+
+    monkeypatch.setattr(repository, "async_fetch_rows", fetch)
+    monkeypatch.setattr(repository, "_replica_ok", lambda kind, ids: False)
+
+
+def test_recent_orders_with_mixed_limits_for_one_customer(monkeypatch):
+    history = {1: _orders(1, [10, 9, 8, 7]), 2: _orders(2, [5, 4])}
+    queries = []
+    _fake_fetch(monkeypatch, history, queries)
+
+    result = asyncio.run(repository._load_recent_orders([(1, 2), (1, 3), (2, 5)]))
+
+    assert [order["id"] for order in result[(1, 2)]] == [10, 9]
+    assert [order["id"] for order in result[(1, 3)]] == [10, 9, 8]
+    assert [order["id"] for order in result[(2, 5)]] == [5, 4]
+    # One subquery per customer, at the largest limit asked for
+    assert queries == [(1, 3, 2, 5)]
+
+
+def test_recent_orders_for_customer_without_orders(monkeypatch):
+    _fake_fetch(monkeypatch, {1: []}, [])
+
+    assert asyncio.run(repository._load_recent_orders([(1, 5)])) == {(1, 5): []}
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from src.utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        flights = SingleFlight("test")
+        results = await asyncio.gather(*(flights.do("key", load) for _ in range(5)))
+        return flights, results
+
+    flights, results = asyncio.run(main())
+    assert results == ["value"] * 5
+    assert calls == [1]
+    assert flights.stats() == {"calls": 5, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter_and_are_not_shared_afterwards():
+    attempts = []
+
+    async def load():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "recovered"
+
+    async def main():
+        flights = SingleFlight("test")
+        results = await asyncio.gather(flights.do("key", load), flights.do("key", load), return_exceptions=True)
+        return results, await flights.do("key", load)
+
+    results, retried = asyncio.run(main())
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert retried == "recovered"
+    assert len(attempts) == 2
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    async def load():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def main():
+        flights = SingleFlight("test")
+        first = asyncio.ensure_future(flights.do("key", load))
+        second = asyncio.ensure_future(flights.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "value"
+
+
+def test_forget_starts_a_new_call_for_later_callers():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        number = len(calls)
+        await asyncio.sleep(0.01)
+        return number
+
+    async def main():
+        flights = SingleFlight("test")
+        before = asyncio.ensure_future(flights.do("key", load))
+        await asyncio.sleep(0)
+        flights.forget("key")
+        after = await flights.do("key", load)
+        return await before, after
+
+    # The earlier caller keeps the old result; the later one got a fresh call
+    assert asyncio.run(main()) == (1, 2)
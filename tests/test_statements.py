@@ -0,0 +1,68 @@
+import pytest
+
+from src.database.statements import Row, Statement, decode_rows, row_type
+
+DESCRIPTION = (("id", 3), ("name", 253), ("email", 253))
+
+
+def _row():
+    [row] = decode_rows(DESCRIPTION, [(7, "Ada", None)])
+    return row
+
+
+def test_row_reads_like_a_dict():
+    row = _row()
+    assert row["id"] == 7
+    assert row["email"] is None
+    assert row.get("name") == "Ada"
+    assert row.get("missing") is None
+    assert row.get("missing", "x") == "x"
+    assert row.keys() == ("id", "name", "email")
+    assert list(row.items()) == [("id", 7), ("name", "Ada"), ("email", None)]
+    assert row.as_dict() == {"id": 7, "name": "Ada", "email": None}
+    # dict() and ** go through keys() and row[key]
+    assert dict(row) == row.as_dict()
+    assert (lambda **columns: columns)(**row) == row.as_dict()
+    with pytest.raises(KeyError):
+        row["missing"]
+
+
+def test_row_is_still_a_tuple():
+    row = _row()
+    assert isinstance(row, tuple)
+    assert list(row) == [7, "Ada", None]
+    assert row[0] == 7
+    assert row[-1] is None
+    assert row[1:] == ("Ada", None)
+    assert row == (7, "Ada", None)
+    assert hash(row) == hash((7, "Ada", None))
+    with pytest.raises(TypeError):
+        row["id"] = 8
+    with pytest.raises(AttributeError):
+        row.extra = 1
+
+
+def test_row_repr_names_columns():
+    assert repr(_row()) == "Row(id=7, name='Ada', email=None)"
+
+
+def test_row_type_is_made_once_per_shape():
+    assert row_type(("id", "name")) is row_type(("id", "name"))
+    assert row_type(("id", "name")) is not row_type(("name", "id"))
+    assert issubclass(row_type(("id",)), Row)
+    rows = decode_rows(DESCRIPTION, [(1, "a", None), (2, "b", "b@example.com")])
+    assert type(rows[0]) is type(rows[1])
+    assert rows[1]["email"] == "b@example.com"
+
+
+def test_decode_rows_without_a_result_set():
+    assert decode_rows(None, []) == []
+    assert decode_rows(DESCRIPTION, []) == []
+
+
+def test_statement_renders_each_variant():
+    listed = Statement("by_ids", "SELECT * FROM Orders WHERE id IN ({keys})")
+    assert listed.render(3) == "SELECT * FROM Orders WHERE id IN (%s, %s, %s)"
+    assert listed.render(3) is listed.render(3)
+    repeated = Statement("latest", "(SELECT %s)", repeat=" UNION ALL ")
+    assert repeated.render(2) == "(SELECT %s) UNION ALL (SELECT %s)"
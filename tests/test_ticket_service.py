@@ -0,0 +1,78 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.database import ticket_service
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self.lastrowid = 0
+        self._result = []
+
+    async def execute(self, query, params=None):
+        self.executed.append((query, params))
+        self.lastrowid += 1
+        if query == ticket_service.LEAST_LOADED_AGENT_QUERY:
+            self._result = [{"id": 3, "name": "Asha", "open_tickets": 0}]
+        elif query == ticket_service.LOCK_AVAILABLE_AGENTS_QUERY:
+            self._result = [{"id": 3}]
+        else:
+            self._result = []
+
+    async def fetchone(self):
+        return self._result[0] if self._result else None
+
+    async def fetchall(self):
+        return self._result
+
+
+def _fake_transaction(monkeypatch):
+    cursor = FakeCursor()
+    written = []
+
+    @asynccontextmanager
+    async def transaction():
+        yield cursor
+
+    monkeypatch.setattr(ticket_service, "async_transaction", transaction)
+    monkeypatch.setattr(ticket_service, "mark_written", lambda *keys: written.extend(keys))
+    return cursor, written
+
+
+def _create(phone):
+    return asyncio.run(ticket_service.create_ticket_for_email(
+        "new@example.com", "Late order", "Still waiting", phone=phone))
+
+
+def test_new_customer_is_stored_with_a_normalized_phone(monkeypatch):
+    cursor, written = _fake_transaction(monkeypatch)
+
+    customer, ticket = _create("98765 43210")
+
+    [insert] = [params for query, params in cursor.executed if query == ticket_service.INSERT_CUSTOMER_QUERY]
+    assert insert[2] == "+91-9876543210"
+    assert customer["phone"] == "+91-9876543210"
+    assert ("phone", "+91-9876543210") in written
+    assert ticket["agent_name"] == "Asha"
+
+
+def test_invalid_phone_is_left_out(monkeypatch):
+    cursor, written = _fake_transaction(monkeypatch)
+
+    customer, _ = _create("12345")
+
+    [insert] = [params for query, params in cursor.executed if query == ticket_service.INSERT_CUSTOMER_QUERY]
+    assert insert[2] is None
+    assert not [key for key in written if key[0] == "phone"]
+
+
+def test_agents_are_locked_before_their_tickets_are_counted(monkeypatch):
+    cursor, _ = _fake_transaction(monkeypatch)
+
+    _create("")
+
+    queries = [query for query, _ in cursor.executed]
+    assert queries.index(ticket_service.LOCK_AVAILABLE_AGENTS_QUERY) < queries.index(
+        ticket_service.LEAST_LOADED_AGENT_QUERY)
+    assert "FOR SHARE" in ticket_service.LEAST_LOADED_AGENT_QUERY
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import threading
+
+import pymysql
+
+from src.database import write_behind
+from src.database.write_behind import WriteBehind
+
+
+def _entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _writer(tmp_path, inserted, fail=lambda record: None, **kwargs):
+    writer = WriteBehind(spool_dir=tmp_path, flush_interval=0.001, **kwargs)
+
+    async def insert(batch):
+        for record in batch:
+            fail(record)
+        inserted.extend(batch)
+
+    writer._insert = insert
+    return writer
+
+
+def test_dead_process_spool_is_replayed_with_its_write_ids(tmp_path):
+    dead = tmp_path / "write_behind-999999.jsonl"
+    dead.write_text("\n".join(json.dumps(entry) for entry in (
+        {"seq": 1, "kind": "ticket_comment", "params": [1, "a", "x", "t"], "write_id": "w1"},
+        {"seq": 2, "kind": "ticket_comment", "params": [1, "b", "x", "t"], "write_id": "w2"},
+        {"seq": 3, "kind": "audit_event", "params": ["e", None, None, None, None, "t"]},
+        {"ack": [1]},
+    )) + '\n{"seq": 4, "kind": "ticket_comm')
+    inserted = []
+
+    async def main():
+        writer = _writer(tmp_path, inserted)
+        writer.start()
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(main())
+    assert not dead.exists()
+    assert [(record[1], record[2][1]) for record in inserted] == [("ticket_comment", "b"), ("audit_event", None)]
+    assert inserted[0][3] == "w2"
+    # Legacy entries without an ID get one, so they still insert
+    assert len(inserted[1][3]) == 32
+    assert writer.pending == 0
+    assert not writer.spool_path.exists()
+
+
+def test_unflushed_writes_stay_in_the_spool_with_their_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "TRANSIENT_ERRORS", (pymysql.OperationalError,))
+
+    def fail(record):
+        raise pymysql.OperationalError(2013, "Lost connection")
+
+    async def main():
+        writer = _writer(tmp_path, [], fail, retries=1)
+        await writer.submit("ticket_comment", (1, "hello", "agent", "t"))
+        await asyncio.sleep(0.2)
+        assert writer.pending == 1
+        assert writer._orphans
+        writer._writer.cancel()
+        return writer
+
+    writer = asyncio.run(main())
+    [entry] = _entries(writer.spool_path)
+    assert entry["params"] == [1, "hello", "agent", "t"]
+    write_id = entry["write_id"]
+
+    # A replay by the next process reuses the ID, so a committed write is not inserted twice
+    inserted = []
+    writer._spool.close()
+    writer.spool_path.rename(tmp_path / "write_behind-999999.jsonl")
+
+    async def replay():
+        writer = _writer(tmp_path, inserted)
+        writer.start()
+        await writer.close()
+
+    asyncio.run(replay())
+    assert [record[3] for record in inserted] == [write_id]
+
+
+def test_orphans_are_retried_from_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "ORPHAN_RETRY_INTERVAL", 0.01)
+    monkeypatch.setattr(write_behind, "TRANSIENT_ERRORS", (pymysql.OperationalError,))
+    failing = [True]
+    inserted = []
+
+    def fail(record):
+        if failing[0]:
+            raise pymysql.OperationalError(2013, "Lost connection")
+
+    async def main():
+        writer = _writer(tmp_path, inserted, fail, retries=1)
+        await writer.submit("ticket_comment", (1, "hello", "agent", "t"))
+        await asyncio.sleep(0.2)
+        assert writer.pending == 1
+        # The retry must not depend on re-reading the spool
+        writer.spool_path.write_text("")
+        failing[0] = False
+        await asyncio.sleep(0.1)
+        assert writer.pending == 0
+        assert not writer._orphans
+        await writer.close()
+
+    asyncio.run(main())
+    assert [record[2][1] for record in inserted] == ["hello"]
+
+
+def test_rejected_rows_are_dropped_without_failing_the_batch(tmp_path):
+    inserted = []
+
+    def fail(record):
+        if record[2][0] == 2:
+            raise pymysql.IntegrityError(1452, "Cannot add or update a child row")
+
+    async def main():
+        writer = _writer(tmp_path, inserted, fail)
+        for ticket_id in (1, 2, 3):
+            await writer.submit("ticket_comment", (ticket_id, "c", "agent", "t"))
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(main())
+    assert sorted({record[2][0] for record in inserted}) == [1, 3]
+    assert writer.pending == 0
+
+
+def test_spool_is_compacted_while_writes_are_pending(tmp_path):
+    inserted = []
+
+    async def main():
+        writer = _writer(tmp_path, inserted, flush_size=1, compact_after=5)
+        writer.start()
+        # Spooled but never queued, so the spool is never empty
+        stuck = await writer._append("ticket_comment", [0, "stuck", "agent", "t"])
+        for ticket_id in range(1, 13):
+            await writer.submit("ticket_comment", (ticket_id, "c", "agent", "t"))
+            await asyncio.sleep(0.01)
+        entries = _entries(writer.spool_path)
+        writer._writer.cancel()
+        writer._spool.close()
+        return writer, stuck, entries
+
+    writer, stuck, entries = asyncio.run(main())
+    assert len(inserted) == 12
+    assert writer.pending == 1
+    # 13 writes and 12 acks without compaction
+    assert len(entries) < 10
+    assert {"seq": stuck[0], "kind": "ticket_comment", "params": [0, "stuck", "agent", "t"],
+            "write_id": stuck[3]} in entries
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_spool_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "SPOOL_FSYNC", True)
+    threads = []
+    fsync = write_behind.os.fsync
+
+    def tracking_fsync(fd):
+        threads.append(threading.current_thread())
+        fsync(fd)
+
+    monkeypatch.setattr(write_behind.os, "fsync", tracking_fsync)
+    inserted = []
+
+    async def main():
+        writer = _writer(tmp_path, inserted)
+        writer.start()
+        await writer.submit("audit_event", ("e", None, None, None, None, "t"))
+        await writer.close()
+
+    asyncio.run(main())
+    assert len(inserted) == 1
+    # The submit and its ack, each synced on the spool thread
+    assert len(threads) >= 2
+    assert threading.main_thread() not in threads